@@ -0,0 +1,146 @@
+"""Benchmarks musync's sync functions against synthetic in-memory libraries.
+
+Run with `python benchmarks/bench_sync.py --help` to see the available options.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+
+import typer
+
+from musync.logger import logger
+from musync.providers.memory import InMemoryClient, generate_library
+from musync.sync import (
+    sync_followed_artists,
+    sync_followed_playlists,
+    sync_providers,
+    sync_users_playlists,
+)
+
+app = typer.Typer()
+
+
+def run_scenario(
+    name: str,
+    clients: list[InMemoryClient],
+    scenario: Callable[[], object],
+) -> dict:
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    scenario()
+    wall_time = time.perf_counter() - started_at
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calls: Counter[str] = Counter()
+    for client in clients:
+        for endpoint, count in client.calls.items():
+            calls[f"{client.provider_name}.{endpoint}"] += count
+
+    return {
+        "scenario": name,
+        "wall_time_seconds": round(wall_time, 3),
+        "peak_memory_bytes": peak_memory,
+        "api_calls": sum(calls.values()),
+        "api_calls_by_endpoint": dict(sorted(calls.items())),
+    }
+
+
+@app.command()
+def main(
+    playlists: int = typer.Option(500, help="User playlists per provider"),
+    followed_playlists: int = typer.Option(50, help="Followed playlists per provider"),
+    tracks_per_playlist: int = typer.Option(200, help="Tracks per playlist"),
+    unique_tracks: int = typer.Option(
+        40_000, help="Distinct tracks the playlists are drawn from"
+    ),
+    followed_artists: int = typer.Option(600, help="Followed artists per provider"),
+    latency: float = typer.Option(0.0, help="Simulated latency of each API call"),
+    failure_rate: float = typer.Option(
+        0.0, help="Probability of each API call being throttled"
+    ),
+    missing_rate: float = typer.Option(
+        0.05, help="Fraction of songs and artists that can't be found"
+    ),
+    concurrency: int = typer.Option(4, help="Songs to search for in parallel"),
+    output: Path | None = typer.Option(None, help="Write the results as JSON"),
+) -> None:
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    def client(name: str, seed: int = 0) -> InMemoryClient:
+        return InMemoryClient(
+            provider_name=name,
+            library=generate_library(
+                name.lower(),
+                user_playlists=playlists,
+                followed_playlists=followed_playlists,
+                tracks_per_playlist=tracks_per_playlist,
+                unique_tracks=unique_tracks,
+                artists=max(followed_artists * 2, 1),
+                followed_artists=followed_artists,
+                seed=seed,
+            ),
+            latency=latency,
+            failure_rate=failure_rate,
+            missing_rate=missing_rate,
+        )
+
+    results = []
+
+    source, destination = client("Source"), client("Destination", seed=1)
+    results.append(
+        run_scenario(
+            "sync_users_playlists",
+            [source, destination],
+            lambda: sync_users_playlists(source, destination, concurrency),
+        )
+    )
+
+    source, destination = client("Source"), client("Destination", seed=1)
+    results.append(
+        run_scenario(
+            "sync_followed_playlists",
+            [source, destination],
+            lambda: sync_followed_playlists(source, destination, concurrency),
+        )
+    )
+
+    source, destination = client("Source"), client("Destination", seed=1)
+    results.append(
+        run_scenario(
+            "sync_followed_artists",
+            [source, destination],
+            lambda: sync_followed_artists(source, destination),
+        )
+    )
+
+    clients = [client("First"), client("Second", seed=1), client("Third", seed=2)]
+    results.append(
+        run_scenario(
+            "multisync",
+            clients,
+            lambda: sync_providers(clients, concurrency=concurrency),
+        )
+    )
+
+    for result in results:
+        typer.echo(
+            f"{result['scenario']:<24} {result['wall_time_seconds']:>8.3f}s "
+            f"{result['api_calls']:>8} calls "
+            f"{result['peak_memory_bytes'] / 2**20:>8.1f} MiB peak"
+        )
+        for endpoint, count in result["api_calls_by_endpoint"].items():
+            typer.echo(f"    {endpoint:<36} {count:>8}")
+
+    if output:
+        output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,107 @@
+import time
+import tomllib
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from musync.logger import logger
+
+
+class AccountConfig(BaseModel):
+    """An account to sync from its source provider to its destination provider.
+
+    `credentials` holds the keyword arguments of each provider's client, by
+    provider name. Providers without credentials are configured from the
+    environment. Numbers are read as strings, as if they were set in the
+    environment, e.g. `library_ttl = 300`.
+    """
+
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    name: str
+    source: str
+    destination: str
+    credentials: dict[str, dict[str, str]] = Field(default_factory=dict)
+    user_playlists: bool = True
+    followed_playlists: bool = True
+    followed_artists: bool = True
+    mirror: bool = False
+
+
+class BatchConfig(BaseModel):
+    """The accounts to sync, and how many of them to sync at once."""
+
+    concurrency: int = Field(4, ge=1)
+    accounts: list[AccountConfig]
+
+    @model_validator(mode="after")
+    def check_unique_names(self) -> "BatchConfig":
+        names = [account.name for account in self.accounts]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(
+                f"Duplicate account names: {', '.join(sorted(duplicates))}"
+            )
+
+        return self
+
+    @classmethod
+    def from_file(cls, path: Path) -> "BatchConfig":
+        with path.open("rb") as f:
+            return cls.model_validate(tomllib.load(f))
+
+
+class AccountResult(BaseModel):
+    name: str
+    seconds: float
+    error: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def sync_accounts(
+    accounts: list[AccountConfig],
+    sync_account: Callable[[AccountConfig], None],
+    concurrency: int = 1,
+) -> list[AccountResult]:
+    """Sync up to `concurrency` accounts at once, carrying on past failed accounts.
+
+    Accounts run on threads of this process, so clients of the same provider
+    share its rate limiter and every account is held to the same budget.
+    """
+
+    def run(account: AccountConfig) -> AccountResult:
+        logger.info(f"Syncing account {account.name}")
+        started = time.perf_counter()
+        try:
+            sync_account(account)
+        except Exception as e:  # noqa: BLE001 - recorded in the account's result
+            logger.exception(f"Failed to sync account {account.name}")
+            return AccountResult(
+                name=account.name,
+                seconds=time.perf_counter() - started,
+                error=str(e) or type(e).__name__,
+            )
+
+        return AccountResult(name=account.name, seconds=time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(run, accounts))
+
+
+def log_batch_summary(results: list[AccountResult], seconds: float) -> None:
+    failed = [result for result in results if not result.succeeded]
+    lines = [
+        f"  {result.name}: {'ok' if result.succeeded else 'failed'} in {result.seconds:.1f}s"
+        + (f" ({result.error})" if result.error else "")
+        for result in results
+    ]
+    slowest = max((result.seconds for result in results), default=0.0)
+    logger.info(
+        f"Synced {len(results) - len(failed)}/{len(results)} accounts in {seconds:.1f}s "
+        f"(slowest account {slowest:.1f}s)\n" + "\n".join(lines)
+    )
@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from musync.logger import logger
+from musync.models import Song
+from musync.providers.base import ProviderClient, ProviderClientWrapper
+
+FOUND_TTL_SECONDS = 30 * 24 * 60 * 60
+NOT_FOUND_TTL_SECONDS = 24 * 60 * 60
+
+
+def default_cache_dir() -> Path:
+    cache_dir = os.getenv("MUSYNC_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+
+    return Path.home() / ".cache" / "musync"
+
+
+class SongMatchCache:
+    """Persistent store of `find_song` results per provider and normalized title/artist.
+
+    Songs that could not be found are cached too, but expire sooner so that
+    newly released tracks are eventually picked up.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        found_ttl: float = FOUND_TTL_SECONDS,
+        not_found_ttl: float = NOT_FOUND_TTL_SECONDS,
+    ):
+        self.path = path
+        self.found_ttl = found_ttl
+        self.not_found_ttl = not_found_ttl
+        self.hits = 0
+        self.misses = 0
+
+        # Searches may be resolved from several threads at once
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS song_matches (
+                provider TEXT NOT NULL,
+                title TEXT NOT NULL,
+                artist TEXT NOT NULL,
+                match TEXT,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (provider, title, artist)
+            )
+            """
+        )
+        self._connection.commit()
+        self.evict_expired()
+
+    @classmethod
+    def from_env(cls) -> "SongMatchCache":
+        cache_dir = default_cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return cls(cache_dir / "song_matches.db")
+
+    def get(self, provider: str, song: Song) -> tuple[bool, Song | None]:
+        """Return whether the song is cached, and the cached match if it is."""
+        title, artist = song.match_key
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT match FROM song_matches "
+                "WHERE provider = ? AND title = ? AND artist = ? AND expires_at > ?",
+                (provider, title, artist, time.time()),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return False, None
+
+            self.hits += 1
+
+        match = row[0]
+        return True, Song.model_validate_json(match) if match is not None else None
+
+    def set(self, provider: str, song: Song, match: Song | None) -> None:
+        title, artist = song.match_key
+        ttl = self.found_ttl if match is not None else self.not_found_ttl
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO song_matches VALUES (?, ?, ?, ?, ?)",
+                (
+                    provider,
+                    title,
+                    artist,
+                    match.model_dump_json() if match is not None else None,
+                    time.time() + ttl,
+                ),
+            )
+            self._connection.commit()
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM song_matches WHERE expires_at <= ?", (time.time(),)
+            )
+            self._connection.commit()
+        if cursor.rowcount:
+            logger.debug(f"Evicted {cursor.rowcount} expired song matches")
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __str__(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
+
+
+class CachingClient(ProviderClientWrapper):
+    """Answers `find_song` from a `SongMatchCache` before asking the wrapped client."""
+
+    def __init__(self, client: ProviderClient, cache: SongMatchCache):
+        super().__init__(client)
+        self.cache = cache
+
+    def find_song(self, song: Song) -> Song | None:
+        hit, match = self.cache.get(self.provider_name, song)
+        if hit:
+            return match
+
+        match = self._client.find_song(song)
+        self.cache.set(self.provider_name, song, match)
+        return match
@@ -0,0 +1,212 @@
+from collections import Counter, defaultdict, deque
+from typing import NamedTuple
+
+from musync.models import Song
+
+
+class Move(NamedTuple):
+    """Move `range_length` items starting at `range_start` to before `insert_before`.
+
+    Positions are those in the playlist before the move, as in Spotify's
+    reorder endpoint.
+    """
+
+    range_start: int
+    insert_before: int
+    range_length: int = 1
+
+
+class PlaylistDiff(NamedTuple):
+    """Edits that turn a playlist into another, applied in the order listed.
+
+    `removals` are positions in the current playlist, `additions` are appended
+    after the removals, and `moves` then put every song in its place.
+    """
+
+    removals: list[int]
+    additions: list[Song]
+    moves: list[Move]
+
+    def __bool__(self) -> bool:
+        return bool(self.removals or self.additions or self.moves)
+
+
+def remove_positions[T](items: list[T], positions: list[int]) -> list[T]:
+    removed = set(positions)
+    return [item for position, item in enumerate(items) if position not in removed]
+
+
+def apply_moves[T](items: list[T], moves: list[Move]) -> list[T]:
+    items = list(items)
+    for range_start, insert_before, range_length in moves:
+        moved = items[range_start : range_start + range_length]
+        del items[range_start : range_start + range_length]
+        if insert_before > range_start:
+            insert_before -= range_length
+        items[insert_before:insert_before] = moved
+
+    return items
+
+
+def longest_increasing_subsequence(values: list[int]) -> set[int]:
+    """Return the values in a longest strictly increasing subsequence of `values`."""
+    # tails[length - 1] is the index of the smallest value ending a subsequence
+    # of that length, and previous links each index to its predecessor
+    tails: list[int] = []
+    previous: list[int | None] = [None] * len(values)
+    for index, value in enumerate(values):
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if values[tails[middle]] < value:
+                low = middle + 1
+            else:
+                high = middle
+
+        previous[index] = tails[low - 1] if low else None
+        if low == len(tails):
+            tails.append(index)
+        else:
+            tails[low] = index
+
+    subsequence: set[int] = set()
+    current = tails[-1] if tails else None
+    while current is not None:
+        subsequence.add(values[current])
+        current = previous[current]
+
+    return subsequence
+
+
+class OccupiedSlots:
+    """Counts the occupied slots before any slot, as a Fenwick tree."""
+
+    def __init__(self, occupied: list[bool]):
+        self._tree = [0] * (len(occupied) + 1)
+        for slot, is_occupied in enumerate(occupied, 1):
+            self._tree[slot] += is_occupied
+            parent = slot + (slot & -slot)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[slot]
+
+    def update(self, slot: int, change: int) -> None:
+        slot += 1
+        while slot < len(self._tree):
+            self._tree[slot] += change
+            slot += slot & -slot
+
+    def count_before(self, slot: int) -> int:
+        count = 0
+        while slot:
+            count += self._tree[slot]
+            slot -= slot & -slot
+        return count
+
+    def find(self, count: int) -> int:
+        """Return the occupied slot with `count` occupied slots before it."""
+        slot = 0
+        step = 1 << len(self._tree).bit_length()
+        while step:
+            if slot + step < len(self._tree) and self._tree[slot + step] <= count:
+                slot += step
+                count -= self._tree[slot]
+            step >>= 1
+        return slot
+
+
+def plan_moves(order: list[int]) -> list[Move]:
+    """Plan the moves that sort `order`, a permutation of `range(len(order))`.
+
+    Items in a longest increasing subsequence stay where they are, and every
+    other item is moved once, right after its predecessor. Runs of items that
+    are already next to each other are moved together.
+    """
+    in_place = longest_increasing_subsequence(order)
+
+    # As each item moves at most once, to right after its predecessor, the
+    # slots that items are in before and after moving can be laid out up
+    # front: every moved item's new slot follows its predecessor's last slot.
+    # An item's position is then the number of occupied slots before its own.
+    layout: list[int] = []
+    new_slots: dict[int, int] = {}
+
+    def add_moved_after(value: int) -> None:
+        value += 1
+        while value < len(order) and value not in in_place:
+            new_slots[value] = len(layout)
+            layout.append(value)
+            value += 1
+
+    slots = [0] * len(order)
+    add_moved_after(-1)
+    for value in order:
+        slots[value] = len(layout)
+        layout.append(value)
+        if value in in_place:
+            add_moved_after(value)
+
+    is_original = [True] * len(layout)
+    for slot in new_slots.values():
+        is_original[slot] = False
+    occupied = OccupiedSlots(is_original)
+
+    moves: list[Move] = []
+    value = 0
+    while value < len(order):
+        if value in in_place:
+            value += 1
+            continue
+
+        range_start = occupied.count_before(slots[value])
+        range_length = 1
+        while (
+            range_start + range_length < len(order)
+            and value + range_length not in in_place
+            and layout[occupied.find(range_start + range_length)]
+            == value + range_length
+        ):
+            range_length += 1
+
+        insert_before = occupied.count_before(slots[value - 1]) + 1 if value else 0
+        move = Move(range_start, insert_before, range_length)
+        if insert_before not in range(range_start, range_start + range_length + 1):
+            moves.append(move)
+
+        # A range that's already after its predecessor moves to its new slots
+        # without any occupied slot in between, so no move is needed for it
+        for moved in range(value, value + range_length):
+            occupied.update(slots[moved], -1)
+            slots[moved] = new_slots[moved]
+            occupied.update(slots[moved], 1)
+
+        value += range_length
+
+    return moves
+
+
+def diff_playlist(current: list[Song], target: list[Song]) -> PlaylistDiff:
+    """Compare two playlists by song id and plan the edits from one to the other."""
+    wanted = Counter(song.id for song in target)
+
+    removals: list[int] = []
+    kept: list[Song] = []
+    for position, song in enumerate(current):
+        if wanted[song.id]:
+            wanted[song.id] -= 1
+            kept.append(song)
+        else:
+            removals.append(position)
+
+    additions: list[Song] = []
+    for song in target:
+        if wanted[song.id]:
+            wanted[song.id] -= 1
+            additions.append(song)
+
+    # Repeated songs are matched to their target positions in order
+    target_positions: dict[str, deque[int]] = defaultdict(deque)
+    for position, song in enumerate(target):
+        target_positions[song.id].append(position)
+    order = [target_positions[song.id].popleft() for song in kept + additions]
+
+    return PlaylistDiff(removals, additions, plan_moves(order))
@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+from musync.cache import default_cache_dir
+from musync.models import Song
+from musync.models.artist import Artist
+from musync.providers.base import ProviderClient
+
+
+class SyncJournal:
+    """Write-ahead journal of a sync's progress, so an interrupted run can resume.
+
+    Every song and artist match is written as soon as it's found, and every
+    playlist once its destination has been written, so a resumed run neither
+    searches for them nor writes them again. The journal is cleared once a run
+    completes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # Every match is committed on its own, so trade a little durability on
+        # power loss for far fewer fsyncs
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS matches (
+                kind TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                match_key TEXT NOT NULL,
+                match TEXT,
+                PRIMARY KEY (kind, provider, match_key)
+            );
+            CREATE TABLE IF NOT EXISTS completed_playlists (
+                source_provider TEXT NOT NULL,
+                source_playlist_id TEXT NOT NULL,
+                destination_provider TEXT NOT NULL,
+                destination_playlist_id TEXT NOT NULL,
+                PRIMARY KEY (source_provider, source_playlist_id, destination_provider)
+            );
+            """
+        )
+        self._connection.commit()
+
+    @classmethod
+    def from_env(cls) -> "SyncJournal":
+        cache_dir = default_cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return cls(cache_dir / "journal.db")
+
+    def __record_match(
+        self, kind: str, provider: str, match_key: str, match: str | None
+    ) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?)",
+                (kind, provider, match_key, match),
+            )
+            self._connection.commit()
+
+    def __matches(self, kind: str, provider: str) -> dict[str, str | None]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT match_key, match FROM matches WHERE kind = ? AND provider = ?",
+                (kind, provider),
+            ).fetchall()
+
+        return dict(rows)
+
+    def record_song(self, provider: str, song: Song, match: Song | None) -> None:
+        self.__record_match(
+            "song",
+            provider,
+            "\n".join(song.match_key),
+            match.model_dump_json() if match is not None else None,
+        )
+
+    def songs(self, provider: str) -> dict[tuple[str, str], Song | None]:
+        """Return the songs matched on `provider`, by normalized title and artist."""
+        songs: dict[tuple[str, str], Song | None] = {}
+        for match_key, match in self.__matches("song", provider).items():
+            title, artist = match_key.split("\n")
+            songs[(title, artist)] = (
+                Song.model_validate_json(match) if match is not None else None
+            )
+
+        return songs
+
+    def record_artist(
+        self, provider: str, artist: Artist, match: Artist | None
+    ) -> None:
+        self.__record_match(
+            "artist",
+            provider,
+            artist.match_key,
+            match.model_dump_json() if match is not None else None,
+        )
+
+    def artists(self, provider: str) -> dict[str, Artist | None]:
+        """Return the artists matched on `provider`, by normalized name."""
+        return {
+            match_key: Artist.model_validate_json(match) if match is not None else None
+            for match_key, match in self.__matches("artist", provider).items()
+        }
+
+    def complete_playlist(
+        self,
+        source_client: ProviderClient,
+        destination_client: ProviderClient,
+        source_playlist_id: str,
+        destination_playlist_id: str,
+    ) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO completed_playlists VALUES (?, ?, ?, ?)",
+                (
+                    source_client.provider_name,
+                    source_playlist_id,
+                    destination_client.provider_name,
+                    destination_playlist_id,
+                ),
+            )
+            self._connection.commit()
+
+    def is_playlist_complete(
+        self,
+        source_client: ProviderClient,
+        destination_client: ProviderClient,
+        source_playlist_id: str,
+    ) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM completed_playlists "
+                "WHERE source_provider = ? AND source_playlist_id = ? "
+                "AND destination_provider = ?",
+                (
+                    source_client.provider_name,
+                    source_playlist_id,
+                    destination_client.provider_name,
+                ),
+            ).fetchone()
+
+        return row is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM matches")
+            self._connection.execute("DELETE FROM completed_playlists")
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -1,45 +1,165 @@
+import contextlib
+import time
 from enum import Enum
-import itertools
+from pathlib import Path
 import dotenv
+from musync.batch import (
+    AccountConfig,
+    BatchConfig,
+    log_batch_summary,
+    sync_accounts,
+)
+from musync.cache import CachingClient, SongMatchCache
+from musync.journal import SyncJournal
 from musync.logger import logger
+from musync.metrics import metrics
+from musync.profiling import profiler
 import typer
 
-from musync.providers import SpotifyClient, YoutubeClient
 from musync.providers.base import ProviderClient
+from musync.providers.instrumented import InstrumentedClient
+from musync.providers.registry import get_provider_class, provider_names
+from musync.providers.snapshot import SnapshotClient
+from musync.ratelimit import rate_limiters
+from musync.plan import SyncPlan
+from musync.snapshot import write_snapshot
+from musync.state import SyncState
 from musync.sync import (
+    apply_sync_plan,
     delete_synced_playlists,
-    sync_followed_artists,
-    sync_followed_playlists,
-    sync_users_playlists,
+    plan_sync,
+    sync_providers,
+    sync_source_to_destination,
+    watch_providers,
 )
 
-from typing import Type
-
 dotenv.load_dotenv()
 
 app = typer.Typer()
 
 
-class Provider(str, Enum):
-    spotify = "spotify"
-    youtube = "youtube"
+Provider = Enum(  # type: ignore[misc]
+    "Provider", {name: name for name in provider_names()}, type=str
+)
 
 
-def get_provider_client(provider: Provider, read_only: bool) -> ProviderClient:
-    clients: dict[Provider, Type[ProviderClient]] = {
-        Provider.spotify: SpotifyClient,
-        Provider.youtube: YoutubeClient,
-    }
+def get_provider_client(
+    provider: Provider, read_only: bool, account: AccountConfig | None = None
+) -> ProviderClient:
+    client_class = get_provider_class(provider.value)
+    if account is None:
+        client = client_class.from_env(read_only=read_only)
+    else:
+        client = client_class.from_credentials(
+            account.credentials.get(provider.value, {}),
+            read_only=read_only,
+            account=account.name,
+        )
 
-    try:
-        return clients[provider].from_env(read_only=read_only)
-    except KeyError:
-        raise ValueError(f"Invalid provider: {provider}")
+    return InstrumentedClient(client)
+
+
+def get_song_cache(enabled: bool) -> SongMatchCache | None:
+    if not enabled:
+        return None
+
+    return SongMatchCache.from_env()
+
+
+def with_song_cache(
+    client: ProviderClient, song_cache: SongMatchCache | None
+) -> ProviderClient:
+    if song_cache is None:
+        return client
+
+    return CachingClient(client, song_cache)
+
+
+def report_song_cache(song_cache: SongMatchCache | None) -> None:
+    if song_cache is None:
+        return
+
+    logger.info(f"Song match cache: {song_cache}")
+    song_cache.close()
+
+
+def report_rate_limits() -> None:
+    for rate_limiter in rate_limiters():
+        logger.info(f"{rate_limiter.provider_name} rate limits: {rate_limiter}")
+
+
+def get_journal(resume: bool, dry_run: bool) -> SyncJournal | None:
+    # Dry runs don't write anything, so they have nothing to resume
+    if dry_run:
+        return None
+
+    journal = SyncJournal.from_env()
+    if not resume:
+        journal.clear()
+
+    return journal
+
+
+def finish_journal(journal: SyncJournal | None) -> None:
+    """Clear the journal of a run that completed, there's nothing left to resume."""
+    if journal is None:
+        return
+
+    journal.clear()
+    journal.close()
+
+
+def write_metrics(metrics_out: Path | None) -> None:
+    if metrics_out is None:
+        return
+
+    metrics.write(metrics_out)
+    logger.info(f"Wrote run metrics to {metrics_out}")
+
+
+def get_sync_state(enabled: bool, account: str | None = None) -> SyncState | None:
+    if not enabled:
+        return None
+
+    return SyncState.from_env(account)
+
+
+def serial_when_profiling(
+    concurrency: int, stream_window: int | None = None
+) -> tuple[int, int | None]:
+    """Return the concurrency and stream window to sync with.
+
+    Only the main thread is profiled, so when profiling, songs are searched
+    for and playlists prepared there rather than on worker threads.
+    """
+    if profiler.enabled and (concurrency > 1 or stream_window is not None):
+        logger.warning(
+            "Profiling searches for songs one at a time and doesn't stream playlists"
+        )
+        return 1, None
+
+    return concurrency, stream_window
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: Path | None = typer.Option(
+        None,
+        help="Profile each sync phase and write the profiles to this directory",
+    ),
+    profile_top: int = typer.Option(
+        20, min=1, help="The number of hottest functions to show for each phase"
+    ),
+) -> None:
+    if profile is not None:
+        profiler.enable(profile, profile_top)
+        ctx.call_on_close(profiler.report)
 
 
 @app.command()
 def unisync(
-    source: Provider = typer.Option(..., help="The source provider"),
+    source: Provider | None = typer.Option(None, help="The source provider"),
     destination: Provider = typer.Option(..., help="The destination provider"),
     user_playlists: bool = typer.Option(True, help="Whether to sync user playlists"),
     followed_playlists: bool = typer.Option(
@@ -49,18 +169,72 @@ def unisync(
         True, help="Whether to sync followed artists"
     ),
     dry_run: bool = typer.Option(False, help="Whether to run in read-only mode"),
+    cache: bool = typer.Option(
+        True, help="Whether to cache song search results between runs"
+    ),
+    concurrency: int = typer.Option(
+        4, min=1, help="The number of songs to search for in parallel"
+    ),
+    incremental: bool = typer.Option(
+        True, help="Whether to skip playlists that haven't changed since the last sync"
+    ),
+    stream_window: int | None = typer.Option(
+        None,
+        min=1,
+        help="Sync playlists as they are fetched, preparing at most this many ahead",
+    ),
+    mirror: bool = typer.Option(
+        False,
+        help="Whether to also remove and reorder songs so synced playlists match their source",
+    ),
+    resume: bool = typer.Option(
+        False, help="Whether to pick up where an interrupted run stopped"
+    ),
+    metrics_out: Path | None = typer.Option(
+        None, help="Write API call metrics and phase timings to this JSON file"
+    ),
+    from_snapshot: Path | None = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        help="Sync from a snapshot written by `musync snapshot` instead of --source",
+    ),
 ) -> None:
-    source_client = get_provider_client(source, read_only=dry_run)
-    destination_client = get_provider_client(destination, read_only=dry_run)
+    if (source is None) == (from_snapshot is None):
+        raise typer.BadParameter("Pass exactly one of --source and --from-snapshot")
+    concurrency, stream_window = serial_when_profiling(concurrency, stream_window)
 
-    if user_playlists:
-        sync_users_playlists(source_client, destination_client)
+    with contextlib.ExitStack() as stack:
+        stack.callback(write_metrics, metrics_out)
+        song_cache = get_song_cache(cache)
+        sync_state = get_sync_state(incremental)
+        journal = get_journal(resume, dry_run)
+        source_client: ProviderClient
+        if from_snapshot is not None:
+            snapshot_client = stack.enter_context(SnapshotClient(from_snapshot))
+            source_client = InstrumentedClient(snapshot_client)
+        elif source is not None:
+            source_client = get_provider_client(source, read_only=dry_run)
+        destination_client = with_song_cache(
+            get_provider_client(destination, read_only=dry_run), song_cache
+        )
 
-    if followed_playlists:
-        sync_followed_playlists(source_client, destination_client)
+        sync_source_to_destination(
+            source_client,
+            destination_client,
+            user_playlists,
+            followed_playlists,
+            followed_artists,
+            concurrency,
+            sync_state,
+            stream_window,
+            mirror,
+            journal,
+        )
 
-    if followed_artists:
-        sync_followed_artists(source_client, destination_client)
+        finish_journal(journal)
+        report_song_cache(song_cache)
+        report_rate_limits()
 
 
 @app.command()
@@ -74,26 +248,302 @@ def multisync(
         True, help="Whether to sync followed artists"
     ),
     dry_run: bool = typer.Option(False, help="Whether to run in read-only mode"),
+    cache: bool = typer.Option(
+        True, help="Whether to cache song search results between runs"
+    ),
+    concurrency: int = typer.Option(
+        4, min=1, help="The number of songs to search for in parallel"
+    ),
+    incremental: bool = typer.Option(
+        True, help="Whether to skip playlists that haven't changed since the last sync"
+    ),
+    stream_window: int | None = typer.Option(
+        None,
+        min=1,
+        help="Sync playlists as they are fetched, preparing at most this many ahead",
+    ),
+    mirror: bool = typer.Option(
+        False,
+        help="Whether to also remove and reorder songs so synced playlists match their source",
+    ),
+    resume: bool = typer.Option(
+        False, help="Whether to pick up where an interrupted run stopped"
+    ),
+    metrics_out: Path | None = typer.Option(
+        None, help="Write API call metrics and phase timings to this JSON file"
+    ),
 ) -> None:
     logger.debug(
         f"Running multisync for providers: {providers} ({user_playlists=}, {followed_playlists=}, {dry_run=})"
     )
+    concurrency, stream_window = serial_when_profiling(concurrency, stream_window)
+    try:
+        song_cache = get_song_cache(cache)
+        sync_state = get_sync_state(incremental)
+        journal = get_journal(resume, dry_run)
+        clients = [
+            with_song_cache(
+                get_provider_client(provider, read_only=dry_run), song_cache
+            )
+            for provider in providers
+        ]
+
+        sync_providers(
+            clients,
+            user_playlists=user_playlists,
+            followed_playlists=followed_playlists,
+            followed_artists=followed_artists,
+            concurrency=concurrency,
+            sync_state=sync_state,
+            stream_window=stream_window,
+            mirror=mirror,
+            journal=journal,
+        )
+
+        finish_journal(journal)
+        report_song_cache(song_cache)
+        report_rate_limits()
+    finally:
+        write_metrics(metrics_out)
+
+
+@app.command()
+def watch(
+    providers: list[Provider] = typer.Argument(..., help="The providers to sync"),
+    interval: float = typer.Option(
+        60, min=1, help="The number of seconds between polls for changes"
+    ),
+    user_playlists: bool = typer.Option(True, help="Whether to sync user playlists"),
+    followed_playlists: bool = typer.Option(
+        True, help="Whether to sync followed playlists"
+    ),
+    followed_artists: bool = typer.Option(
+        True, help="Whether to sync followed artists"
+    ),
+    dry_run: bool = typer.Option(False, help="Whether to run in read-only mode"),
+    cache: bool = typer.Option(
+        True, help="Whether to cache song search results between runs"
+    ),
+    concurrency: int = typer.Option(
+        4, min=1, help="The number of songs to search for in parallel"
+    ),
+    mirror: bool = typer.Option(
+        False,
+        help="Whether to also remove and reorder songs so synced playlists match their source",
+    ),
+) -> None:
+    concurrency, _ = serial_when_profiling(concurrency)
+    song_cache = get_song_cache(cache)
+    sync_state = SyncState.from_env()
     clients = [
-        get_provider_client(provider, read_only=dry_run) for provider in providers
+        with_song_cache(get_provider_client(provider, read_only=dry_run), song_cache)
+        for provider in providers
     ]
 
-    for source_client, destination_client in itertools.permutations(clients, 2):
-        logger.info(
-            f"Syncing {source_client.provider_name} to {destination_client.provider_name}"
+    try:
+        watch_providers(
+            clients,
+            sync_state,
+            interval=interval,
+            user_playlists=user_playlists,
+            followed_playlists=followed_playlists,
+            followed_artists=followed_artists,
+            concurrency=concurrency,
+            mirror=mirror,
+        )
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+    finally:
+        sync_state.close()
+        report_song_cache(song_cache)
+        report_rate_limits()
+
+
+@app.command()
+def batch(
+    config_file: Path = typer.Argument(
+        ..., exists=True, dir_okay=False, help="A TOML file of the accounts to sync"
+    ),
+    dry_run: bool = typer.Option(False, help="Whether to run in read-only mode"),
+    cache: bool = typer.Option(
+        True, help="Whether to cache song search results between runs"
+    ),
+    concurrency: int = typer.Option(
+        4, min=1, help="The number of songs to search for in parallel per account"
+    ),
+    incremental: bool = typer.Option(
+        True, help="Whether to skip playlists that haven't changed since the last sync"
+    ),
+    metrics_out: Path | None = typer.Option(
+        None, help="Write API call metrics and phase timings to this JSON file"
+    ),
+) -> None:
+    config = BatchConfig.from_file(config_file)
+    for account in config.accounts:
+        for provider in (account.source, account.destination):
+            if provider not in Provider.__members__:
+                raise typer.BadParameter(
+                    f"Account {account.name} has an invalid provider: {provider}"
+                )
+
+    account_concurrency = config.concurrency
+    if profiler.enabled and account_concurrency > 1:
+        logger.warning("Profiling syncs one account at a time")
+        account_concurrency = 1
+    concurrency, _ = serial_when_profiling(concurrency)
+
+    # Song matches don't depend on the account, so every account shares them
+    song_cache = get_song_cache(cache)
+
+    def sync_account(account: AccountConfig) -> None:
+        sync_state = get_sync_state(incremental, account.name)
+        try:
+            source_client = get_provider_client(
+                Provider(account.source), read_only=dry_run, account=account
+            )
+            destination_client = with_song_cache(
+                get_provider_client(
+                    Provider(account.destination), read_only=dry_run, account=account
+                ),
+                song_cache,
+            )
+            sync_source_to_destination(
+                source_client,
+                destination_client,
+                account.user_playlists,
+                account.followed_playlists,
+                account.followed_artists,
+                concurrency,
+                sync_state,
+                mirror=account.mirror,
+            )
+        finally:
+            if sync_state is not None:
+                sync_state.close()
+
+    started = time.perf_counter()
+    try:
+        results = sync_accounts(config.accounts, sync_account, account_concurrency)
+        log_batch_summary(results, time.perf_counter() - started)
+        report_song_cache(song_cache)
+        report_rate_limits()
+    finally:
+        write_metrics(metrics_out)
+
+    if not all(result.succeeded for result in results):
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def snapshot(
+    provider: Provider = typer.Argument(..., help="The provider to snapshot"),
+    output: Path = typer.Argument(..., dir_okay=False, help="The file to write"),
+    metrics_out: Path | None = typer.Option(
+        None, help="Write API call metrics and phase timings to this JSON file"
+    ),
+) -> None:
+    try:
+        client = get_provider_client(provider, read_only=True)
+        write_snapshot(client, output)
+        report_rate_limits()
+    finally:
+        write_metrics(metrics_out)
+
+
+@app.command()
+def plan(
+    output: Path = typer.Argument(
+        ..., dir_okay=False, help="The file to write the plan to"
+    ),
+    source: Provider = typer.Option(..., help="The source provider"),
+    destination: Provider = typer.Option(..., help="The destination provider"),
+    user_playlists: bool = typer.Option(True, help="Whether to sync user playlists"),
+    followed_playlists: bool = typer.Option(
+        True, help="Whether to sync followed playlists"
+    ),
+    followed_artists: bool = typer.Option(
+        True, help="Whether to sync followed artists"
+    ),
+    cache: bool = typer.Option(
+        True, help="Whether to cache song search results between runs"
+    ),
+    concurrency: int = typer.Option(
+        4, min=1, help="The number of songs to search for in parallel"
+    ),
+    incremental: bool = typer.Option(
+        True, help="Whether to skip playlists that haven't changed since the last sync"
+    ),
+    mirror: bool = typer.Option(
+        False,
+        help="Whether to also remove and reorder songs so synced playlists match their source",
+    ),
+    metrics_out: Path | None = typer.Option(
+        None, help="Write API call metrics and phase timings to this JSON file"
+    ),
+) -> None:
+    concurrency, _ = serial_when_profiling(concurrency)
+    try:
+        song_cache = get_song_cache(cache)
+        sync_state = get_sync_state(incremental)
+        source_client = get_provider_client(source, read_only=True)
+        destination_client = with_song_cache(
+            get_provider_client(destination, read_only=True), song_cache
         )
-        if user_playlists:
-            sync_users_playlists(source_client, destination_client)
 
-        if followed_playlists:
-            sync_followed_playlists(source_client, destination_client)
+        sync_plan = plan_sync(
+            source_client,
+            destination_client,
+            destination.value,
+            user_playlists=user_playlists,
+            followed_playlists=followed_playlists,
+            followed_artists=followed_artists,
+            concurrency=concurrency,
+            sync_state=sync_state,
+            mirror=mirror,
+        )
+        sync_plan.write(output)
+        logger.info(f"Wrote plan to {output}: {sync_plan}")
 
-        if followed_artists:
-            sync_followed_artists(source_client, destination_client)
+        report_song_cache(song_cache)
+        report_rate_limits()
+    finally:
+        write_metrics(metrics_out)
+
+
+@app.command()
+def apply(
+    plan_file: Path = typer.Argument(
+        ..., exists=True, dir_okay=False, help="A plan written by `musync plan`"
+    ),
+    dry_run: bool = typer.Option(False, help="Whether to run in read-only mode"),
+    concurrency: int = typer.Option(
+        4, min=1, help="The number of playlists to write in parallel"
+    ),
+    incremental: bool = typer.Option(
+        True, help="Whether to record the synced playlists for incremental syncs"
+    ),
+    metrics_out: Path | None = typer.Option(
+        None, help="Write API call metrics and phase timings to this JSON file"
+    ),
+) -> None:
+    sync_plan = SyncPlan.from_file(plan_file)
+    if sync_plan.destination not in Provider.__members__:
+        raise typer.BadParameter(
+            f"The plan's destination provider isn't available: {sync_plan.destination}"
+        )
+
+    try:
+        sync_state = get_sync_state(incremental)
+        destination_client = get_provider_client(
+            Provider(sync_plan.destination), read_only=dry_run
+        )
+        logger.info(
+            f"Applying plan from {sync_plan.created_at:%Y-%m-%d %H:%M}: {sync_plan}"
+        )
+        apply_sync_plan(destination_client, sync_plan, concurrency, sync_state)
+        report_rate_limits()
+    finally:
+        write_metrics(metrics_out)
 
 
 @app.command()
@@ -102,9 +552,19 @@ def clear_playlists(
         ..., help="The provider to clear playlists from"
     ),
     dry_run: bool = typer.Option(False, help="Whether to run in read-only mode"),
+    concurrency: int = typer.Option(
+        4, min=1, help="The number of playlists to delete in parallel"
+    ),
+    metrics_out: Path | None = typer.Option(
+        None, help="Write API call metrics and phase timings to this JSON file"
+    ),
 ) -> None:
-    client = get_provider_client(provider, read_only=dry_run)
-    delete_synced_playlists(client)
+    try:
+        client = get_provider_client(provider, read_only=dry_run)
+        delete_synced_playlists(client, concurrency)
+        report_rate_limits()
+    finally:
+        write_metrics(metrics_out)
 
 
 @app.command()
@@ -0,0 +1,150 @@
+import contextlib
+import threading
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    # Only the provider clients use requests, don't load it for every command
+    import requests
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class CallStats(BaseModel):
+    provider: str
+    endpoint: str
+    calls: int = 0
+    errors: int = 0
+    throttled: int = 0
+    total_seconds: float = 0.0
+    bytes_received: int = 0
+    status_codes: dict[str, int] = {}
+    latency_histogram: dict[str, int] = {}
+
+    def record(
+        self,
+        seconds: float,
+        error: bool = False,
+        throttled: bool = False,
+        status_code: int | None = None,
+        bytes_received: int = 0,
+    ) -> None:
+        self.calls += 1
+        self.errors += error
+        self.throttled += throttled
+        self.total_seconds += seconds
+        self.bytes_received += bytes_received
+
+        if status_code is not None:
+            key = str(status_code)
+            self.status_codes[key] = self.status_codes.get(key, 0) + 1
+
+        bucket = next(
+            (f"<={bound}" for bound in LATENCY_BUCKETS if seconds <= bound),
+            f">{LATENCY_BUCKETS[-1]}",
+        )
+        self.latency_histogram[bucket] = self.latency_histogram.get(bucket, 0) + 1
+
+
+class RunReport(BaseModel):
+    started_at: datetime
+    duration_seconds: float
+    phases: dict[str, float]
+    client_calls: list[CallStats]
+    api_calls: list[CallStats]
+    http_requests: list[CallStats]
+
+
+class Metrics:
+    """Collects call counts, latencies and phase timings for a run.
+
+    Calls are recorded at three levels: `ProviderClient` methods, the
+    underlying spotipy/ytmusicapi calls, and the HTTP requests they send.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(UTC)
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[tuple[str, str], CallStats]] = {
+            "client": {},
+            "api": {},
+            "http": {},
+        }
+        self.phases: dict[str, float] = {}
+
+    def record(
+        self, level: str, provider: str, endpoint: str, seconds: float, **kwargs
+    ):
+        with self._lock:
+            stats = self._stats[level].setdefault(
+                (provider, endpoint), CallStats(provider=provider, endpoint=endpoint)
+            )
+            stats.record(seconds, **kwargs)
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase of the run; time spent in repeated phases is summed."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def instrument_session(self, provider: str, session: "requests.Session") -> None:
+        """Record every HTTP response received through a requests session.
+
+        Requests are grouped by method and host, the API calls they were made
+        for are already recorded individually.
+        """
+
+        def record_response(response: "requests.Response", *args, **kwargs) -> None:
+            content_length = response.headers.get("Content-Length")
+            self.record(
+                "http",
+                provider,
+                f"{response.request.method} {urlparse(response.url).netloc}",
+                response.elapsed.total_seconds(),
+                error=response.status_code >= 400,
+                throttled=response.status_code == 429,
+                status_code=response.status_code,
+                bytes_received=int(content_length)
+                if content_length
+                else len(response.content),
+            )
+
+        session.hooks["response"].append(record_response)
+
+    def report(self) -> RunReport:
+        with self._lock:
+            return RunReport(
+                started_at=self.started_at,
+                duration_seconds=time.perf_counter() - self._started,
+                phases=dict(self.phases),
+                client_calls=[
+                    stats.model_copy(deep=True)
+                    for stats in self._stats["client"].values()
+                ],
+                api_calls=[
+                    stats.model_copy(deep=True) for stats in self._stats["api"].values()
+                ],
+                http_requests=[
+                    stats.model_copy(deep=True)
+                    for stats in self._stats["http"].values()
+                ],
+            )
+
+    def write(self, path: Path) -> None:
+        path.write_text(self.report().model_dump_json(indent=2))
+
+
+metrics = Metrics()
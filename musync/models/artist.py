@@ -1,6 +1,12 @@
 from pydantic import BaseModel
 
+from musync.models.song import normalize
+
 
 class Artist(BaseModel):
     id: str
     name: str
+
+    @property
+    def match_key(self) -> str:
+        return normalize(self.name)
@@ -1,12 +1,97 @@
+from collections.abc import Callable
+from typing import Any
+
 from musync.models import Song
 
-from pydantic import BaseModel
+from pydantic import (
+    BaseModel,
+    ModelWrapValidatorHandler,
+    PrivateAttr,
+    SerializerFunctionWrapHandler,
+    model_serializer,
+    model_validator,
+)
 
 
 class Playlist(BaseModel):
+    """A playlist and its songs.
+
+    Playlists can be created from their metadata alone by passing `load_songs`
+    instead of `songs`, in which case the songs are only fetched the first
+    time they are accessed. The songs are loaded to be serialized, and are
+    restored by `model_validate`.
+    """
+
     id: str
     name: str
-    songs: list[Song]
+    track_count: int | None = None
+    version: str | None = None
+
+    _songs: list[Song] | None = PrivateAttr(default=None)
+    _load_songs: Callable[[], list[Song]] | None = PrivateAttr(default=None)
+
+    def __init__(
+        self,
+        songs: list[Song] | None = None,
+        load_songs: Callable[[], list[Song]] | None = None,
+        **data: Any,
+    ):
+        if songs is not None:
+            data.setdefault("track_count", len(songs))
+
+        super().__init__(**data)
+        self._songs = songs
+        self._load_songs = load_songs
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def validate_songs(
+        cls, data: Any, handler: ModelWrapValidatorHandler["Playlist"]
+    ) -> "Playlist":
+        # Songs are private, so those of a serialized playlist are set apart
+        if not isinstance(data, dict) or "songs" not in data:
+            return handler(data)
+
+        data = dict(data)
+        songs = [Song.model_validate(song) for song in data.pop("songs")]
+        data.setdefault("track_count", len(songs))
+        playlist = handler(data)
+        playlist._songs = songs
+        return playlist
+
+    @model_serializer(mode="wrap")
+    def serialize_songs(self, handler: SerializerFunctionWrapHandler) -> dict[str, Any]:
+        songs = self.songs
+        return {**handler(self), "songs": [song.model_dump() for song in songs]}
+
+    @property
+    def songs(self) -> list[Song]:
+        if self._songs is None:
+            self._songs = self._load_songs() if self._load_songs else []
+            self.track_count = len(self._songs)
+
+        return self._songs
+
+    @property
+    def songs_loaded(self) -> bool:
+        return self._songs is not None
+
+    def without_songs(
+        self, load_songs: Callable[[], list[Song]] | None = None
+    ) -> "Playlist":
+        """Return a copy of the playlist's metadata, whose songs are loaded again.
+
+        The copy loads its songs with `load_songs`, or with the playlist's own
+        loader if it was created from its metadata.
+        """
+        return Playlist(
+            id=self.id,
+            name=self.name,
+            track_count=self.track_count,
+            version=self.version,
+            load_songs=load_songs or self._load_songs,
+        )
 
     def __str__(self) -> str:
-        return f"{self.name} ({len(self.songs)} songs)"
+        track_count = len(self._songs) if self._songs is not None else self.track_count
+        return f"{self.name} ({track_count} songs)"
@@ -1,11 +1,22 @@
+import unicodedata
+
 from pydantic import BaseModel
 
 
+def normalize(value: str) -> str:
+    """Normalize a title or name so that trivially different spellings compare equal."""
+    return " ".join(unicodedata.normalize("NFKC", value).casefold().split())
+
+
 class Song(BaseModel):
     id: str
     title: str
     artist: str
     album: str | None = None
 
+    @property
+    def match_key(self) -> tuple[str, str]:
+        return normalize(self.title), normalize(self.artist)
+
     def __str__(self) -> str:
         return f"{self.title} - {self.artist}"
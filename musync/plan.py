@@ -0,0 +1,84 @@
+import hashlib
+from datetime import UTC, datetime
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from musync.diff import Move
+from musync.models import Song
+from musync.models.artist import Artist
+
+
+def songs_digest(songs: list[Song]) -> str:
+    """Return a digest of a playlist's song ids, in order."""
+    return hashlib.sha1("\n".join(song.id for song in songs).encode()).hexdigest()
+
+
+class PlaylistPlan(BaseModel):
+    """The writes that bring a destination playlist up to date with its source.
+
+    `destination_id` is `None` when the playlist is to be created. Otherwise
+    `destination_digest` is the digest of the destination's songs when the
+    plan was made, so plans that are stale or already applied are skipped,
+    and `removals` and `moves` apply to the songs as they were then.
+    """
+
+    source_id: str
+    source_name: str
+    source_version: str | None = None
+    destination_name: str
+    destination_id: str | None = None
+    destination_digest: str | None = None
+    additions: list[Song] = Field(default_factory=list)
+    removals: list[int] = Field(default_factory=list)
+    moves: list[Move] = Field(default_factory=list)
+    unresolved: list[Song] = Field(default_factory=list)
+
+    @property
+    def creates_playlist(self) -> bool:
+        return self.destination_id is None
+
+    @property
+    def has_writes(self) -> bool:
+        return bool(
+            self.creates_playlist or self.additions or self.removals or self.moves
+        )
+
+
+class SyncPlan(BaseModel):
+    """Everything a sync from one provider to another would write.
+
+    `destination` is the name the destination provider is registered under,
+    used to create its client when the plan is applied. `mirror` is whether
+    the plan mirrors its playlists, which the sync state records.
+    """
+
+    source_provider: str
+    destination_provider: str
+    destination: str
+    mirror: bool = False
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    playlists: list[PlaylistPlan] = Field(default_factory=list)
+    artists_to_follow: list[Artist] = Field(default_factory=list)
+    unresolved_artists: list[Artist] = Field(default_factory=list)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "SyncPlan":
+        return cls.model_validate_json(path.read_text())
+
+    def write(self, path: Path) -> None:
+        path.write_text(self.model_dump_json(indent=2))
+
+    def __str__(self) -> str:
+        playlists = [playlist for playlist in self.playlists if playlist.has_writes]
+        created = sum(playlist.creates_playlist for playlist in playlists)
+        return (
+            f"{created} playlists to create and {len(playlists) - created} to update "
+            f"on {self.destination_provider}, adding "
+            f"{sum(len(playlist.additions) for playlist in playlists)} songs, "
+            f"removing {sum(len(playlist.removals) for playlist in playlists)} and "
+            f"making {sum(len(playlist.moves) for playlist in playlists)} moves; "
+            f"{len(self.artists_to_follow)} artists to follow; "
+            f"{sum(len(playlist.unresolved) for playlist in self.playlists)} songs "
+            f"and {len(self.unresolved_artists)} artists not found"
+        )
@@ -0,0 +1,77 @@
+import cProfile
+import functools
+import io
+import pstats
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import ParamSpec, TypeVar
+
+from musync.logger import logger
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class Profiler:
+    """Profiles each sync phase with cProfile while enabled.
+
+    Each phase gets its own profile, accumulated over every time the phase
+    runs, which is written to `<output_dir>/<phase>.prof`. Only the calling
+    thread is profiled, so while enabled musync does its work on the main
+    thread rather than on worker threads.
+    """
+
+    def __init__(self):
+        self.output_dir: Path | None = None
+        self.top = 20
+        self._profiles: dict[str, cProfile.Profile] = {}
+        self._active = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self.output_dir is not None
+
+    def enable(self, output_dir: Path, top: int = 20) -> None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir = output_dir
+        self.top = top
+
+    def profile(self, phase: str) -> Callable[[Callable[P, T]], Callable[P, T]]:
+        """Decorate a function so that its calls are profiled as `phase`."""
+
+        def decorator(fn: Callable[P, T]) -> Callable[P, T]:
+            @functools.wraps(fn)
+            def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+                # Phases can't be nested, cProfile only allows one active profile
+                if not self.enabled or getattr(self._active, "phase", None):
+                    return fn(*args, **kwargs)
+
+                profile = self._profiles.setdefault(phase, cProfile.Profile())
+                self._active.phase = phase
+                try:
+                    return profile.runcall(fn, *args, **kwargs)
+                finally:
+                    self._active.phase = None
+
+            return wrapper
+
+        return decorator
+
+    def report(self) -> None:
+        """Write every phase's profile and log its hottest functions."""
+        if self.output_dir is None:
+            return
+
+        for phase, profile in self._profiles.items():
+            path = self.output_dir / f"{phase}.prof"
+            profile.dump_stats(path)
+
+            summary = io.StringIO()
+            pstats.Stats(profile, stream=summary).sort_stats(
+                pstats.SortKey.TIME
+            ).print_stats(self.top)
+            logger.info(f"Profile of {phase} written to {path}\n{summary.getvalue()}")
+
+
+profiler = Profiler()
@@ -1,7 +1,25 @@
-from .spotify import SpotifyClient
-from .youtube import YoutubeClient
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .spotify import SpotifyClient
+    from .youtube import YoutubeClient
 
 __all__ = [
     "SpotifyClient",
     "YoutubeClient",
 ]
+
+# The clients pull in their provider's API library, so they're only imported
+# once they're used
+_LAZY_CLIENTS = {
+    "SpotifyClient": ".spotify",
+    "YoutubeClient": ".youtube",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_CLIENTS:
+        return getattr(importlib.import_module(_LAZY_CLIENTS[name], __name__), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
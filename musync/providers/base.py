@@ -1,15 +1,62 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 
+from musync.diff import Move
 from musync.models import Song, Playlist
 from musync.models.artist import Artist
 
 
+class ProviderError(Exception):
+    """Raised when a provider can't do what it was asked to."""
+
+
+class ReadOnlyProviderError(ProviderError):
+    """Raised when writing to, or searching, a provider that can only be read."""
+
+
+def check_credentials(
+    client_name: str, credentials: dict[str, str], names: set[str]
+) -> None:
+    unknown = sorted(credentials.keys() - names)
+    if unknown:
+        raise ValueError(f"Unknown {client_name} credentials: {', '.join(unknown)}")
+
+
+def playlist_by_metadata(client: "ProviderClient", playlist: Playlist) -> Playlist:
+    """Return a copy of a written playlist whose songs are looked up again by name."""
+
+    def load_songs() -> list[Song]:
+        current_playlist = client.get_playlist_by_name(playlist.name)
+        return current_playlist.songs if current_playlist else []
+
+    return playlist.without_songs(load_songs)
+
+
 class ProviderClient(ABC):
+    # Set by every client, when True no changes are made to the user's library
+    read_only: bool
+
     @classmethod
     @abstractmethod
     def from_env(cls, read_only: bool = False):
         pass
 
+    @classmethod
+    def from_credentials(
+        cls,
+        credentials: dict[str, str],
+        read_only: bool = False,
+        account: str | None = None,
+    ):
+        """Create a client for one of several accounts, e.g. in `musync batch`.
+
+        Settings missing from `credentials` are read from the environment,
+        as `from_env` does. `account` names the account, for clients that
+        keep per-account state such as a login token.
+        """
+        check_credentials(cls.__name__, credentials, set())
+        return cls.from_env(read_only=read_only)
+
     @property
     @abstractmethod
     def provider_name(self) -> str:
@@ -38,13 +85,23 @@ class ProviderClient(ABC):
         pass
 
     @abstractmethod
-    def follow_artist(self, artist: Artist) -> None:
+    def follow_artists(self, artists: list[Artist]) -> None:
         pass
 
+    def follow_artist(self, artist: Artist) -> None:
+        self.follow_artists([artist])
+
+    def refresh(self) -> None:
+        """Forget any cached listings, so that changes made elsewhere are seen."""
+
     @abstractmethod
     def get_user_playlists(self) -> list[Playlist]:
         pass
 
+    def iter_user_playlists(self) -> Iterator[Playlist]:
+        """Yield the user's playlists, a page at a time if the provider pages them."""
+        yield from self.get_user_playlists()
+
     @abstractmethod
     def create_playlist(self, name: str, songs: list[Song]) -> Playlist:
         pass
@@ -57,6 +114,10 @@ class ProviderClient(ABC):
     def get_followed_playlists(self) -> list[Playlist]:
         pass
 
+    def iter_followed_playlists(self) -> Iterator[Playlist]:
+        """Yield the followed playlists, a page at a time if the provider pages them."""
+        yield from self.get_followed_playlists()
+
     @abstractmethod
     def delete_playlist(self, playlist: Playlist) -> None:
         pass
@@ -68,3 +129,101 @@ class ProviderClient(ABC):
     @abstractmethod
     def add_songs_to_playlist(self, playlist: Playlist, songs: list[Song]) -> Playlist:
         pass
+
+    @abstractmethod
+    def remove_songs_from_playlist(
+        self, playlist: Playlist, positions: list[int]
+    ) -> Playlist:
+        """Remove the songs at the given positions, in as few calls as possible."""
+
+    @abstractmethod
+    def move_songs_in_playlist(self, playlist: Playlist, moves: list[Move]) -> Playlist:
+        """Apply each move in turn, see `musync.diff.Move`."""
+
+
+class ProviderClientWrapper(ProviderClient):
+    """Base class for clients that decorate another client.
+
+    Every call is forwarded to the wrapped client through `_forward`, so
+    subclasses only need to override the methods whose behaviour they change,
+    or `_forward` to observe every call.
+    """
+
+    def __init__(self, client: ProviderClient):
+        self._client = client
+
+    @classmethod
+    def from_env(cls, read_only: bool = False):
+        raise TypeError(f"{cls.__name__} must be constructed around another client")
+
+    def _forward(self, method: str, *args):
+        return getattr(self._client, method)(*args)
+
+    def __getattr__(self, name: str):
+        # Only called for attributes not defined on the wrapper itself, e.g.
+        # provider specific helpers or the `read_only` flag.
+        if name == "_client":
+            raise AttributeError(name)
+        return getattr(self._client, name)
+
+    @property
+    def provider_name(self) -> str:
+        return self._client.provider_name
+
+    @property
+    def user_id(self) -> str:
+        return self._client.user_id
+
+    @property
+    def username(self) -> str:
+        return self._client.username
+
+    def refresh(self) -> None:
+        self._forward("refresh")
+
+    def find_song(self, song: Song) -> Song | None:
+        return self._forward("find_song", song)
+
+    def find_artist(self, artist: Artist) -> Artist | None:
+        return self._forward("find_artist", artist)
+
+    def get_followed_artists(self) -> list[Artist]:
+        return self._forward("get_followed_artists")
+
+    def follow_artists(self, artists: list[Artist]) -> None:
+        self._forward("follow_artists", artists)
+
+    def get_user_playlists(self) -> list[Playlist]:
+        return self._forward("get_user_playlists")
+
+    def iter_user_playlists(self) -> Iterator[Playlist]:
+        return self._forward("iter_user_playlists")
+
+    def create_playlist(self, name: str, songs: list[Song]) -> Playlist:
+        return self._forward("create_playlist", name, songs)
+
+    def user_playlist_exists(self, name: str) -> bool:
+        return self._forward("user_playlist_exists", name)
+
+    def get_followed_playlists(self) -> list[Playlist]:
+        return self._forward("get_followed_playlists")
+
+    def iter_followed_playlists(self) -> Iterator[Playlist]:
+        return self._forward("iter_followed_playlists")
+
+    def delete_playlist(self, playlist: Playlist) -> None:
+        self._forward("delete_playlist", playlist)
+
+    def get_playlist_by_name(self, name: str) -> Playlist | None:
+        return self._forward("get_playlist_by_name", name)
+
+    def add_songs_to_playlist(self, playlist: Playlist, songs: list[Song]) -> Playlist:
+        return self._forward("add_songs_to_playlist", playlist, songs)
+
+    def remove_songs_from_playlist(
+        self, playlist: Playlist, positions: list[int]
+    ) -> Playlist:
+        return self._forward("remove_songs_from_playlist", playlist, positions)
+
+    def move_songs_in_playlist(self, playlist: Playlist, moves: list[Move]) -> Playlist:
+        return self._forward("move_songs_in_playlist", playlist, moves)
@@ -0,0 +1,81 @@
+import functools
+import threading
+from collections.abc import Callable, Iterable
+
+from musync.models import Playlist, Song
+
+
+class PlaylistIndex:
+    """Index of a provider's playlists by name, built from a single listing.
+
+    The listing is only fetched the first time the index is used, and a
+    playlist's tracks are only fetched the first time they are accessed. Clients
+    keep the index up to date as they create, change and delete playlists, so
+    it can serve a whole run. The songs of the playlists they write are
+    fetched again if they're needed, rather than kept for the whole run,
+    unless `keep_written_songs` is set because nothing is actually written.
+    """
+
+    def __init__(
+        self,
+        list_playlists: Callable[[], Iterable[tuple[str, str]]],
+        get_songs: Callable[[str], list[Song]],
+        keep_written_songs: bool = False,
+    ):
+        self._list_playlists = list_playlists
+        self._get_songs = get_songs
+        self.keep_written_songs = keep_written_songs
+        self._ids: dict[str, str] | None = None
+        self._playlists: dict[str, Playlist] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def ids(self) -> dict[str, str]:
+        with self._lock:
+            if self._ids is None:
+                ids: dict[str, str] = {}
+                for playlist_id, name in self._list_playlists():
+                    ids.setdefault(name, playlist_id)
+                self._ids = ids
+
+            return self._ids
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def get(self, name: str) -> Playlist | None:
+        with self._lock:
+            playlist_id = self.ids.get(name)
+            if playlist_id is None:
+                return None
+
+            if playlist_id not in self._playlists:
+                self._playlists[playlist_id] = Playlist(
+                    id=playlist_id,
+                    name=name,
+                    load_songs=functools.partial(self._get_songs, playlist_id),
+                )
+
+            return self._playlists[playlist_id]
+
+    def add(self, playlist: Playlist) -> None:
+        if not self.keep_written_songs:
+            playlist = playlist.without_songs(
+                functools.partial(self._get_songs, playlist.id)
+            )
+
+        with self._lock:
+            self.ids[playlist.name] = playlist.id
+            self._playlists[playlist.id] = playlist
+
+    def invalidate(self) -> None:
+        """Forget the listing, so that it's fetched again the next time it's used."""
+        with self._lock:
+            self._ids = None
+            self._playlists.clear()
+
+    def remove(self, playlist: Playlist) -> None:
+        with self._lock:
+            if self.ids.get(playlist.name) == playlist.id:
+                del self.ids[playlist.name]
+            self._playlists.pop(playlist.id, None)
@@ -0,0 +1,29 @@
+import time
+
+from musync.metrics import Metrics, metrics
+from musync.providers.base import ProviderClient, ProviderClientWrapper
+
+
+class InstrumentedClient(ProviderClientWrapper):
+    """Records the count and latency of every call made to the wrapped client."""
+
+    def __init__(self, client: ProviderClient, run_metrics: Metrics = metrics):
+        super().__init__(client)
+        self.metrics = run_metrics
+
+    def _forward(self, method: str, *args):
+        started = time.perf_counter()
+        error = False
+        try:
+            return super()._forward(method, *args)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.metrics.record(
+                "client",
+                self.provider_name,
+                method,
+                time.perf_counter() - started,
+                error=error,
+            )
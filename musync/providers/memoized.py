@@ -0,0 +1,125 @@
+from collections.abc import Iterator
+
+from musync.diff import Move
+from musync.models import Playlist, Song
+from musync.models.artist import Artist
+from musync.providers.base import ProviderClient, ProviderClientWrapper
+
+
+class MemoizedClient(ProviderClientWrapper):
+    """Remembers a client's library listings for the rest of the run.
+
+    Used by multisync, where every provider is read as a source once for each
+    other provider. Writes made through this client are applied to the
+    remembered listings rather than discarding them, so nothing is fetched
+    twice. Listings that are streamed are only remembered by their metadata,
+    so their songs are fetched again if they're needed rather than all kept
+    in memory.
+    """
+
+    def __init__(self, client: ProviderClient):
+        super().__init__(client)
+        self._user_playlists: list[Playlist] | None = None
+        self._followed_playlists: list[Playlist] | None = None
+        self._followed_artists: list[Artist] | None = None
+
+    def refresh(self) -> None:
+        self._client.refresh()
+        self._user_playlists = None
+        self._followed_playlists = None
+        self._followed_artists = None
+
+    def get_user_playlists(self) -> list[Playlist]:
+        if self._user_playlists is None:
+            self._user_playlists = self._client.get_user_playlists()
+
+        return list(self._user_playlists)
+
+    def iter_user_playlists(self) -> Iterator[Playlist]:
+        if self._user_playlists is not None:
+            yield from list(self._user_playlists)
+            return
+
+        playlists = []
+        for playlist in self._client.iter_user_playlists():
+            playlists.append(playlist.without_songs())
+            yield playlist
+
+        self._user_playlists = playlists
+
+    def get_followed_playlists(self) -> list[Playlist]:
+        if self._followed_playlists is None:
+            self._followed_playlists = self._client.get_followed_playlists()
+
+        return list(self._followed_playlists)
+
+    def iter_followed_playlists(self) -> Iterator[Playlist]:
+        if self._followed_playlists is not None:
+            yield from list(self._followed_playlists)
+            return
+
+        playlists = []
+        for playlist in self._client.iter_followed_playlists():
+            playlists.append(playlist.without_songs())
+            yield playlist
+
+        self._followed_playlists = playlists
+
+    def get_followed_artists(self) -> list[Artist]:
+        if self._followed_artists is None:
+            self._followed_artists = self._client.get_followed_artists()
+
+        return list(self._followed_artists)
+
+    def follow_artists(self, artists: list[Artist]) -> None:
+        self._client.follow_artists(artists)
+
+        if self._followed_artists is not None:
+            followed_ids = {artist.id for artist in self._followed_artists}
+            self._followed_artists.extend(
+                artist for artist in artists if artist.id not in followed_ids
+            )
+
+    def create_playlist(self, name: str, songs: list[Song]) -> Playlist:
+        playlist = self._client.create_playlist(name, songs)
+
+        if self._user_playlists is not None:
+            self._user_playlists.append(playlist)
+
+        return playlist
+
+    def delete_playlist(self, playlist: Playlist) -> None:
+        self._client.delete_playlist(playlist)
+
+        if self._user_playlists is not None:
+            self._user_playlists = [
+                user_playlist
+                for user_playlist in self._user_playlists
+                if user_playlist.id != playlist.id
+            ]
+
+    def __replace_user_playlist(self, updated_playlist: Playlist) -> None:
+        if self._user_playlists is not None:
+            self._user_playlists = [
+                updated_playlist
+                if user_playlist.id == updated_playlist.id
+                else user_playlist
+                for user_playlist in self._user_playlists
+            ]
+
+    def add_songs_to_playlist(self, playlist: Playlist, songs: list[Song]) -> Playlist:
+        updated_playlist = self._client.add_songs_to_playlist(playlist, songs)
+        self.__replace_user_playlist(updated_playlist)
+        return updated_playlist
+
+    def remove_songs_from_playlist(
+        self, playlist: Playlist, positions: list[int]
+    ) -> Playlist:
+        updated_playlist = self._client.remove_songs_from_playlist(playlist, positions)
+        self.__replace_user_playlist(updated_playlist)
+        return updated_playlist
+
+    def move_songs_in_playlist(self, playlist: Playlist, moves: list[Move]) -> Playlist:
+        updated_playlist = self._client.move_songs_in_playlist(playlist, moves)
+        self.__replace_user_playlist(updated_playlist)
+        return updated_playlist
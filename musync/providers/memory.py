@@ -0,0 +1,331 @@
+import functools
+import hashlib
+import itertools
+import math
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+
+from pydantic import BaseModel
+
+from musync.diff import Move, apply_moves, remove_positions
+from musync.models import Playlist, Song
+from musync.models.artist import Artist
+from musync.providers.base import ProviderClient
+from musync.providers.index import PlaylistIndex
+from musync.ratelimit import READ, SEARCH, WRITE, RateLimiter, TokenBucket
+
+
+class Library(BaseModel):
+    user_playlists: list[Playlist] = []
+    followed_playlists: list[Playlist] = []
+    followed_artists: list[Artist] = []
+
+
+class SimulatedThrottlingError(Exception):
+    pass
+
+
+def page_count(item_count: int, page_size: int) -> int:
+    return max(1, math.ceil(item_count / page_size))
+
+
+def generate_library(
+    prefix: str,
+    user_playlists: int = 50,
+    followed_playlists: int = 10,
+    tracks_per_playlist: int = 200,
+    unique_tracks: int = 4000,
+    artists: int = 500,
+    followed_artists: int = 100,
+    seed: int = 0,
+) -> Library:
+    """Generate a synthetic library for an `InMemoryClient`.
+
+    Playlist tracks are drawn from a pool of `unique_tracks` songs, so the same
+    song appears in many playlists when the pool is small relative to the total
+    number of tracks.
+    """
+    rng = random.Random(seed)
+
+    def song(number: int) -> Song:
+        return Song(
+            id=f"{prefix}-track-{number}",
+            title=f"Track {number}",
+            artist=f"Artist {number % artists}",
+            album=f"Album {number // 10}",
+        )
+
+    def playlist(number: int, name: str) -> Playlist:
+        return Playlist(
+            id=f"{prefix}-playlist-{number}",
+            name=name,
+            songs=[
+                song(rng.randrange(unique_tracks)) for _ in range(tracks_per_playlist)
+            ],
+            version="1",
+        )
+
+    return Library(
+        user_playlists=[
+            playlist(number, f"Playlist {number}") for number in range(user_playlists)
+        ],
+        followed_playlists=[
+            playlist(user_playlists + number, f"Followed playlist {number}")
+            for number in range(followed_playlists)
+        ],
+        followed_artists=[
+            Artist(id=f"{prefix}-artist-{number}", name=f"Artist {number}")
+            for number in rng.sample(range(artists), min(followed_artists, artists))
+        ],
+    )
+
+
+class InMemoryClient(ProviderClient):
+    """A provider whose library lives in memory, for tests and benchmarks.
+
+    Every API call the client makes is counted in `calls` by endpoint, can be
+    slowed down by `latency` seconds, and is throttled with probability
+    `failure_rate` (throttled calls are retried by the client's rate limiter).
+    Songs and artists can be found unless their name hashes into `missing_rate`.
+    """
+
+    @classmethod
+    def from_env(cls, read_only: bool = False):
+        return cls(read_only=read_only)
+
+    def __init__(
+        self,
+        provider_name: str = "Memory",
+        library: Library | None = None,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        missing_rate: float = 0.0,
+        read_only: bool = False,
+        seed: int = 0,
+    ):
+        self._provider_name = provider_name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.missing_rate = missing_rate
+        self.read_only = read_only
+        self.calls: Counter[str] = Counter()
+
+        library = library or Library()
+        self._playlists: dict[str, Playlist] = {}
+        self._owned_playlist_ids: set[str] = set()
+        for playlist in library.user_playlists:
+            self._playlists[playlist.id] = playlist
+            self._owned_playlist_ids.add(playlist.id)
+        for playlist in library.followed_playlists:
+            self._playlists[playlist.id] = playlist
+        self._followed_artists = list(library.followed_artists)
+
+        self._ids = itertools.count()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._rate_limiter = RateLimiter(
+            provider_name,
+            {endpoint: TokenBucket(rate=1e9) for endpoint in (SEARCH, READ, WRITE)},
+            lambda error: 0 if isinstance(error, SimulatedThrottlingError) else None,
+            backoff=0.001,
+        )
+        self.playlist_index = PlaylistIndex(
+            list_playlists=lambda: (
+                (playlist.id, playlist.name) for playlist in self._list_playlists()
+            ),
+            get_songs=self.get_songs_from_playlist,
+            keep_written_songs=read_only,
+        )
+
+    def _call(self, endpoint: str, name: str):
+        """Simulate a call to the `name` API, with its latency and failures."""
+
+        def call() -> None:
+            with self._lock:
+                self.calls[name] += 1
+                failed = self._random.random() < self.failure_rate
+
+            if self.latency:
+                time.sleep(self.latency)
+            if failed:
+                raise SimulatedThrottlingError(name)
+
+        self._rate_limiter.call(endpoint, call)
+
+    def _is_missing(self, value: str) -> bool:
+        digest = hashlib.sha1(value.encode()).digest()
+        return int.from_bytes(digest[:4]) / 2**32 < self.missing_rate
+
+    def _catalog_id(self, value: str) -> str:
+        return f"{self._provider_name}-{hashlib.sha1(value.encode()).hexdigest()[:12]}"
+
+    def _next_id(self, kind: str) -> str:
+        with self._lock:
+            return f"{self._provider_name}-created-{kind}-{next(self._ids)}"
+
+    @property
+    def provider_name(self) -> str:
+        return self._provider_name
+
+    @property
+    def user_id(self) -> str:
+        return f"{self._provider_name}-user"
+
+    @property
+    def username(self) -> str:
+        return self.user_id
+
+    def refresh(self) -> None:
+        self.playlist_index.invalidate()
+
+    def find_song(self, song: Song) -> Song | None:
+        self._call(SEARCH, "search_songs")
+
+        title, artist = song.match_key
+        if self._is_missing(f"{title}|{artist}"):
+            return None
+
+        return Song(
+            id=self._catalog_id(f"{title}|{artist}"),
+            title=song.title,
+            artist=song.artist,
+            album=song.album,
+        )
+
+    def find_artist(self, artist: Artist) -> Artist | None:
+        self._call(SEARCH, "search_artists")
+
+        if self._is_missing(artist.match_key):
+            return None
+
+        return Artist(
+            id=self._catalog_id(artist.match_key),
+            name=artist.name,
+        )
+
+    def get_followed_artists(self) -> list[Artist]:
+        self._call(READ, "followed_artists")
+        return list(self._followed_artists)
+
+    def follow_artists(self, artists: list[Artist]) -> None:
+        for batch in itertools.batched(artists, 50):
+            self._call(WRITE, "follow_artists")
+            if not self.read_only:
+                self._followed_artists.extend(batch)
+
+    def get_songs_from_playlist(self, playlist_id: str) -> list[Song]:
+        songs = self._playlists[playlist_id].songs
+        for _ in range(page_count(len(songs), 100)):
+            self._call(READ, "playlist_tracks")
+
+        return list(songs)
+
+    def _list_playlists(self) -> list[Playlist]:
+        for _ in range(page_count(len(self._playlists), 50)):
+            self._call(READ, "list_playlists")
+
+        return list(self._playlists.values())
+
+    def __iter_playlists(self, is_user_authored: bool) -> Iterator[Playlist]:
+        pages = list(itertools.batched(list(self._playlists.values()), 50)) or [()]
+        for page in pages:
+            self._call(READ, "list_playlists")
+            for playlist in page:
+                if (playlist.id in self._owned_playlist_ids) != is_user_authored:
+                    continue
+
+                yield Playlist(
+                    id=playlist.id,
+                    name=playlist.name,
+                    track_count=playlist.track_count,
+                    version=playlist.version,
+                    load_songs=functools.partial(
+                        self.get_songs_from_playlist, playlist.id
+                    ),
+                )
+
+    def get_user_playlists(self) -> list[Playlist]:
+        return list(self.__iter_playlists(is_user_authored=True))
+
+    def iter_user_playlists(self) -> Iterator[Playlist]:
+        return self.__iter_playlists(is_user_authored=True)
+
+    def get_followed_playlists(self) -> list[Playlist]:
+        return list(self.__iter_playlists(is_user_authored=False))
+
+    def iter_followed_playlists(self) -> Iterator[Playlist]:
+        return self.__iter_playlists(is_user_authored=False)
+
+    def create_playlist(self, name: str, songs: list[Song]) -> Playlist:
+        self._call(WRITE, "create_playlist")
+        playlist = Playlist(
+            id=self._next_id("playlist")
+            if not self.read_only
+            else "read_only_playlist",
+            name=name,
+            songs=list(songs),
+            version="1",
+        )
+
+        if not self.read_only:
+            self._playlists[playlist.id] = playlist
+            self._owned_playlist_ids.add(playlist.id)
+            for _ in itertools.batched(songs, 100):
+                self._call(WRITE, "add_playlist_items")
+
+        self.playlist_index.add(playlist)
+        return playlist
+
+    def user_playlist_exists(self, name: str) -> bool:
+        return name in self.playlist_index
+
+    def delete_playlist(self, playlist: Playlist) -> None:
+        self._call(WRITE, "delete_playlist")
+        if not self.read_only:
+            self._playlists.pop(playlist.id, None)
+            self._owned_playlist_ids.discard(playlist.id)
+
+        self.playlist_index.remove(playlist)
+
+    def get_playlist_by_name(self, name: str) -> Playlist | None:
+        return self.playlist_index.get(name)
+
+    def add_songs_to_playlist(self, playlist: Playlist, songs: list[Song]) -> Playlist:
+        for _ in itertools.batched(songs, 100):
+            self._call(WRITE, "add_playlist_items")
+
+        return self.__updated_playlist(playlist, playlist.songs + songs)
+
+    def remove_songs_from_playlist(
+        self, playlist: Playlist, positions: list[int]
+    ) -> Playlist:
+        for _ in itertools.batched(positions, 100):
+            self._call(WRITE, "remove_playlist_items")
+
+        return self.__updated_playlist(
+            playlist, remove_positions(playlist.songs, positions)
+        )
+
+    def move_songs_in_playlist(self, playlist: Playlist, moves: list[Move]) -> Playlist:
+        for _ in moves:
+            self._call(WRITE, "reorder_playlist_items")
+
+        return self.__updated_playlist(playlist, apply_moves(playlist.songs, moves))
+
+    def __updated_playlist(self, playlist: Playlist, songs: list[Song]) -> Playlist:
+        updated_playlist = Playlist(
+            id=playlist.id,
+            name=playlist.name,
+            songs=songs,
+            version=str(int(self._playlists[playlist.id].version or 0) + 1)
+            if playlist.id in self._playlists
+            else "1",
+        )
+        if not self.read_only:
+            self._playlists[playlist.id] = updated_playlist
+
+        self.playlist_index.add(updated_playlist)
+        return updated_playlist
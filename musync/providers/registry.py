@@ -0,0 +1,42 @@
+import functools
+import importlib
+from importlib.metadata import entry_points
+
+from musync.providers.base import ProviderClient
+
+ENTRY_POINT_GROUP = "musync.providers"
+
+# Clients are referenced by import path, so that a provider's module and its
+# API library are only imported when a client is created
+BUILTIN_PROVIDERS = {
+    "spotify": "musync.providers.spotify:SpotifyClient",
+    "youtube": "musync.providers.youtube:YoutubeClient",
+}
+
+
+@functools.cache
+def providers() -> dict[str, str]:
+    """Return the import path of every provider's client, by provider name.
+
+    Other packages can add providers through the `musync.providers` entry
+    point group, e.g. `deezer = "musync_deezer:DeezerClient"`.
+    """
+    registered = dict(BUILTIN_PROVIDERS)
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        registered.setdefault(entry_point.name, entry_point.value)
+
+    return registered
+
+
+def provider_names() -> list[str]:
+    return list(providers())
+
+
+def get_provider_class(name: str) -> type[ProviderClient]:
+    try:
+        path = providers()[name]
+    except KeyError:
+        raise ValueError(f"Invalid provider: {name}")
+
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
@@ -0,0 +1,105 @@
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Self
+
+from musync.diff import Move
+from musync.models import Playlist, Song
+from musync.models.artist import Artist
+from musync.providers.base import ProviderClient, ReadOnlyProviderError
+from musync.snapshot import FOLLOWED_PLAYLIST, USER_PLAYLIST, Snapshot
+
+
+class SnapshotClient(ProviderClient):
+    """A read-only client over a library snapshot, for use as a sync's source.
+
+    It reports the snapshotted provider's name and user, so the sync state
+    recorded by syncs from the snapshot and from the live provider agree.
+    Searching or writing raises `ReadOnlyProviderError`. Use it as a context
+    manager, or `close` it, to close the snapshot file.
+    """
+
+    @classmethod
+    def from_env(cls, read_only: bool = False):
+        raise TypeError(f"{cls.__name__} must be constructed from a snapshot file")
+
+    def __init__(self, path: Path):
+        self._snapshot = Snapshot(path)
+        self.read_only = True
+
+    @property
+    def provider_name(self) -> str:
+        return self._snapshot.provider_name
+
+    @property
+    def user_id(self) -> str:
+        return self._snapshot.user_id
+
+    @property
+    def username(self) -> str:
+        return self._snapshot.username
+
+    def __unsupported(self, action: str) -> ReadOnlyProviderError:
+        return ReadOnlyProviderError(f"Snapshots can only be synced from, not {action}")
+
+    def find_song(self, song: Song) -> Song | None:
+        raise self.__unsupported("searched")
+
+    def find_artist(self, artist: Artist) -> Artist | None:
+        raise self.__unsupported("searched")
+
+    def get_followed_artists(self) -> list[Artist]:
+        return list(self._snapshot.iter_artists())
+
+    def follow_artists(self, artists: list[Artist]) -> None:
+        raise self.__unsupported("written to")
+
+    def get_user_playlists(self) -> list[Playlist]:
+        return list(self.iter_user_playlists())
+
+    def iter_user_playlists(self) -> Iterator[Playlist]:
+        return self._snapshot.iter_playlists(USER_PLAYLIST)
+
+    def create_playlist(self, name: str, songs: list[Song]) -> Playlist:
+        raise self.__unsupported("written to")
+
+    def user_playlist_exists(self, name: str) -> bool:
+        return self.get_playlist_by_name(name) is not None
+
+    def get_followed_playlists(self) -> list[Playlist]:
+        return list(self.iter_followed_playlists())
+
+    def iter_followed_playlists(self) -> Iterator[Playlist]:
+        return self._snapshot.iter_playlists(FOLLOWED_PLAYLIST)
+
+    def delete_playlist(self, playlist: Playlist) -> None:
+        raise self.__unsupported("written to")
+
+    def get_playlist_by_name(self, name: str) -> Playlist | None:
+        return next(
+            (
+                playlist
+                for playlist in self.iter_user_playlists()
+                if playlist.name == name
+            ),
+            None,
+        )
+
+    def add_songs_to_playlist(self, playlist: Playlist, songs: list[Song]) -> Playlist:
+        raise self.__unsupported("written to")
+
+    def remove_songs_from_playlist(
+        self, playlist: Playlist, positions: list[int]
+    ) -> Playlist:
+        raise self.__unsupported("written to")
+
+    def move_songs_in_playlist(self, playlist: Playlist, moves: list[Move]) -> Playlist:
+        raise self.__unsupported("written to")
+
+    def close(self) -> None:
+        self._snapshot.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
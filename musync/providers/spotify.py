@@ -1,12 +1,28 @@
 import functools
 import itertools
+import json
 import os
-
+import tempfile
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from musync.cache import default_cache_dir
+from musync.diff import Move, apply_moves, remove_positions
+from musync.locking import file_lock
+from musync.metrics import metrics
 from musync.models import Song, Playlist
 from musync.models.artist import Artist
-from musync.providers.base import ProviderClient
+from musync.profiling import profiler
+from musync.providers.base import ProviderClient, check_credentials
+from musync.providers.index import PlaylistIndex
+from musync.ratelimit import READ, SEARCH, WRITE, TokenBucket, get_rate_limiter
 
-from spotipy import Spotify, SpotifyOAuth  # type: ignore
+from requests.adapters import HTTPAdapter
+from spotipy import Spotify, SpotifyException, SpotifyOAuth  # type: ignore
+from spotipy.cache_handler import CacheFileHandler  # type: ignore
+from urllib3.util.retry import Retry
 
 
 SCOPES = [
@@ -22,24 +38,148 @@ SCOPES = [
     "user-follow-modify",
 ]
 
+# The settings an account can give in `musync batch`, see `from_credentials`
+CREDENTIALS = {"client_id", "client_secret", "redirect_uri", "cache_path"}
+
+# Spotify doesn't publish its limits, these stay comfortably inside them
+RATE_LIMITS = {
+    SEARCH: (5, 10),
+    READ: (10, 20),
+    WRITE: (5, 10),
+}
+
+# The number of pages of a listing that are requested at the same time
+PAGE_CONCURRENCY = 4
+
+# Only the parts of each playlist track that are read, full track objects
+# are several times larger
+PLAYLIST_TRACK_FIELDS = "items(track(id,uri,name,artists(name),album(name))),total,next"
+
+
+def retry_after(error: Exception) -> float | None:
+    if not isinstance(error, SpotifyException) or error.http_status != 429:
+        return None
+
+    try:
+        return float(error.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0
+
+
+def leave_throttling_to_rate_limiter(client: Spotify) -> None:
+    """Retry server errors in the client's session, but not throttled requests.
+
+    urllib3 retries a 429 that has a Retry-After header whatever the status
+    list says, sleeping in the calling thread, and the error raised once it
+    gives up has no headers. Throttled requests are instead left to the rate
+    limiter, which pauses every call to Spotify for as long as it asks.
+    """
+    retry = Retry(
+        total=client.retries,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        status=client.status_retries,
+        backoff_factor=client.backoff_factor,
+        status_forcelist=client.status_forcelist,
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry)
+    client._session.mount("http://", adapter)
+    client._session.mount("https://", adapter)
+
+
+def default_token_cache_path(account: str | None = None) -> Path:
+    """Return where the token is cached, for `account` if syncing several."""
+    if account is None:
+        return default_cache_dir() / "spotify_token.json"
+
+    return default_cache_dir() / f"spotify_token-{account}.json"
+
+
+class SharedCacheFileHandler(CacheFileHandler):
+    """A token cache file that several musync processes can share.
+
+    The token is kept in memory until it expires, rather than read from the
+    file before every request, and the file is replaced atomically so other
+    processes never read a partly written token.
+    """
+
+    def __init__(self, cache_path: Path):
+        super().__init__(cache_path=str(cache_path))
+        self._token_info: dict | None = None
+
+    def get_cached_token(self) -> dict | None:
+        if self._token_info is None or SpotifyOAuth.is_token_expired(self._token_info):
+            self._token_info = super().get_cached_token()
+
+        return self._token_info
+
+    def save_token_to_cache(self, token_info: dict) -> None:
+        self._token_info = token_info
+
+        path = Path(self.cache_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(token_info, f)
+        # mkstemp already creates the file readable by its owner only
+        os.replace(temp_path, path)
+
+
+class SharedTokenOAuth(SpotifyOAuth):
+    """Spotify OAuth whose token is cached in a file shared by several processes.
+
+    The token is read, and refreshed if it expired, while holding a lock on
+    the cache file, so processes whose tokens expire together refresh once.
+    """
+
+    def __init__(self, *args, cache_path: Path, **kwargs):
+        super().__init__(
+            *args, cache_handler=SharedCacheFileHandler(cache_path), **kwargs
+        )
+        self.lock_path = cache_path.with_name(f"{cache_path.name}.lock")
+
+    def get_access_token(self, *args, **kwargs):
+        with file_lock(self.lock_path):
+            return super().get_access_token(*args, **kwargs)
+
 
 class SpotifyClient(ProviderClient):
     @classmethod
     def from_env(cls, read_only: bool = False):
-        client_id = os.getenv("SPOTIFY_CLIENT_ID")
-        client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-        redirect_uri = os.getenv("SPOTIFY_REDIRECT_URI")
+        return cls.from_credentials({}, read_only=read_only)
+
+    @classmethod
+    def from_credentials(
+        cls,
+        credentials: dict[str, str],
+        read_only: bool = False,
+        account: str | None = None,
+    ):
+        check_credentials(cls.__name__, credentials, CREDENTIALS)
+        client_id = credentials.get("client_id") or os.getenv("SPOTIFY_CLIENT_ID")
+        client_secret = credentials.get("client_secret") or os.getenv(
+            "SPOTIFY_CLIENT_SECRET"
+        )
+        redirect_uri = credentials.get("redirect_uri") or os.getenv(
+            "SPOTIFY_REDIRECT_URI"
+        )
 
         if not client_id or not client_secret or not redirect_uri:
             raise ValueError(
                 "SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, and SPOTIFY_REDIRECT_URI environment variables must be set"
             )
 
+        # Each account needs its own token, or every account would sync the
+        # library of whoever logged in first
         return cls(
             client_id=client_id,
             client_secret=client_secret,
             redirect_uri=redirect_uri,
             read_only=read_only,
+            cache_path=credentials.get("cache_path")
+            or str(default_token_cache_path(account)),
         )
 
     def __init__(
@@ -48,32 +188,111 @@ class SpotifyClient(ProviderClient):
         client_secret: str,
         redirect_uri: str,
         read_only: bool = False,
+        cache_path: str | None = None,
     ):
         self._client = Spotify(
-            auth_manager=SpotifyOAuth(
+            auth_manager=SharedTokenOAuth(
                 client_id=client_id,
                 client_secret=client_secret,
                 redirect_uri=redirect_uri,
                 scope=" ".join(SCOPES),
-            )
+                cache_path=Path(cache_path).expanduser()
+                if cache_path
+                else default_token_cache_path(),
+            ),
+            status_forcelist=(500, 502, 503, 504),
+        )
+        leave_throttling_to_rate_limiter(self._client)
+        metrics.instrument_session(self.provider_name, self._client._session)
+        self._rate_limiter = get_rate_limiter(
+            self.provider_name,
+            lambda: {
+                endpoint: TokenBucket(rate, capacity)
+                for endpoint, (rate, capacity) in RATE_LIMITS.items()
+            },
+            retry_after,
         )
         self.read_only = read_only
+        self._account: dict | None = None
+        self._account_lock = threading.Lock()
+        # The raw playlist listing is shared by the user and followed playlist
+        # listings and the playlist index, and dropped whenever it changes
+        self._playlist_listing: list[dict] | None = None
+        self._playlist_listing_changes = 0
+        self.playlist_index = PlaylistIndex(
+            list_playlists=lambda: (
+                (playlist["id"], playlist["name"])
+                for playlist in self.__list_playlists()
+            ),
+            get_songs=self.get_songs_from_playlist,
+            keep_written_songs=read_only,
+        )
 
     @property
     def provider_name(self) -> str:
         return "Spotify"
 
-    @functools.cached_property
+    def _call(self, endpoint: str, fn, *args, **kwargs):
+        return self._rate_limiter.call(endpoint, fn, *args, **kwargs)
+
+    def _iter_pages(self, fn: Callable[..., dict], *args, limit: int, **kwargs):
+        """Yield every page of an offset paginated endpoint, in order.
+
+        The first page says how many items there are, so the remaining pages
+        are requested concurrently rather than following `next` one by one.
+        """
+
+        def fetch_page(offset: int) -> dict:
+            return self._call(READ, fn, *args, limit=limit, offset=offset, **kwargs)
+
+        results = fetch_page(0)
+        yield results
+
+        total = results.get("total")
+        if total is None:
+            while results["next"]:
+                results = self._call(READ, self._client.next, results)
+                yield results
+            return
+
+        offsets = range(limit, total, limit)
+        if not offsets:
+            return
+        if profiler.enabled:
+            # Pages fetched by worker threads would be missing from the profile
+            yield from map(fetch_page, offsets)
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=min(PAGE_CONCURRENCY, len(offsets))
+        ) as executor:
+            yield from executor.map(fetch_page, offsets)
+
+    def __get_account(self) -> dict:
+        # The user's identity is fetched once per client, whichever is read first
+        with self._account_lock:
+            if self._account is None:
+                self._account = self._call(READ, self._client.me)
+
+            return self._account
+
+    @property
     def user_id(self) -> str:
-        return self._client.me()["id"]
+        return self.__get_account()["id"]
 
     @property
     def username(self) -> str:
-        return self._client.me()["id"]
+        return self.__get_account()["id"]
 
     def find_song(self, song: Song) -> Song | None:
-        results = self._client.search(
-            q=f"{song.title} {song.artist}", type="track", limit=10
+        results = self._call(
+            SEARCH,
+            self._client.search,
+            q=f"{song.title} {song.artist}",
+            type="track",
+            limit=1,
+            # Only return tracks that are playable in the user's country
+            market="from_token",
         )
         try:
             track = results["tracks"]["items"][0]
@@ -88,7 +307,11 @@ class SpotifyClient(ProviderClient):
             )
 
     def find_artist(self, artist: Artist) -> Artist | None:
-        results = self._client.search(q=artist.name, type="artist", limit=10)
+        # Unlike songs, the first artist result is often not the one we want,
+        # so look for an exact name match among the top few
+        results = self._call(
+            SEARCH, self._client.search, q=artist.name, type="artist", limit=10
+        )
 
         for found_artist in results["artists"]["items"]:
             if found_artist["name"].lower() == artist.name.lower():
@@ -100,24 +323,38 @@ class SpotifyClient(ProviderClient):
         return None
 
     def get_followed_artists(self) -> list[Artist]:
-        results = self._client.current_user_followed_artists()["artists"]
+        # Followed artists are paginated with a cursor rather than offsets, so
+        # each page can only be requested once the previous one has arrived
+        results = self._call(READ, self._client.current_user_followed_artists)[
+            "artists"
+        ]
         artists = results["items"]
         while results["next"]:
-            results = self._client.next(results)["artists"]
+            results = self._call(READ, self._client.next, results)["artists"]
             artists.extend(results["items"])
 
         return [Artist(id=artist["id"], name=artist["name"]) for artist in artists]
 
-    def follow_artist(self, artist: Artist) -> None:
+    def follow_artists(self, artists: list[Artist]) -> None:
         if not self.read_only:
-            self._client.user_follow_artists([artist.id])
+            for batch in itertools.batched(artists, 50):
+                self._call(
+                    WRITE,
+                    self._client.user_follow_artists,
+                    [artist.id for artist in batch],
+                )
 
     def get_songs_from_playlist(self, playlist_id: str) -> list[Song]:
-        results = self._client.playlist_tracks(playlist_id)
-        songs = results["items"]
-        while results["next"]:
-            results = self._client.next(results)
-            songs.extend(results["items"])
+        songs = [
+            track
+            for results in self._iter_pages(
+                self._client.playlist_tracks,
+                playlist_id,
+                limit=100,
+                fields=PLAYLIST_TRACK_FIELDS,
+            )
+            for track in results["items"]
+        ]
 
         return [
             Song(
@@ -132,93 +369,160 @@ class SpotifyClient(ProviderClient):
     def __is_self_authored_playlist(self, playlist: dict) -> bool:
         return playlist["owner"]["id"] == self.user_id
 
-    def __get_playlists(self, is_user_authored: bool) -> list[Playlist]:
-        if is_user_authored:
+    def refresh(self) -> None:
+        self.__invalidate_playlist_listing()
+        self.playlist_index.invalidate()
 
-            def filter_fn(x):
-                return x is not None and self.__is_self_authored_playlist(x)
-        else:
+    def __invalidate_playlist_listing(self) -> None:
+        self._playlist_listing = None
+        self._playlist_listing_changes += 1
 
-            def filter_fn(x):
-                return x is not None and not self.__is_self_authored_playlist(x)
+    def __iter_playlist_listing(self) -> Iterator[dict]:
+        """Yield the raw playlist listing as each page arrives, caching it once read."""
+        if self._playlist_listing is not None:
+            yield from self._playlist_listing
+            return
 
-        results = self._client.current_user_playlists()
+        changes = self._playlist_listing_changes
+        playlists = []
+        for results in self._iter_pages(self._client.current_user_playlists, limit=50):
+            page = [playlist for playlist in results["items"] if playlist is not None]
+            playlists.extend(page)
+            yield from page
 
-        playlists = results["items"]
-        while results["next"]:
-            results = self._client.next(results)
-            playlists.extend(results["items"])
+        # Don't cache a listing that was changed while it was being read
+        if changes == self._playlist_listing_changes:
+            self._playlist_listing = playlists
 
-        filtered_playlists = filter(filter_fn, playlists)
+    def __list_playlists(self) -> list[dict]:
+        return list(self.__iter_playlist_listing())
 
-        return [
-            Playlist(
+    def __iter_playlists(self, is_user_authored: bool) -> Iterator[Playlist]:
+        for playlist in self.__iter_playlist_listing():
+            if self.__is_self_authored_playlist(playlist) != is_user_authored:
+                continue
+
+            yield Playlist(
                 id=playlist["id"],
                 name=playlist["name"],
-                songs=self.get_songs_from_playlist(playlist["id"]),
+                track_count=(playlist.get("tracks") or {}).get("total"),
+                version=playlist.get("snapshot_id"),
+                load_songs=functools.partial(
+                    self.get_songs_from_playlist, playlist["id"]
+                ),
             )
-            for playlist in filtered_playlists
-        ]
 
     def get_user_playlists(self) -> list[Playlist]:
-        return self.__get_playlists(is_user_authored=True)
+        return list(self.__iter_playlists(is_user_authored=True))
+
+    def iter_user_playlists(self) -> Iterator[Playlist]:
+        return self.__iter_playlists(is_user_authored=True)
 
     def create_playlist(self, name: str, songs: list[Song]) -> Playlist:
         if not self.read_only:
-            playlist = self._client.user_playlist_create(
+            created_playlist = self._call(
+                WRITE,
+                self._client.user_playlist_create,
                 user=self.user_id,
                 name=name,
             )
 
             for batch in itertools.batched(songs, 100):
-                self._client.playlist_add_items(
-                    playlist_id=playlist["id"],
+                self._call(
+                    WRITE,
+                    self._client.playlist_add_items,
+                    playlist_id=created_playlist["id"],
                     items=[song.id for song in batch],
                 )
 
-            playlist_id = playlist["id"]
+            playlist_id = created_playlist["id"]
+            self.__invalidate_playlist_listing()
         else:
             playlist_id = "read_only_playlist"
 
-        return Playlist(
+        playlist = Playlist(
             id=playlist_id,
             name=name,
             songs=songs,
         )
+        self.playlist_index.add(playlist)
+        return playlist
 
-    def user_playlist_exists(self, name: str):
-        playlists = self._client.current_user_playlists()["items"]
-        return any(playlist == name for playlist in playlists)
+    def user_playlist_exists(self, name: str) -> bool:
+        return name in self.playlist_index
 
     def get_followed_playlists(self) -> list[Playlist]:
-        return self.__get_playlists(is_user_authored=False)
+        return list(self.__iter_playlists(is_user_authored=False))
+
+    def iter_followed_playlists(self) -> Iterator[Playlist]:
+        return self.__iter_playlists(is_user_authored=False)
 
     def delete_playlist(self, playlist: Playlist) -> None:
         if not self.read_only:
-            self._client.current_user_unfollow_playlist(playlist.id)
+            self._call(WRITE, self._client.current_user_unfollow_playlist, playlist.id)
+            self.__invalidate_playlist_listing()
 
-    def get_playlist_by_name(self, name: str) -> Playlist | None:
-        playlists = self._client.current_user_playlists()["items"]
-        for playlist in playlists:
-            if playlist is not None and playlist["name"] == name:
-                return Playlist(
-                    id=playlist["id"],
-                    name=playlist["name"],
-                    songs=self.get_songs_from_playlist(playlist["id"]),
-                )
+        self.playlist_index.remove(playlist)
 
-        return None
+    def get_playlist_by_name(self, name: str) -> Playlist | None:
+        return self.playlist_index.get(name)
 
     def add_songs_to_playlist(self, playlist: Playlist, songs: list[Song]) -> Playlist:
         if not self.read_only:
             for batch in itertools.batched(songs, 100):
-                self._client.playlist_add_items(
+                self._call(
+                    WRITE,
+                    self._client.playlist_add_items,
                     playlist_id=playlist.id,
                     items=[song.id for song in batch],
                 )
 
-        return Playlist(
+        return self.__updated_playlist(playlist, playlist.songs + songs)
+
+    def remove_songs_from_playlist(
+        self, playlist: Playlist, positions: list[int]
+    ) -> Playlist:
+        if not self.read_only:
+            # Removing from the end first keeps the earlier positions valid
+            # between batches
+            for batch in itertools.batched(sorted(positions, reverse=True), 100):
+                items: dict[str, list[int]] = {}
+                for position in batch:
+                    items.setdefault(playlist.songs[position].id, []).append(position)
+
+                self._call(
+                    WRITE,
+                    self._client.playlist_remove_specific_occurrences_of_items,
+                    playlist.id,
+                    [
+                        {"uri": song_id, "positions": song_positions}
+                        for song_id, song_positions in items.items()
+                    ],
+                )
+
+        return self.__updated_playlist(
+            playlist, remove_positions(playlist.songs, positions)
+        )
+
+    def move_songs_in_playlist(self, playlist: Playlist, moves: list[Move]) -> Playlist:
+        if not self.read_only:
+            for move in moves:
+                self._call(
+                    WRITE,
+                    self._client.playlist_reorder_items,
+                    playlist.id,
+                    range_start=move.range_start,
+                    insert_before=move.insert_before,
+                    range_length=move.range_length,
+                )
+
+        return self.__updated_playlist(playlist, apply_moves(playlist.songs, moves))
+
+    def __updated_playlist(self, playlist: Playlist, songs: list[Song]) -> Playlist:
+        updated_playlist = Playlist(
             id=playlist.id,
             name=playlist.name,
-            songs=playlist.songs + songs,
+            songs=songs,
         )
+        self.playlist_index.add(updated_playlist)
+        return updated_playlist
@@ -1,58 +1,175 @@
 import functools
 import os
+import threading
+import time
 from pathlib import Path
 
+from musync.diff import Move, apply_moves, remove_positions
+from musync.metrics import metrics
 from musync.models import Playlist, Song
 from musync.models.artist import Artist
 
-from .base import ProviderClient
+from musync.ratelimit import READ, SEARCH, WRITE, TokenBucket, get_rate_limiter
+
+from .base import ProviderClient, ProviderError, check_credentials
+from .index import PlaylistIndex
 
 from ytmusicapi import YTMusic  # type: ignore
+from ytmusicapi.exceptions import YTMusicServerError  # type: ignore
+
+# The settings an account can give in `musync batch`, see `from_credentials`
+CREDENTIALS = {"auth_file", "library_ttl"}
+
+# YouTube Music has no documented limits and tends to throttle by silently
+# degrading responses, so stay well below the rate that starts to trigger it
+RATE_LIMITS = {
+    SEARCH: (3, 5),
+    READ: (5, 10),
+    WRITE: (2, 4),
+}
+
+# The status of a playlist edit that was made
+STATUS_SUCCEEDED = "STATUS_SUCCEEDED"
+
+# How long the library listing is reused for before it's fetched again, unless
+# set by `YOUTUBE_LIBRARY_TTL`
+LIBRARY_TTL_SECONDS = 10 * 60
+
+
+def retry_after(error: Exception) -> float | None:
+    # ytmusicapi doesn't expose response headers, only the status in the message
+    if isinstance(error, YTMusicServerError) and "HTTP 429" in str(error):
+        return 0
+
+    return None
+
+
+def check_edit_succeeded(response: str | dict, action: str, playlist: Playlist) -> None:
+    """Raise if YouTube Music didn't make a playlist edit.
+
+    ytmusicapi returns the status of an edit, alone or in the response,
+    rather than raising when it fails.
+    """
+    status = response if isinstance(response, str) else response.get("status")
+    if status != STATUS_SUCCEEDED:
+        raise ProviderError(
+            f"YouTube Music failed to {action} playlist {playlist.name}: {response}"
+        )
+
+
+def parse_track_count(count: int | str | None) -> int | None:
+    """Parse the track count of a library playlist, e.g. `12` or `"1,024"`."""
+    if count is None:
+        return None
+
+    try:
+        return int(str(count).replace(",", ""))
+    except ValueError:
+        return None
 
 
 class YoutubeClient(ProviderClient):
     @classmethod
     def from_env(cls, read_only: bool = False):
-        filepath = os.getenv("YOUTUBE_BROWSER_AUTH_FILEPATH")
+        return cls.from_credentials({}, read_only=read_only)
+
+    @classmethod
+    def from_credentials(
+        cls,
+        credentials: dict[str, str],
+        read_only: bool = False,
+        account: str | None = None,
+    ):
+        check_credentials(cls.__name__, credentials, CREDENTIALS)
+        filepath = credentials.get("auth_file") or os.getenv(
+            "YOUTUBE_BROWSER_AUTH_FILEPATH"
+        )
         if not filepath:
             raise ValueError(
                 "'YOUTUBE_BROWSER_AUTH_FILEPATH' environment variable is not set"
             )
 
+        library_ttl = credentials.get("library_ttl") or os.getenv("YOUTUBE_LIBRARY_TTL")
+
         return cls(
-            auth_file=Path(filepath),
+            auth_file=Path(filepath).expanduser(),
             read_only=read_only,
+            library_ttl=float(library_ttl) if library_ttl else LIBRARY_TTL_SECONDS,
         )
 
-    def __init__(self, auth_file: Path, read_only: bool = False):
+    def __init__(
+        self,
+        auth_file: Path,
+        read_only: bool = False,
+        library_ttl: float = LIBRARY_TTL_SECONDS,
+    ):
         self._client = YTMusic(str(auth_file))
+        metrics.instrument_session(self.provider_name, self._client._session)
+        self._rate_limiter = get_rate_limiter(
+            self.provider_name,
+            lambda: {
+                endpoint: TokenBucket(rate, capacity)
+                for endpoint, (rate, capacity) in RATE_LIMITS.items()
+            },
+            retry_after,
+        )
         self.read_only = read_only
+        self._account_menu: dict | None = None
+        self._account_lock = threading.Lock()
+        # Crawling the library takes several requests, so a single listing is
+        # shared by the playlist listings and the playlist index, and kept up
+        # to date as playlists are created, changed and deleted
+        self.library_ttl = library_ttl
+        self._library: list[dict] | None = None
+        self._library_fetched_at = 0.0
+        self._library_lock = threading.RLock()
+        self.playlist_index = PlaylistIndex(
+            list_playlists=lambda: (
+                (playlist["playlistId"], playlist["title"])
+                for playlist in self.__list_library()
+            ),
+            get_songs=self.get_songs_from_playlist,
+            keep_written_songs=read_only,
+        )
 
     @property
     def provider_name(self) -> str:
         return "YouTube"
 
-    @functools.cached_property
+    def _call(self, endpoint: str, fn, *args, **kwargs):
+        return self._rate_limiter.call(endpoint, fn, *args, **kwargs)
+
+    def __get_account_menu(self) -> dict:
+        # The user's identity is fetched once per client, whichever is read first
+        with self._account_lock:
+            if self._account_menu is None:
+                endpoint = "account/account_menu"
+                response = self._call(READ, self._client._send_request, endpoint, {})
+                self._account_menu = response["actions"][0]["openPopupAction"]["popup"][
+                    "multiPageMenuRenderer"
+                ]
+
+            return self._account_menu
+
+    @property
     def user_id(self) -> str:
-        endpoint = "account/account_menu"
-        response = self._client._send_request(endpoint, {})
-        return response["actions"][0]["openPopupAction"]["popup"][
-            "multiPageMenuRenderer"
-        ]["sections"][0]["multiPageMenuSectionRenderer"]["items"][0][
-            "compactLinkRenderer"
-        ]["navigationEndpoint"]["browseEndpoint"]["browseId"]
-
-    @functools.cached_property
+        return self.__get_account_menu()["sections"][0]["multiPageMenuSectionRenderer"][
+            "items"
+        ][0]["compactLinkRenderer"]["navigationEndpoint"]["browseEndpoint"]["browseId"]
+
+    @property
     def username(self) -> str:
-        endpoint = "account/account_menu"
-        response = self._client._send_request(endpoint, {})
-        return response["actions"][0]["openPopupAction"]["popup"][
-            "multiPageMenuRenderer"
-        ]["header"]["activeAccountHeaderRenderer"]["channelHandle"]["runs"][0]["text"]
+        return self.__get_account_menu()["header"]["activeAccountHeaderRenderer"][
+            "channelHandle"
+        ]["runs"][0]["text"]
 
     def find_song(self, song: Song) -> Song | None:
-        search_results = self._client.search(
-            query=f"{song.title} {song.artist}", filter="songs", limit=1
+        search_results = self._call(
+            SEARCH,
+            self._client.search,
+            query=f"{song.title} {song.artist}",
+            filter="songs",
+            limit=1,
         )
         try:
             first_track_found = [
@@ -74,8 +191,8 @@ class YoutubeClient(ProviderClient):
         )
 
     def find_artist(self, artist: Artist) -> Artist | None:
-        search_results = self._client.search(
-            query=artist.name, filter="artists", limit=10
+        search_results = self._call(
+            SEARCH, self._client.search, query=artist.name, filter="artists", limit=10
         )
 
         for found_artist in search_results:
@@ -88,7 +205,9 @@ class YoutubeClient(ProviderClient):
         return None
 
     def get_followed_artists(self) -> list[Artist]:
-        followed_artists = self._client.get_library_subscriptions()
+        followed_artists = self._call(
+            READ, self._client.get_library_subscriptions, limit=None
+        )
         return [
             Artist(
                 id=artist["browseId"],
@@ -97,9 +216,26 @@ class YoutubeClient(ProviderClient):
             for artist in followed_artists
         ]
 
-    def follow_artist(self, artist: Artist) -> None:
-        if not self.read_only:
-            self._client.subscribe_artists([artist.id])
+    def follow_artists(self, artists: list[Artist]) -> None:
+        if not self.read_only and artists:
+            self._call(
+                WRITE,
+                self._client.subscribe_artists,
+                [artist.id for artist in artists],
+            )
+
+    def get_songs_from_playlist(self, playlist_id: str) -> list[Song]:
+        return [
+            Song(
+                id=track["videoId"],
+                title=track["title"],
+                artist=track["artists"][0]["name"],
+                album=None,
+            )
+            for track in self._call(
+                READ, self._client.get_playlist, playlist_id, limit=None
+            )["tracks"]
+        ]
 
     def __is_self_authored_playlist(self, playlist: dict) -> bool:
         authors = playlist.get("author")
@@ -107,6 +243,55 @@ class YoutubeClient(ProviderClient):
             return False
         return any(author["id"] == self.user_id for author in authors)
 
+    def refresh(self) -> None:
+        with self._library_lock:
+            self._library = None
+            self.playlist_index.invalidate()
+
+    def __expire_library(self) -> None:
+        with self._library_lock:
+            if (
+                self._library is not None
+                and time.monotonic() - self._library_fetched_at > self.library_ttl
+            ):
+                self._library = None
+                self.playlist_index.invalidate()
+
+    def __list_library(self) -> list[dict]:
+        with self._library_lock:
+            if self._library is None:
+                self._library = self._call(
+                    READ, self._client.get_library_playlists, limit=None
+                )
+                self._library_fetched_at = time.monotonic()
+
+            return list(self._library)
+
+    def __update_library(self, playlist_id: str, entry: dict | None) -> None:
+        """Replace, add or, if `entry` is None, remove a playlist in the listing."""
+        with self._library_lock:
+            if self._library is None:
+                return
+
+            library = [
+                playlist
+                for playlist in self._library
+                if playlist["playlistId"] != playlist_id
+            ]
+            if entry is not None:
+                # Keep the playlist where it was, new playlists go at the end
+                position = next(
+                    (
+                        index
+                        for index, playlist in enumerate(self._library)
+                        if playlist["playlistId"] == playlist_id
+                    ),
+                    len(library),
+                )
+                library.insert(position, entry)
+
+            self._library = library
+
     def __get_playlists(self, is_user_authored: bool) -> list[Playlist]:
         if is_user_authored:
             filter_fn = self.__is_self_authored_playlist
@@ -115,35 +300,36 @@ class YoutubeClient(ProviderClient):
             def filter_fn(x):
                 return not self.__is_self_authored_playlist(x)
 
-        playlists = self._client.get_library_playlists(limit=None)
+        self.__expire_library()
+        filtered_playlists = filter(filter_fn, self.__list_library())
 
-        filtered_playlists = filter(filter_fn, playlists)
-
-        return [
-            Playlist(
-                id=playlist["playlistId"],
-                name=playlist["title"],
-                songs=[
-                    Song(
-                        id=track["videoId"],
-                        title=track["title"],
-                        artist=track["artists"][0]["name"],
-                        album=None,
-                    )
-                    for track in self._client.get_playlist(playlist["playlistId"])[
-                        "tracks"
-                    ]
-                ],
+        playlists: list[Playlist] = []
+        for playlist in filtered_playlists:
+            track_count = parse_track_count(playlist.get("count"))
+            playlists.append(
+                Playlist(
+                    id=playlist["playlistId"],
+                    name=playlist["title"],
+                    track_count=track_count,
+                    # The library listing has no revision id, so the track
+                    # count is the only change indicator available for free
+                    version=f"count:{track_count}" if track_count is not None else None,
+                    load_songs=functools.partial(
+                        self.get_songs_from_playlist, playlist["playlistId"]
+                    ),
+                )
             )
-            for playlist in filtered_playlists
-        ]
+
+        return playlists
 
     def get_user_playlists(self) -> list[Playlist]:
         return self.__get_playlists(is_user_authored=True)
 
     def create_playlist(self, name: str, songs: list[Song]) -> Playlist:
         if not self.read_only:
-            playlist_id = self._client.create_playlist(
+            playlist_id = self._call(
+                WRITE,
+                self._client.create_playlist,
                 title=name,
                 description="Created by musync",
                 video_ids=[song.id for song in songs],
@@ -151,48 +337,107 @@ class YoutubeClient(ProviderClient):
         else:
             playlist_id = "read_only_playlist"
 
-        return Playlist(
+        playlist = Playlist(
             id=playlist_id,
             name=name,
             songs=songs,
         )
+        self.__update_library(playlist_id, self.__library_entry(playlist))
+        self.playlist_index.add(playlist)
+        return playlist
+
+    def __library_entry(self, playlist: Playlist) -> dict:
+        return {
+            "playlistId": playlist.id,
+            "title": playlist.name,
+            "count": playlist.track_count,
+            "author": [{"id": self.user_id}],
+        }
 
     def user_playlist_exists(self, name: str) -> bool:
-        return any(
-            playlist["title"] == name
-            for playlist in self._client.get_library_playlists(limit=None)
-        )
+        self.__expire_library()
+        return name in self.playlist_index
 
     def get_followed_playlists(self) -> list[Playlist]:
         return self.__get_playlists(is_user_authored=False)
 
     def delete_playlist(self, playlist: Playlist) -> None:
         if not self.read_only:
-            self._client.delete_playlist(playlist.id)
+            self._call(WRITE, self._client.delete_playlist, playlist.id)
 
-    def get_playlist_by_name(self, name: str) -> Playlist | None:
-        for playlist in self._client.get_library_playlists(limit=None):
-            if playlist["title"] == name:
-                tracks = self._client.get_playlist(playlist["playlistId"])["tracks"]
-                return Playlist(
-                    id=playlist["playlistId"],
-                    name=playlist["title"],
-                    songs=[
-                        Song(
-                            id=track["videoId"],
-                            title=track["title"],
-                            artist=track["artists"][0]["name"],
-                            album=None,
-                        )
-                        for track in tracks
-                    ],
-                )
+        self.__update_library(playlist.id, None)
+        self.playlist_index.remove(playlist)
 
-        return None
+    def get_playlist_by_name(self, name: str) -> Playlist | None:
+        self.__expire_library()
+        return self.playlist_index.get(name)
 
     def add_songs_to_playlist(self, playlist: Playlist, songs: list[Song]) -> Playlist:
         if not self.read_only:
-            self._client.add_playlist_items(playlist.id, [song.id for song in songs])
+            # Songs are only added if they're wanted, e.g. a mirrored playlist
+            # can have a song more than once, so duplicates are always added
+            response = self._call(
+                WRITE,
+                self._client.add_playlist_items,
+                playlist.id,
+                [song.id for song in songs],
+                duplicates=True,
+            )
+            check_edit_succeeded(response, "add songs to", playlist)
 
         playlist.songs.extend(songs)
+        return self.__updated_playlist(playlist)
+
+    def __get_playlist_items(self, playlist_id: str) -> list[dict]:
+        # Items are edited by their setVideoId, which songs don't keep
+        return self._call(READ, self._client.get_playlist, playlist_id, limit=None)[
+            "tracks"
+        ]
+
+    def remove_songs_from_playlist(
+        self, playlist: Playlist, positions: list[int]
+    ) -> Playlist:
+        if not self.read_only and positions:
+            items = self.__get_playlist_items(playlist.id)
+            response = self._call(
+                WRITE,
+                self._client.remove_playlist_items,
+                playlist.id,
+                [items[position] for position in positions],
+            )
+            check_edit_succeeded(response, "remove songs from", playlist)
+
+        playlist.songs[:] = remove_positions(playlist.songs, positions)
+        return self.__updated_playlist(playlist)
+
+    def move_songs_in_playlist(self, playlist: Playlist, moves: list[Move]) -> Playlist:
+        if not self.read_only and moves:
+            items = self.__get_playlist_items(playlist.id)
+            for move in moves:
+                moved = items[move.range_start : move.range_start + move.range_length]
+                successor = (
+                    items[move.insert_before]["setVideoId"]
+                    if move.insert_before < len(items)
+                    else None
+                )
+                # Each item can only be moved on its own, so move them one by
+                # one before the same successor, or to the end without one
+                for item in moved:
+                    response = self._call(
+                        WRITE,
+                        self._client.edit_playlist,
+                        playlist.id,
+                        moveItem=(item["setVideoId"], successor)
+                        if successor
+                        else item["setVideoId"],
+                    )
+                    check_edit_succeeded(response, "move songs in", playlist)
+                items = apply_moves(items, [move])
+
+        playlist.songs[:] = apply_moves(playlist.songs, moves)
+        return self.__updated_playlist(playlist)
+
+    def __updated_playlist(self, playlist: Playlist) -> Playlist:
+        playlist.track_count = len(playlist.songs)
+        self.__update_library(playlist.id, self.__library_entry(playlist))
         return playlist
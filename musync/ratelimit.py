@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from typing import ParamSpec, TypeVar
+
+from musync.logger import logger
+from musync.metrics import metrics
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+SEARCH = "search"
+READ = "read"
+WRITE = "write"
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available. Returns the time slept."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            # Tokens are reserved up front, so concurrent callers queue up
+            # behind each other instead of all waking at the same time
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait:
+            time.sleep(wait)
+
+        return wait
+
+
+class RateLimiter:
+    """Rate limits a provider's API calls, with a separate budget per endpoint class.
+
+    `retry_after` maps an error raised by a call to the number of seconds to
+    wait before retrying it, `0` if the provider didn't say, or `None` if the
+    error wasn't caused by throttling. Throttled calls are retried with
+    exponential backoff and jitter, and every call to the provider is paused
+    in the meantime.
+    """
+
+    def __init__(
+        self,
+        provider_name: str,
+        budgets: dict[str, TokenBucket],
+        retry_after: Callable[[Exception], float | None],
+        max_retries: int = 5,
+        backoff: float = 1.0,
+    ):
+        self.provider_name = provider_name
+        self.budgets = budgets
+        self.retry_after = retry_after
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.wait_seconds: dict[str, float] = defaultdict(float)
+        self.throttled_calls = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, endpoint: str) -> None:
+        waited = self.budgets[endpoint].acquire()
+
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+            waited += pause
+
+        if waited:
+            with self._lock:
+                self.wait_seconds[endpoint] += waited
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def call(
+        self, endpoint: str, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        attempt = 0
+        while True:
+            self.wait(endpoint)
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                retry_after = self.retry_after(e)
+                self._record(fn, started, error=True, throttled=retry_after is not None)
+                if retry_after is None or attempt >= self.max_retries:
+                    raise
+
+                with self._lock:
+                    self.throttled_calls += 1
+
+                delay = retry_after or self.backoff * 2**attempt
+                delay += random.uniform(0, delay / 4)
+                logger.warning(
+                    f"{self.provider_name} is throttling {endpoint} calls, retrying in {delay:.1f}s"
+                )
+                self.pause(delay)
+                attempt += 1
+            else:
+                self._record(fn, started)
+                return result
+
+    def _record(self, fn: Callable, started: float, **kwargs) -> None:
+        metrics.record(
+            "api",
+            self.provider_name,
+            getattr(fn, "__name__", type(fn).__name__),
+            time.perf_counter() - started,
+            **kwargs,
+        )
+
+    def __str__(self) -> str:
+        waits = ", ".join(
+            f"{endpoint} {seconds:.1f}s"
+            for endpoint, seconds in self.wait_seconds.items()
+        )
+        return f"{self.throttled_calls} throttled calls, waited {waits or 'no time'}"
+
+
+_rate_limiters: dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    provider_name: str,
+    budgets: Callable[[], dict[str, TokenBucket]],
+    retry_after: Callable[[Exception], float | None],
+) -> RateLimiter:
+    """Return the rate limiter shared by every client of a provider in this process."""
+    with _rate_limiters_lock:
+        if provider_name not in _rate_limiters:
+            _rate_limiters[provider_name] = RateLimiter(
+                provider_name, budgets(), retry_after
+            )
+
+        return _rate_limiters[provider_name]
+
+
+def rate_limiters() -> list[RateLimiter]:
+    return list(_rate_limiters.values())
@@ -0,0 +1,308 @@
+import functools
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple, Self
+
+from musync.logger import logger
+from musync.models import Playlist, Song
+from musync.models.artist import Artist
+from musync.providers.base import ProviderClient
+
+MAGIC = b"MUSYNCSNAP"
+FORMAT_VERSION = 1
+# The offsets of the string table and the index, followed by the magic again
+TRAILER = struct.Struct(f"<QQ{len(MAGIC)}s")
+
+USER_PLAYLIST = 0
+FOLLOWED_PLAYLIST = 1
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, position: int) -> tuple[int, int]:
+    """Return the varint at `position` and the position after it."""
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def read_varints(data: bytes, position: int, count: int) -> tuple[list[int], int]:
+    values = []
+    for _ in range(count):
+        value, position = read_varint(data, position)
+        values.append(value)
+
+    return values, position
+
+
+class StringTable:
+    """Interns strings, so that each is stored once and referenced by number.
+
+    `0` stands for `None`, and every other number is an index into the table
+    plus one.
+    """
+
+    def __init__(self, strings: list[str] | None = None):
+        self.strings = strings or []
+        self._numbers = {string: number for number, string in enumerate(self.strings)}
+
+    def intern(self, string: str | None) -> int:
+        if string is None:
+            return 0
+
+        number = self._numbers.get(string)
+        if number is None:
+            number = self._numbers[string] = len(self.strings)
+            self.strings.append(string)
+
+        return number + 1
+
+    def lookup(self, reference: int) -> str | None:
+        return self.strings[reference - 1] if reference else None
+
+    def __getitem__(self, reference: int) -> str:
+        return self.strings[reference - 1]
+
+    def encode(self) -> bytes:
+        buffer = bytearray()
+        write_varint(buffer, len(self.strings))
+        for string in self.strings:
+            encoded = string.encode()
+            write_varint(buffer, len(encoded))
+            buffer += encoded
+
+        return zlib.compress(buffer)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "StringTable":
+        data = zlib.decompress(data)
+        count, position = read_varint(data, 0)
+        strings = []
+        for _ in range(count):
+            length, position = read_varint(data, position)
+            strings.append(data[position : position + length].decode())
+            position += length
+
+        return cls(strings)
+
+
+class SnapshotWriter:
+    """Writes a library snapshot a playlist at a time.
+
+    Each playlist's songs are written as soon as they're given, as numbers
+    into a table of every distinct string, so repeated artists and albums
+    are only stored once. The string table and an index of the playlists
+    and artists are written, compressed, when the snapshot is closed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.playlists = 0
+        self.songs = 0
+        self.artists = 0
+        self._file = path.open("wb")
+        self._file.write(MAGIC + bytes([FORMAT_VERSION]))
+        self._strings = StringTable()
+        self._playlist_index = bytearray()
+        self._artist_index = bytearray()
+
+    def write_playlist(self, kind: int, playlist: Playlist) -> None:
+        block = bytearray()
+        write_varint(block, len(playlist.songs))
+        for song in playlist.songs:
+            for string in (song.id, song.title, song.artist, song.album):
+                write_varint(block, self._strings.intern(string))
+
+        offset = self._file.tell()
+        self._file.write(block)
+
+        write_varint(self._playlist_index, kind)
+        for string in (playlist.id, playlist.name, playlist.version):
+            write_varint(self._playlist_index, self._strings.intern(string))
+        write_varint(self._playlist_index, len(playlist.songs))
+        write_varint(self._playlist_index, offset)
+        write_varint(self._playlist_index, len(block))
+
+        self.playlists += 1
+        self.songs += len(playlist.songs)
+
+    def write_artist(self, artist: Artist) -> None:
+        write_varint(self._artist_index, self._strings.intern(artist.id))
+        write_varint(self._artist_index, self._strings.intern(artist.name))
+        self.artists += 1
+
+    def close(self, provider_name: str, user_id: str, username: str) -> None:
+        index = bytearray()
+        for string in (provider_name, user_id, username):
+            write_varint(index, self._strings.intern(string))
+        write_varint(index, int(time.time()))
+        write_varint(index, self.playlists)
+        index += self._playlist_index
+        write_varint(index, self.artists)
+        index += self._artist_index
+
+        strings_offset = self._file.tell()
+        self._file.write(self._strings.encode())
+        index_offset = self._file.tell()
+        self._file.write(zlib.compress(index))
+        self._file.write(TRAILER.pack(strings_offset, index_offset, MAGIC))
+        self._file.close()
+
+    def abort(self) -> None:
+        """Close and delete an unfinished snapshot."""
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class PlaylistEntry(NamedTuple):
+    kind: int
+    id: int
+    name: int
+    version: int
+    track_count: int
+    offset: int
+    length: int
+
+
+class Snapshot:
+    """A library snapshot, whose playlists' songs are only read when accessed."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = path.open("rb")
+        self._lock = threading.Lock()
+        try:
+            self.__read_index()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def __read_index(self) -> None:
+        path = self.path
+        header = self._file.read(len(MAGIC) + 1)
+        trailer_offset = self._file.seek(0, 2) - TRAILER.size
+        if header[: len(MAGIC)] != MAGIC or trailer_offset < len(header):
+            raise ValueError(f"{path} is not a musync snapshot")
+        if header[len(MAGIC)] != FORMAT_VERSION:
+            raise ValueError(f"{path} has unsupported format {header[len(MAGIC)]}")
+
+        self._file.seek(trailer_offset)
+        strings_offset, index_offset, magic = TRAILER.unpack(
+            self._file.read(TRAILER.size)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is an incomplete musync snapshot")
+
+        self._file.seek(strings_offset)
+        self._strings = StringTable.decode(
+            self._file.read(index_offset - strings_offset)
+        )
+        index = zlib.decompress(self._file.read(trailer_offset - index_offset))
+
+        values, position = read_varints(index, 0, 4)
+        provider_name, user_id, username, self.created_at = values
+        self.provider_name = self._strings[provider_name]
+        self.user_id = self._strings[user_id]
+        self.username = self._strings[username]
+
+        self._playlists: list[PlaylistEntry] = []
+        count, position = read_varint(index, position)
+        for _ in range(count):
+            fields, position = read_varints(index, position, len(PlaylistEntry._fields))
+            self._playlists.append(PlaylistEntry(*fields))
+
+        self._artists: list[tuple[int, int]] = []
+        count, position = read_varint(index, position)
+        for _ in range(count):
+            (artist_id, name), position = read_varints(index, position, 2)
+            self._artists.append((artist_id, name))
+
+    def __read_songs(self, offset: int, length: int) -> list[Song]:
+        with self._lock:
+            self._file.seek(offset)
+            block = self._file.read(length)
+
+        strings = self._strings
+        count, position = read_varint(block, 0)
+        songs = []
+        for _ in range(count):
+            references, position = read_varints(block, position, 4)
+            song_id, title, artist, album = references
+            songs.append(
+                Song(
+                    id=strings[song_id],
+                    title=strings[title],
+                    artist=strings[artist],
+                    album=strings.lookup(album),
+                )
+            )
+
+        return songs
+
+    def iter_playlists(self, kind: int) -> Iterator[Playlist]:
+        for entry in self._playlists:
+            if entry.kind != kind:
+                continue
+
+            yield Playlist(
+                id=self._strings[entry.id],
+                name=self._strings[entry.name],
+                version=self._strings.lookup(entry.version),
+                track_count=entry.track_count,
+                load_songs=functools.partial(
+                    self.__read_songs, entry.offset, entry.length
+                ),
+            )
+
+    def iter_artists(self) -> Iterator[Artist]:
+        for artist_id, name in self._artists:
+            yield Artist(id=self._strings[artist_id], name=self._strings[name])
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_snapshot(client: ProviderClient, path: Path) -> None:
+    """Write a client's user and followed playlists and followed artists to `path`.
+
+    Playlists are written as they're fetched, so only one playlist's songs
+    are held in memory at a time.
+    """
+    writer = SnapshotWriter(path)
+    logger.info(f"Writing a snapshot of {client.provider_name} to {path}")
+    try:
+        for playlist in client.iter_user_playlists():
+            writer.write_playlist(USER_PLAYLIST, playlist)
+        for playlist in client.iter_followed_playlists():
+            writer.write_playlist(FOLLOWED_PLAYLIST, playlist)
+        for artist in client.get_followed_artists():
+            writer.write_artist(artist)
+        writer.close(client.provider_name, client.user_id, client.username)
+    except BaseException:
+        writer.abort()
+        raise
+
+    logger.info(
+        f"Wrote {writer.playlists} playlists, {writer.songs} songs and "
+        f"{writer.artists} artists to {path} ({path.stat().st_size / 1024:.1f} KiB)"
+    )
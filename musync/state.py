@@ -0,0 +1,215 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from musync.cache import default_cache_dir
+from musync.models import Playlist
+from musync.models.artist import Artist
+from musync.providers.base import ProviderClient
+
+
+class SyncState:
+    """Records which version of each source playlist was last synced to each provider.
+
+    A playlist whose version is unchanged since its last successful sync, and
+    whose destination playlist still exists, doesn't need to be synced again.
+    Followed artists are recorded once synced, whether they were found or not,
+    so that they're only searched for again if they're followed afresh.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # Streaming syncs check and record playlists from different threads
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS playlist_syncs (
+                source_provider TEXT NOT NULL,
+                source_playlist_id TEXT NOT NULL,
+                destination_provider TEXT NOT NULL,
+                version TEXT NOT NULL,
+                destination_playlist_id TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                mirror INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (source_provider, source_playlist_id, destination_provider)
+            )
+            """
+        )
+        # State from before syncs recorded their mode was only ever appended
+        columns = {
+            row[1]
+            for row in self._connection.execute("PRAGMA table_info(playlist_syncs)")
+        }
+        if "mirror" not in columns:
+            self._connection.execute(
+                "ALTER TABLE playlist_syncs "
+                "ADD COLUMN mirror INTEGER NOT NULL DEFAULT 0"
+            )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS artist_syncs (
+                source_provider TEXT NOT NULL,
+                source_artist_id TEXT NOT NULL,
+                destination_provider TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY (source_provider, source_artist_id, destination_provider)
+            )
+            """
+        )
+        self._connection.commit()
+
+    @classmethod
+    def from_env(cls, account: str | None = None) -> "SyncState":
+        """Open the sync state, or that of `account` when syncing several at once.
+
+        Accounts keep separate state, as two of them may sync the same followed
+        playlist to different destination playlists.
+        """
+        cache_dir = default_cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        if account is not None:
+            return cls(cache_dir / f"sync_state-{account}.db")
+
+        return cls(cache_dir / "sync_state.db")
+
+    def get(
+        self,
+        source_client: ProviderClient,
+        destination_client: ProviderClient,
+        playlist: Playlist,
+    ) -> tuple[str, str, bool] | None:
+        """Return the synced version, destination playlist id and mirror mode."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, destination_playlist_id, mirror FROM playlist_syncs "
+                "WHERE source_provider = ? AND source_playlist_id = ? "
+                "AND destination_provider = ?",
+                (
+                    source_client.provider_name,
+                    playlist.id,
+                    destination_client.provider_name,
+                ),
+            ).fetchone()
+
+        return (row[0], row[1], bool(row[2])) if row is not None else None
+
+    def is_up_to_date(
+        self,
+        source_client: ProviderClient,
+        destination_client: ProviderClient,
+        playlist: Playlist,
+        destination_playlist_name: str,
+        mirror: bool = False,
+    ) -> bool:
+        """Whether the playlist was synced unchanged, in the given mode or by mirroring.
+
+        An append-only sync leaves songs that were removed from the source,
+        so it doesn't count for a mirrored sync.
+        """
+        if playlist.version is None:
+            return False
+
+        synced = self.get(source_client, destination_client, playlist)
+        if synced is None:
+            return False
+
+        version, destination_playlist_id, mirrored = synced
+        if version != playlist.version or (mirror and not mirrored):
+            return False
+
+        # The destination playlist may have been renamed or deleted since
+        destination_playlist = destination_client.get_playlist_by_name(
+            destination_playlist_name
+        )
+        return (
+            destination_playlist is not None
+            and destination_playlist.id == destination_playlist_id
+        )
+
+    def record(
+        self,
+        source_client: ProviderClient,
+        destination_client: ProviderClient,
+        playlist: Playlist,
+        destination_playlist: Playlist,
+        mirror: bool = False,
+    ) -> None:
+        self.record_version(
+            source_client.provider_name,
+            playlist.id,
+            playlist.version,
+            destination_client.provider_name,
+            destination_playlist.id,
+            mirror,
+        )
+
+    def record_version(
+        self,
+        source_provider: str,
+        source_playlist_id: str,
+        version: str | None,
+        destination_provider: str,
+        destination_playlist_id: str,
+        mirror: bool = False,
+    ) -> None:
+        if version is None:
+            return
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO playlist_syncs (source_provider, "
+                "source_playlist_id, destination_provider, version, "
+                "destination_playlist_id, synced_at, mirror) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    source_provider,
+                    source_playlist_id,
+                    destination_provider,
+                    version,
+                    destination_playlist_id,
+                    time.time(),
+                    mirror,
+                ),
+            )
+            self._connection.commit()
+
+    def synced_artist_ids(
+        self, source_client: ProviderClient, destination_client: ProviderClient
+    ) -> set[str]:
+        """Return the ids of the source artists synced before, found or not."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT source_artist_id FROM artist_syncs "
+                "WHERE source_provider = ? AND destination_provider = ?",
+                (source_client.provider_name, destination_client.provider_name),
+            ).fetchall()
+
+        return {row[0] for row in rows}
+
+    def record_artists(
+        self,
+        source_client: ProviderClient,
+        destination_client: ProviderClient,
+        artists: list[Artist],
+    ) -> None:
+        synced_at = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO artist_syncs VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        source_client.provider_name,
+                        artist.id,
+                        destination_client.provider_name,
+                        synced_at,
+                    )
+                    for artist in artists
+                ),
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
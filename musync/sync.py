@@ -1,160 +1,1016 @@
+import itertools
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from musync.diff import PlaylistDiff, diff_playlist
+from musync.journal import SyncJournal
 from musync.logger import logger
+from musync.metrics import metrics
 from musync.models.artist import Artist
 from musync.models.playlist import Playlist
-from musync.providers.base import ProviderClient
+from musync.models.song import Song
+from musync.plan import PlaylistPlan, SyncPlan, songs_digest
+from musync.profiling import profiler
+from musync.providers.base import ProviderClient, playlist_by_metadata
+from musync.providers.memoized import MemoizedClient
+from musync.state import SyncState
 
 PLAYLIST_SUFFIX = "[MUSYNC]"
 
 
 def is_musync_playlist(playlist: Playlist) -> bool:
-    return playlist.name.startswith(PLAYLIST_SUFFIX)
+    # Synced playlists are named "<name> [MUSYNC]"
+    return playlist.name.endswith(PLAYLIST_SUFFIX)
 
 
-def sync_playlists(
-    source_client: ProviderClient,
+class PlaylistSync(NamedTuple):
+    """A source playlist and what is needed to bring its destination up to date."""
+
+    playlist: Playlist
+    destination_name: str
+    existing_playlist: Playlist | None
+    songs_already_added: set[tuple[str, str]]
+    songs_to_search: list[Song]
+    mirror: bool = False
+
+
+def resolve_songs(
     destination_client: ProviderClient,
-    playlists: list[Playlist],
-) -> list[Playlist]:
-    results: list[Playlist] = []
+    songs: list[Song],
+    concurrency: int = 1,
+    resolved: dict[tuple[str, str], Song | None] | None = None,
+    journal: SyncJournal | None = None,
+) -> list[Song | None]:
+    """Search for each song on the destination, returning matches in the same order.
+
+    Songs with the same normalized title and artist are only searched for once.
+    Matches are stored in `resolved`, which can be shared between calls, and
+    written to the journal as soon as they're found.
+    """
+    if resolved is None:
+        resolved = {}
+
+    unique_songs: dict[tuple[str, str], Song] = {}
+    for song in songs:
+        if song.match_key not in resolved:
+            unique_songs.setdefault(song.match_key, song)
+
+    songs_to_search = list(unique_songs.values())
+    matches: Iterator[Song | None]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if concurrency <= 1 or len(songs_to_search) <= 1:
+            matches = map(destination_client.find_song, songs_to_search)
+        else:
+            matches = executor.map(destination_client.find_song, songs_to_search)
 
-    for playlist in playlists:
-        logger.info(
-            f"Syncing playlist: {playlist.name} from {source_client.provider_name} to {destination_client.provider_name}"
+        for song, match in zip(songs_to_search, matches):
+            resolved[song.match_key] = match
+            if journal is not None:
+                journal.record_song(destination_client.provider_name, song, match)
+
+    return [resolved[song.match_key] for song in songs]
+
+
+def apply_playlist_diff(
+    destination_client: ProviderClient,
+    playlist: Playlist,
+    diff: PlaylistDiff,
+) -> Playlist:
+    if diff.removals:
+        playlist = destination_client.remove_songs_from_playlist(
+            playlist, diff.removals
         )
+    if diff.additions:
+        playlist = destination_client.add_songs_to_playlist(playlist, diff.additions)
+    if diff.moves:
+        playlist = destination_client.move_songs_in_playlist(playlist, diff.moves)
 
-        playlist_to_create_name = f"{playlist.name} {PLAYLIST_SUFFIX}"
+    return playlist
 
-        existing_playlist = destination_client.get_playlist_by_name(
-            playlist_to_create_name
+
+def prepare_playlist_sync(
+    destination_client: ProviderClient,
+    playlist: Playlist,
+    mirror: bool = False,
+) -> PlaylistSync:
+    playlist_to_create_name = f"{playlist.name} {PLAYLIST_SUFFIX}"
+
+    existing_playlist = destination_client.get_playlist_by_name(playlist_to_create_name)
+    if mirror:
+        # Mirrored playlists are compared by destination id once every song
+        # has been resolved, which is cheap for songs matched before
+        songs_already_added = set()
+    elif existing_playlist:
+        logger.info(
+            f"{destination_client.provider_name} playlist {playlist_to_create_name} already exists"
         )
-        if existing_playlist:
-            logger.info(
-                f"{destination_client.provider_name} playlist {playlist_to_create_name} already exists"
+
+        songs_already_added = {
+            (song.title, song.artist) for song in existing_playlist.songs
+        }
+    else:
+        songs_already_added = set()
+
+    songs_to_search = [
+        song
+        for song in playlist.songs
+        if (song.title, song.artist) not in songs_already_added
+    ]
+
+    return PlaylistSync(
+        playlist=playlist,
+        destination_name=playlist_to_create_name,
+        existing_playlist=existing_playlist,
+        songs_already_added=songs_already_added,
+        songs_to_search=songs_to_search,
+        mirror=mirror,
+    )
+
+
+def look_up_playlist_again(
+    destination_client: ProviderClient, playlist_sync: PlaylistSync
+) -> PlaylistSync:
+    """Bring a sync up to date with writes made to its destination since it was prepared."""
+    existing_playlist = destination_client.get_playlist_by_name(
+        playlist_sync.destination_name
+    )
+    songs_already_added = (
+        {(song.title, song.artist) for song in existing_playlist.songs}
+        if existing_playlist and not playlist_sync.mirror
+        else set()
+    )
+
+    return playlist_sync._replace(
+        existing_playlist=existing_playlist,
+        songs_already_added=songs_already_added,
+    )
+
+
+def plan_playlist_sync(
+    destination_client: ProviderClient,
+    playlist_sync: PlaylistSync,
+    resolved: dict[tuple[str, str], Song | None],
+) -> PlaylistPlan:
+    """Work out the writes that bring a destination playlist up to date."""
+    playlist = playlist_sync.playlist
+    existing_playlist = playlist_sync.existing_playlist
+
+    unresolved = []
+    for song in playlist_sync.songs_to_search:
+        if not resolved[song.match_key]:
+            logger.warning(
+                f"Could not find {song.title} by {song.artist} on {destination_client.provider_name}"
             )
+            unresolved.append(song)
+
+    playlist_plan = PlaylistPlan(
+        source_id=playlist.id,
+        source_name=playlist.name,
+        source_version=playlist.version,
+        destination_name=playlist_sync.destination_name,
+        destination_id=existing_playlist.id if existing_playlist else None,
+        destination_digest=songs_digest(existing_playlist.songs)
+        if existing_playlist
+        else None,
+        unresolved=unresolved,
+    )
 
-            songs_already_added = {
-                (song.title, song.artist) for song in existing_playlist.songs
-            }
-        else:
-            songs_already_added = set()
+    if playlist_sync.mirror and existing_playlist:
+        # Mirrored playlists are made to match their source exactly
+        target_songs = [
+            destination_song
+            for song in playlist.songs
+            if (destination_song := resolved[song.match_key])
+        ]
+        diff = diff_playlist(existing_playlist.songs, target_songs)
+        playlist_plan.removals = diff.removals
+        playlist_plan.additions = diff.additions
+        playlist_plan.moves = diff.moves
+        return playlist_plan
+
+    # A run interrupted after writing may have added songs that are named
+    # differently on the destination, so compare by id as well
+    ids_already_added = (
+        {song.id for song in existing_playlist.songs} if existing_playlist else set()
+    )
 
-        songs_to_add = []
-        for song in playlist.songs:
-            if (song.title, song.artist) in songs_already_added:
-                continue
+    for song in playlist_sync.songs_to_search:
+        destination_song = resolved[song.match_key]
+        if not destination_song:
+            continue
 
-            destination_song = destination_client.find_song(song)
-            if not destination_song:
-                logger.warning(
-                    f"Could not find {song.title} by {song.artist} on {destination_client.provider_name}"
-                )
-                continue
+        if (
+            (
+                destination_song.title,
+                destination_song.artist,
+            )
+            in playlist_sync.songs_already_added
+            or destination_song.id in ids_already_added
+        ):
+            continue
 
-            if (destination_song.title, destination_song.artist) in songs_already_added:
-                continue
+        logger.debug(f"Adding song: {destination_song}")
+        playlist_plan.additions.append(destination_song)
 
-            logger.debug(f"Adding song: {destination_song}")
-            songs_to_add.append(destination_song)
+    return playlist_plan
 
-        if existing_playlist:
-            if songs_to_add:
-                logger.info(
-                    f"Adding {len(songs_to_add)} songs to {destination_client.provider_name} playlist: {playlist_to_create_name}"
-                )
-                destination_playlist = destination_client.add_songs_to_playlist(
-                    existing_playlist, songs_to_add
+
+def apply_playlist_plan(
+    destination_client: ProviderClient,
+    playlist_plan: PlaylistPlan,
+    existing_playlist: Playlist | None,
+) -> Playlist:
+    playlist_name = playlist_plan.destination_name
+
+    if existing_playlist is None:
+        logger.info(
+            f"Creating {destination_client.provider_name} playlist: {playlist_name} with {len(playlist_plan.additions)} songs"
+        )
+        return destination_client.create_playlist(
+            playlist_name, playlist_plan.additions
+        )
+
+    diff = PlaylistDiff(
+        playlist_plan.removals, playlist_plan.additions, playlist_plan.moves
+    )
+    if not diff:
+        logger.info(
+            f"{destination_client.provider_name} playlist {playlist_name} is already up to date"
+        )
+        return existing_playlist
+
+    logger.info(
+        f"Updating {destination_client.provider_name} playlist {playlist_name}: {len(diff.removals)} removed, {len(diff.additions)} added, {len(diff.moves)} moves"
+    )
+    destination_playlist = apply_playlist_diff(
+        destination_client, existing_playlist, diff
+    )
+    logger.debug(f"Playlist updated: {destination_playlist}")
+    return destination_playlist
+
+
+def finish_playlist_sync(
+    destination_client: ProviderClient,
+    playlist_sync: PlaylistSync,
+    resolved: dict[tuple[str, str], Song | None],
+) -> Playlist:
+    playlist_plan = plan_playlist_sync(destination_client, playlist_sync, resolved)
+    return apply_playlist_plan(
+        destination_client, playlist_plan, playlist_sync.existing_playlist
+    )
+
+
+def needs_sync(
+    source_client: ProviderClient,
+    destination_client: ProviderClient,
+    playlist: Playlist,
+    sync_state: SyncState | None,
+    journal: SyncJournal | None = None,
+    mirror: bool = False,
+) -> bool:
+    if journal is not None and journal.is_playlist_complete(
+        source_client, destination_client, playlist.id
+    ):
+        logger.info(
+            f"Skipping playlist: {playlist.name}, already synced to {destination_client.provider_name} before the last run was interrupted"
+        )
+        return False
+
+    if sync_state is not None and sync_state.is_up_to_date(
+        source_client,
+        destination_client,
+        playlist,
+        f"{playlist.name} {PLAYLIST_SUFFIX}",
+        mirror,
+    ):
+        logger.info(
+            f"Skipping playlist: {playlist.name}, unchanged since it was last synced to {destination_client.provider_name}"
+        )
+        return False
+
+    logger.info(
+        f"Syncing playlist: {playlist.name} from {source_client.provider_name} to {destination_client.provider_name}"
+    )
+    return True
+
+
+def write_playlist_sync(
+    source_client: ProviderClient,
+    destination_client: ProviderClient,
+    playlist_sync: PlaylistSync,
+    resolved: dict[tuple[str, str], Song | None],
+    sync_state: SyncState | None,
+    journal: SyncJournal | None = None,
+    written_names: set[str] | None = None,
+) -> Playlist:
+    """Write a prepared sync, and record it in the sync state and journal.
+
+    Destinations are looked up before any is written, so source playlists
+    with the same name would each create a playlist. `written_names` holds
+    the destinations written earlier in the run, which are looked up again.
+    """
+    if written_names is not None:
+        if playlist_sync.destination_name in written_names:
+            playlist_sync = look_up_playlist_again(destination_client, playlist_sync)
+        written_names.add(playlist_sync.destination_name)
+
+    with metrics.phase("write"):
+        destination_playlist = finish_playlist_sync(
+            destination_client, playlist_sync, resolved
+        )
+
+    if sync_state is not None and not destination_client.read_only:
+        sync_state.record(
+            source_client,
+            destination_client,
+            playlist_sync.playlist,
+            destination_playlist,
+            playlist_sync.mirror,
+        )
+
+    if journal is not None:
+        journal.complete_playlist(
+            source_client,
+            destination_client,
+            playlist_sync.playlist.id,
+            destination_playlist.id,
+        )
+
+    return destination_playlist
+
+
+def journaled_songs(
+    destination_client: ProviderClient, journal: SyncJournal | None
+) -> dict[tuple[str, str], Song | None]:
+    """Return the songs matched on the destination before the last run stopped."""
+    if journal is None:
+        return {}
+
+    resolved = journal.songs(destination_client.provider_name)
+    if resolved:
+        logger.info(
+            f"Resuming with {len(resolved)} songs already searched for on {destination_client.provider_name}"
+        )
+    return resolved
+
+
+def prepare_playlist_syncs(
+    source_client: ProviderClient,
+    destination_client: ProviderClient,
+    playlists: list[Playlist],
+    concurrency: int = 1,
+    sync_state: SyncState | None = None,
+    mirror: bool = False,
+    journal: SyncJournal | None = None,
+) -> tuple[list[PlaylistSync], dict[tuple[str, str], Song | None]]:
+    """Prepare the playlists that need syncing and search for all of their songs."""
+    playlist_syncs: list[PlaylistSync] = []
+    with metrics.phase("prepare"):
+        for playlist in playlists:
+            if needs_sync(
+                source_client, destination_client, playlist, sync_state, journal, mirror
+            ):
+                playlist_syncs.append(
+                    prepare_playlist_sync(destination_client, playlist, mirror)
                 )
-                results.append(destination_playlist)
-                logger.debug(f"Playlist updated: {destination_playlist}")
-            else:
-                logger.info(
-                    f"No new songs to add to {destination_client.provider_name} playlist: {existing_playlist}"
+
+    # The same song often appears in many playlists, so search for every
+    # distinct song once up front rather than once per playlist
+    songs_to_search = [
+        song
+        for playlist_sync in playlist_syncs
+        for song in playlist_sync.songs_to_search
+    ]
+    resolved = journaled_songs(destination_client, journal)
+    with metrics.phase("resolve"):
+        resolve_songs(
+            destination_client, songs_to_search, concurrency, resolved, journal
+        )
+    logger.info(
+        f"Searched {destination_client.provider_name} for {len(resolved)} distinct songs out of {len(songs_to_search)}"
+    )
+
+    return playlist_syncs, resolved
+
+
+def sync_playlists(
+    source_client: ProviderClient,
+    destination_client: ProviderClient,
+    playlists: list[Playlist],
+    concurrency: int = 1,
+    sync_state: SyncState | None = None,
+    mirror: bool = False,
+    journal: SyncJournal | None = None,
+) -> list[Playlist]:
+    playlist_syncs, resolved = prepare_playlist_syncs(
+        source_client,
+        destination_client,
+        playlists,
+        concurrency,
+        sync_state,
+        mirror,
+        journal,
+    )
+
+    written_names: set[str] = set()
+    return [
+        write_playlist_sync(
+            source_client,
+            destination_client,
+            playlist_sync,
+            resolved,
+            sync_state,
+            journal,
+            written_names,
+        )
+        for playlist_sync in playlist_syncs
+    ]
+
+
+def stream_playlists(
+    source_client: ProviderClient,
+    destination_client: ProviderClient,
+    playlists: Iterable[Playlist],
+    concurrency: int = 1,
+    sync_state: SyncState | None = None,
+    window: int = 8,
+    mirror: bool = False,
+    journal: SyncJournal | None = None,
+) -> list[Playlist]:
+    """Sync playlists one at a time as the source yields them.
+
+    A background thread fetches and prepares playlists while earlier ones are
+    resolved and written, staying at most `window` playlists ahead. Song
+    matches are shared between playlists, so each song is still only searched
+    for once. The written playlists are returned by their metadata, so their
+    songs aren't all kept until the end.
+    """
+    prepared: queue.Queue[PlaylistSync | None] = queue.Queue(maxsize=window)
+    stopped = threading.Event()
+    errors: list[Exception] = []
+
+    def prepare() -> None:
+        try:
+            for playlist in playlists:
+                if stopped.is_set():
+                    return
+
+                with metrics.phase("prepare"):
+                    if not needs_sync(
+                        source_client,
+                        destination_client,
+                        playlist,
+                        sync_state,
+                        journal,
+                        mirror,
+                    ):
+                        continue
+                    playlist_sync = prepare_playlist_sync(
+                        destination_client, playlist, mirror
+                    )
+
+                prepared.put(playlist_sync)
+        except Exception as e:  # noqa: BLE001 - re-raised by the consumer
+            errors.append(e)
+        finally:
+            prepared.put(None)
+
+    producer = threading.Thread(target=prepare, name="musync-prepare", daemon=True)
+    producer.start()
+
+    results: list[Playlist] = []
+    resolved = journaled_songs(destination_client, journal)
+    written_names: set[str] = set()
+    try:
+        while (playlist_sync := prepared.get()) is not None:
+            with metrics.phase("resolve"):
+                resolve_songs(
+                    destination_client,
+                    playlist_sync.songs_to_search,
+                    concurrency,
+                    resolved,
+                    journal,
                 )
-                destination_playlist = existing_playlist
-        else:
-            logger.info(
-                f"Creating {destination_client.provider_name} playlist: {playlist_to_create_name} with {len(songs_to_add)} songs"
-            )
 
-            destination_playlist = destination_client.create_playlist(
-                playlist_to_create_name, songs_to_add
+            destination_playlist = write_playlist_sync(
+                source_client,
+                destination_client,
+                playlist_sync,
+                resolved,
+                sync_state,
+                journal,
+                written_names,
             )
+            results.append(
+                playlist_by_metadata(destination_client, destination_playlist)
+            )
+    finally:
+        # Unblock the producer if writing failed while it waits for room
+        stopped.set()
+        while producer.is_alive():
+            try:
+                prepared.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    if errors:
+        raise errors[0]
 
-        results.append(destination_playlist)
-
+    logger.info(
+        f"Synced {len(results)} playlists, searching {destination_client.provider_name} for {len(resolved)} distinct songs"
+    )
     return results
 
 
+@profiler.profile("sync_users_playlists")
 def sync_users_playlists(
     source_client: ProviderClient,
     destination_client: ProviderClient,
+    concurrency: int = 1,
+    sync_state: SyncState | None = None,
+    stream_window: int | None = None,
+    mirror: bool = False,
+    journal: SyncJournal | None = None,
 ) -> list[Playlist]:
     logger.info(
         f"Fetching user's playlists from {source_client.provider_name} to sync to {destination_client.provider_name}"
     )
 
-    playlists_to_sync = [
-        playlist
-        for playlist in source_client.get_user_playlists()
-        if not playlist.name.endswith(PLAYLIST_SUFFIX)
-    ]
+    if stream_window is not None:
+        return stream_playlists(
+            source_client,
+            destination_client,
+            (
+                playlist
+                for playlist in source_client.iter_user_playlists()
+                if not is_musync_playlist(playlist)
+            ),
+            concurrency,
+            sync_state,
+            stream_window,
+            mirror,
+            journal,
+        )
+
+    with metrics.phase("fetch_source"):
+        playlists_to_sync = [
+            playlist
+            for playlist in source_client.get_user_playlists()
+            if not is_musync_playlist(playlist)
+        ]
 
     logger.info(f"Found {len(playlists_to_sync)} playlists to sync")
 
-    return sync_playlists(source_client, destination_client, playlists_to_sync)
+    return sync_playlists(
+        source_client,
+        destination_client,
+        playlists_to_sync,
+        concurrency,
+        sync_state,
+        mirror,
+        journal,
+    )
 
 
+@profiler.profile("sync_followed_playlists")
 def sync_followed_playlists(
     source_client: ProviderClient,
     destination_client: ProviderClient,
+    concurrency: int = 1,
+    sync_state: SyncState | None = None,
+    stream_window: int | None = None,
+    mirror: bool = False,
+    journal: SyncJournal | None = None,
 ) -> list[Playlist]:
     logger.info(
         f"Fetching user's followed playlists from {source_client.provider_name} to sync to {destination_client.provider_name}"
     )
 
-    playlists_to_sync = [
-        playlist
-        for playlist in source_client.get_followed_playlists()
-        if not playlist.name.startswith(PLAYLIST_SUFFIX)
-    ]
+    if stream_window is not None:
+        return stream_playlists(
+            source_client,
+            destination_client,
+            (
+                playlist
+                for playlist in source_client.iter_followed_playlists()
+                if not is_musync_playlist(playlist)
+            ),
+            concurrency,
+            sync_state,
+            stream_window,
+            mirror,
+            journal,
+        )
+
+    with metrics.phase("fetch_source"):
+        playlists_to_sync = [
+            playlist
+            for playlist in source_client.get_followed_playlists()
+            if not is_musync_playlist(playlist)
+        ]
 
     logger.info(f"Found {len(playlists_to_sync)} playlists to sync")
 
-    return sync_playlists(source_client, destination_client, playlists_to_sync)
+    return sync_playlists(
+        source_client,
+        destination_client,
+        playlists_to_sync,
+        concurrency,
+        sync_state,
+        mirror,
+        journal,
+    )
 
 
-def sync_followed_artists(
+def plan_followed_artists(
     source_client: ProviderClient,
     destination_client: ProviderClient,
-) -> list[Artist]:
-    source_artists = source_client.get_followed_artists()
-    synced_artists = []
+    journal: SyncJournal | None = None,
+    source_artists: list[Artist] | None = None,
+) -> tuple[list[Artist], list[Artist]]:
+    """Return the destination artists to follow, and the source artists not found."""
+    if source_artists is None:
+        with metrics.phase("fetch_source"):
+            source_artists = source_client.get_followed_artists()
+
+    with metrics.phase("prepare"):
+        followed_artists = destination_client.get_followed_artists()
+    followed_names = {artist.match_key for artist in followed_artists}
+    followed_ids = {artist.id for artist in followed_artists}
+
+    artists_to_find = [
+        artist for artist in source_artists if artist.match_key not in followed_names
+    ]
+    logger.info(
+        f"{len(source_artists) - len(artists_to_find)} of {len(source_artists)} artists are already followed on {destination_client.provider_name}"
+    )
+
+    found_artists = journal.artists(destination_client.provider_name) if journal else {}
+
+    artists_to_follow: list[Artist] = []
+    unresolved_artists: list[Artist] = []
+    for artist in artists_to_find:
+        if artist.match_key in found_artists:
+            destination_artist = found_artists[artist.match_key]
+        else:
+            with metrics.phase("resolve"):
+                destination_artist = destination_client.find_artist(artist)
+            if journal is not None:
+                journal.record_artist(
+                    destination_client.provider_name, artist, destination_artist
+                )
 
-    for artist in source_artists:
-        destination_artist = destination_client.find_artist(artist)
         if not destination_artist:
             logger.warning(
                 f"Could not find match for artist '{artist.name}' on {destination_client.provider_name}"
             )
+            unresolved_artists.append(artist)
+            continue
+
+        if destination_artist.id in followed_ids:
             continue
 
         logger.info(
             f"Syncing artist '{artist.name}' from {source_client.provider_name} to {destination_client.provider_name}"
         )
-        destination_client.follow_artist(destination_artist)
-        synced_artists.append(destination_artist)
+        followed_ids.add(destination_artist.id)
+        artists_to_follow.append(destination_artist)
+
+    return artists_to_follow, unresolved_artists
+
+
+@profiler.profile("sync_followed_artists")
+def sync_followed_artists(
+    source_client: ProviderClient,
+    destination_client: ProviderClient,
+    journal: SyncJournal | None = None,
+    sync_state: SyncState | None = None,
+) -> list[Artist]:
+    """Follow the source's followed artists on the destination.
+
+    With `sync_state`, only artists that weren't synced before are searched
+    for, so an artist that couldn't be found isn't searched for at every sync.
+    """
+    with metrics.phase("fetch_source"):
+        source_artists = source_client.get_followed_artists()
+
+    if sync_state is not None:
+        synced_ids = sync_state.synced_artist_ids(source_client, destination_client)
+        source_artists = [
+            artist for artist in source_artists if artist.id not in synced_ids
+        ]
+        if not source_artists:
+            logger.info(
+                f"Skipping followed artists, all synced to {destination_client.provider_name} before"
+            )
+            return []
+
+    synced_artists, _ = plan_followed_artists(
+        source_client, destination_client, journal, source_artists
+    )
+
+    if synced_artists:
+        with metrics.phase("write"):
+            destination_client.follow_artists(synced_artists)
+
+    if sync_state is not None and not destination_client.read_only:
+        sync_state.record_artists(source_client, destination_client, source_artists)
 
     return synced_artists
 
 
-def delete_synced_playlists(client: ProviderClient) -> None:
+def sync_source_to_destination(
+    source_client: ProviderClient,
+    destination_client: ProviderClient,
+    user_playlists: bool = True,
+    followed_playlists: bool = True,
+    followed_artists: bool = True,
+    concurrency: int = 1,
+    sync_state: SyncState | None = None,
+    stream_window: int | None = None,
+    mirror: bool = False,
+    journal: SyncJournal | None = None,
+) -> None:
+    """Sync one provider's data to another."""
+    if user_playlists:
+        sync_users_playlists(
+            source_client,
+            destination_client,
+            concurrency,
+            sync_state,
+            stream_window,
+            mirror,
+            journal,
+        )
+
+    if followed_playlists:
+        sync_followed_playlists(
+            source_client,
+            destination_client,
+            concurrency,
+            sync_state,
+            stream_window,
+            mirror,
+            journal,
+        )
+
+    if followed_artists:
+        sync_followed_artists(source_client, destination_client, journal, sync_state)
+
+
+def sync_providers(
+    clients: Sequence[ProviderClient],
+    user_playlists: bool = True,
+    followed_playlists: bool = True,
+    followed_artists: bool = True,
+    concurrency: int = 1,
+    sync_state: SyncState | None = None,
+    stream_window: int | None = None,
+    mirror: bool = False,
+    journal: SyncJournal | None = None,
+) -> None:
+    """Sync every provider's data to every other provider."""
+    # Each provider is read once per other provider, so remember its listings
+    memoized_clients = [MemoizedClient(client) for client in clients]
+
+    for source_client, destination_client in itertools.permutations(
+        memoized_clients, 2
+    ):
+        logger.info(
+            f"Syncing {source_client.provider_name} to {destination_client.provider_name}"
+        )
+        sync_source_to_destination(
+            source_client,
+            destination_client,
+            user_playlists,
+            followed_playlists,
+            followed_artists,
+            concurrency,
+            sync_state,
+            stream_window,
+            mirror,
+            journal,
+        )
+
+
+def watch_providers(
+    clients: Sequence[ProviderClient],
+    sync_state: SyncState,
+    interval: float = 60,
+    cycles: int | None = None,
+    user_playlists: bool = True,
+    followed_playlists: bool = True,
+    followed_artists: bool = True,
+    concurrency: int = 1,
+    mirror: bool = False,
+) -> None:
+    """Sync the providers every `interval` seconds, `cycles` times or forever.
+
+    The same clients are reused between syncs, so they stay authenticated.
+    Each poll only lists the providers' libraries, and `sync_state` skips the
+    playlists whose version hasn't changed, so only changed playlists have
+    their songs fetched and searched for. A failed sync is retried at the next
+    poll.
+    """
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        started = time.monotonic()
+        if cycle:
+            for client in clients:
+                client.refresh()
+
+        try:
+            sync_providers(
+                clients,
+                user_playlists=user_playlists,
+                followed_playlists=followed_playlists,
+                followed_artists=followed_artists,
+                concurrency=concurrency,
+                sync_state=sync_state,
+                mirror=mirror,
+            )
+        except Exception:  # noqa: BLE001 - a failed poll mustn't stop the watch
+            logger.exception("Sync failed, it will be retried at the next poll")
+
+        cycle += 1
+        if cycles is None or cycle < cycles:
+            wait = max(0.0, interval - (time.monotonic() - started))
+            logger.info(f"Next poll in {wait:.0f}s")
+            time.sleep(wait)
+
+
+@profiler.profile("plan_sync")
+def plan_sync(
+    source_client: ProviderClient,
+    destination_client: ProviderClient,
+    destination: str,
+    user_playlists: bool = True,
+    followed_playlists: bool = True,
+    followed_artists: bool = True,
+    concurrency: int = 1,
+    sync_state: SyncState | None = None,
+    mirror: bool = False,
+) -> SyncPlan:
+    """Search for everything a sync would write, and plan the writes without them.
+
+    `destination` is the name the destination provider is registered under.
+    """
+    sync_plan = SyncPlan(
+        source_provider=source_client.provider_name,
+        destination_provider=destination_client.provider_name,
+        destination=destination,
+        mirror=mirror,
+    )
+
+    with metrics.phase("fetch_source"):
+        playlists: list[Playlist] = []
+        if user_playlists:
+            playlists += source_client.get_user_playlists()
+        if followed_playlists:
+            playlists += source_client.get_followed_playlists()
+    playlists = [playlist for playlist in playlists if not is_musync_playlist(playlist)]
+    logger.info(f"Found {len(playlists)} playlists to plan")
+
+    playlist_syncs, resolved = prepare_playlist_syncs(
+        source_client, destination_client, playlists, concurrency, sync_state, mirror
+    )
+    sync_plan.playlists = [
+        plan_playlist_sync(destination_client, playlist_sync, resolved)
+        for playlist_sync in playlist_syncs
+    ]
+
+    if followed_artists:
+        sync_plan.artists_to_follow, sync_plan.unresolved_artists = (
+            plan_followed_artists(source_client, destination_client)
+        )
+
+    return sync_plan
+
+
+def is_plan_current(
+    playlist_plan: PlaylistPlan, existing_playlist: Playlist | None
+) -> bool:
+    """Whether the destination playlist is still as it was when the plan was made."""
+    if existing_playlist is None:
+        return playlist_plan.creates_playlist
+
+    if not playlist_plan.has_writes:
+        # Nothing is written to it, so its songs aren't fetched to compare them
+        return existing_playlist.id == playlist_plan.destination_id
+
+    return (
+        existing_playlist.id == playlist_plan.destination_id
+        and songs_digest(existing_playlist.songs) == playlist_plan.destination_digest
+    )
+
+
+def apply_sync_plan(
+    destination_client: ProviderClient,
+    sync_plan: SyncPlan,
+    concurrency: int = 1,
+    sync_state: SyncState | None = None,
+) -> list[Playlist]:
+    """Make a plan's writes, without searching or reading the source again.
+
+    Playlists that changed since the plan was made, or that it was already
+    applied to, are skipped.
+    """
+    if destination_client.provider_name != sync_plan.destination_provider:
+        raise ValueError(
+            f"The plan is for {sync_plan.destination_provider}, not {destination_client.provider_name}"
+        )
+
+    def apply(playlist_plan: PlaylistPlan) -> Playlist | None:
+        existing_playlist = destination_client.get_playlist_by_name(
+            playlist_plan.destination_name
+        )
+        if not is_plan_current(playlist_plan, existing_playlist):
+            logger.warning(
+                f"Skipping {destination_client.provider_name} playlist {playlist_plan.destination_name}, it changed since the plan was made or the plan was already applied"
+            )
+            return None
+
+        with metrics.phase("write"):
+            destination_playlist = apply_playlist_plan(
+                destination_client, playlist_plan, existing_playlist
+            )
+
+        if sync_state is not None and not destination_client.read_only:
+            sync_state.record_version(
+                sync_plan.source_provider,
+                playlist_plan.source_id,
+                playlist_plan.source_version,
+                destination_client.provider_name,
+                destination_playlist.id,
+                sync_plan.mirror,
+            )
+
+        return destination_playlist
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        applied = [
+            playlist
+            for playlist in executor.map(apply, sync_plan.playlists)
+            if playlist is not None
+        ]
+
+    if sync_plan.artists_to_follow:
+        logger.info(
+            f"Following {len(sync_plan.artists_to_follow)} artists on {destination_client.provider_name}"
+        )
+        with metrics.phase("write"):
+            destination_client.follow_artists(sync_plan.artists_to_follow)
+
+    logger.info(
+        f"Applied the plan to {len(applied)} of {len(sync_plan.playlists)} playlists"
+    )
+    return applied
+
+
+def delete_synced_playlists(client: ProviderClient, concurrency: int = 1) -> int:
+    """Delete every playlist created by musync, returning how many were deleted.
+
+    Only the playlist listing is fetched, and playlists are deleted
+    `concurrency` at a time. A playlist that can't be deleted is logged and
+    doesn't stop the others from being deleted.
+    """
     logger.info(f"Fetching playlists from {client.provider_name} ")
-    playlists = client.get_user_playlists()
+    with metrics.phase("fetch_source"):
+        playlists = client.get_user_playlists()
     playlists = [playlist for playlist in playlists if is_musync_playlist(playlist)]
     logger.info(f"Found {len(playlists)} playlists to delete")
 
-    for playlist in playlists:
-        logger.info(f"Deleting playlist '{playlist.name}' from {client.provider_name}")
-        client.delete_playlist(playlist)
+    def delete_playlist(playlist: Playlist) -> bool:
+        try:
+            client.delete_playlist(playlist)
+        except Exception:  # noqa: BLE001 - logged, the other playlists are deleted
+            logger.exception(
+                f"Failed to delete playlist '{playlist.name}' from {client.provider_name}"
+            )
+            return False
+
+        logger.debug(f"Deleted playlist '{playlist.name}' from {client.provider_name}")
+        return True
+
+    deleted = failed = 0
+    with (
+        metrics.phase("write"),
+        ThreadPoolExecutor(max_workers=concurrency) as executor,
+    ):
+        for done, success in enumerate(executor.map(delete_playlist, playlists), 1):
+            deleted += success
+            failed += not success
+            if done % 10 == 0 or done == len(playlists):
+                logger.info(
+                    f"Deleted {deleted} of {len(playlists)} playlists from {client.provider_name}"
+                    + (f", {failed} failed" if failed else "")
+                )
 
-    logger.info(f"Deleted {len(playlists)} playlists")
+    logger.info(f"Deleted {deleted} playlists")
+    if failed:
+        logger.warning(f"Failed to delete {failed} playlists")
+    return deleted
@@ -0,0 +1,41 @@
+from unittest.mock import MagicMock
+
+from musync.models import Playlist, Song
+
+SONGS = [
+    Song(id="1", title="Wonderwall", artist="Oasis"),
+    Song(id="2", title="Parklife", artist="Blur", album="Parklife"),
+]
+
+
+def test_songs_survive_a_round_trip():
+    playlist = Playlist(id="1", name="Britpop", version="v1", songs=SONGS)
+
+    for loaded in [
+        Playlist.model_validate(playlist.model_dump()),
+        Playlist.model_validate_json(playlist.model_dump_json()),
+    ]:
+        assert loaded.songs_loaded
+        assert loaded.songs == SONGS
+        assert (loaded.id, loaded.name, loaded.version, loaded.track_count) == (
+            "1",
+            "Britpop",
+            "v1",
+            2,
+        )
+
+
+def test_lazy_songs_are_loaded_to_be_serialized():
+    load_songs = MagicMock(return_value=SONGS)
+    playlist = Playlist(id="1", name="Britpop", load_songs=load_songs)
+
+    assert playlist.model_dump()["songs"] == [song.model_dump() for song in SONGS]
+    assert playlist.track_count == 2
+    load_songs.assert_called_once()
+
+
+def test_playlists_without_songs_are_validated_lazily():
+    playlist = Playlist.model_validate({"id": "1", "name": "Britpop"})
+
+    assert not playlist.songs_loaded
+    assert playlist.songs == []
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+
+from musync.models import Playlist, Song
+from musync.providers.index import PlaylistIndex
+
+
+def test_index_lists_once_and_loads_songs_lazily():
+    list_playlists = MagicMock(
+        return_value=[("1", "Britpop [MUSYNC]"), ("2", "Grunge [MUSYNC]")]
+    )
+    get_songs = MagicMock(
+        return_value=[Song(id="song_1", title="Wonderwall", artist="Oasis")]
+    )
+    index = PlaylistIndex(list_playlists, get_songs)
+
+    assert "Britpop [MUSYNC]" in index
+    assert "Shoegaze [MUSYNC]" not in index
+    get_songs.assert_not_called()
+
+    playlist = index.get("Britpop [MUSYNC]")
+    assert playlist is not None
+    assert playlist.id == "1"
+    assert index.get("Britpop [MUSYNC]") is playlist
+    assert index.get("Shoegaze [MUSYNC]") is None
+    get_songs.assert_not_called()
+
+    assert len(playlist.songs) == 1
+    assert len(playlist.songs) == 1
+    list_playlists.assert_called_once()
+    get_songs.assert_called_once_with("1")
+
+
+def test_index_tracks_created_and_deleted_playlists():
+    songs = [Song(id="song_1", title="Smells Like Teen Spirit", artist="Nirvana")]
+    get_songs = MagicMock(return_value=songs)
+    index = PlaylistIndex(
+        MagicMock(return_value=[("1", "Britpop [MUSYNC]")]), get_songs
+    )
+    created = Playlist(id="2", name="Grunge [MUSYNC]", songs=songs)
+
+    index.add(created)
+    indexed = index.get("Grunge [MUSYNC]")
+    assert indexed is not None
+    assert indexed.id == "2"
+    # The songs written aren't kept, they're fetched again when needed
+    assert not indexed.songs_loaded
+    assert indexed.songs == songs
+    get_songs.assert_called_once_with("2")
+
+    index.remove(Playlist(id="1", name="Britpop [MUSYNC]", songs=[]))
+    assert "Britpop [MUSYNC]" not in index
+
+
+def test_index_keeps_written_songs_when_nothing_is_written():
+    get_songs = MagicMock()
+    index = PlaylistIndex(
+        MagicMock(return_value=[]), get_songs, keep_written_songs=True
+    )
+    created = Playlist(id="read_only_playlist", name="Grunge [MUSYNC]", songs=[])
+
+    index.add(created)
+
+    assert index.get("Grunge [MUSYNC]") is created
+    get_songs.assert_not_called()
@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock
+
+from musync.models import Playlist
+from musync.models.artist import Artist
+from musync.providers.memoized import MemoizedClient
+
+
+def test_listings_are_fetched_once():
+    client = MagicMock()
+    client.get_user_playlists.return_value = [
+        Playlist(id="1", name="Britpop", songs=[])
+    ]
+    client.get_followed_artists.return_value = [Artist(id="1", name="Oasis")]
+    memoized_client = MemoizedClient(client)
+
+    assert memoized_client.get_user_playlists() == memoized_client.get_user_playlists()
+    assert len(memoized_client.get_followed_artists()) == 1
+    assert len(memoized_client.get_followed_artists()) == 1
+
+    client.get_user_playlists.assert_called_once()
+    client.get_followed_artists.assert_called_once()
+
+
+def test_writes_update_listings():
+    client = MagicMock()
+    existing = Playlist(id="1", name="Britpop", songs=[])
+    created = Playlist(id="2", name="Grunge [MUSYNC]", songs=[])
+    client.get_user_playlists.return_value = [existing]
+    client.get_followed_artists.return_value = []
+    client.create_playlist.return_value = created
+    memoized_client = MemoizedClient(client)
+    memoized_client.get_user_playlists()
+    memoized_client.get_followed_artists()
+
+    memoized_client.create_playlist("Grunge [MUSYNC]", [])
+    assert memoized_client.get_user_playlists() == [existing, created]
+
+    memoized_client.delete_playlist(existing)
+    assert memoized_client.get_user_playlists() == [created]
+
+    memoized_client.follow_artist(Artist(id="1", name="Oasis"))
+    assert memoized_client.get_followed_artists() == [Artist(id="1", name="Oasis")]
+
+    client.get_user_playlists.assert_called_once()
+    client.get_followed_artists.assert_called_once()
@@ -0,0 +1,193 @@
+from musync import sync as sync_module
+from musync.diff import Move
+from musync.models import Song
+from musync.models.artist import Artist
+from musync.providers.memory import InMemoryClient, generate_library
+from musync.state import SyncState
+from musync.sync import (
+    delete_synced_playlists,
+    sync_providers,
+    sync_users_playlists,
+    watch_providers,
+)
+
+
+def test_generate_library_duplicates_tracks():
+    library = generate_library(
+        "test", user_playlists=10, tracks_per_playlist=50, unique_tracks=100
+    )
+
+    songs = [song for playlist in library.user_playlists for song in playlist.songs]
+    assert len(library.user_playlists) == 10
+    assert len(songs) == 500
+    assert len({song.id for song in songs}) <= 100
+
+
+def test_sync_between_in_memory_clients():
+    source = InMemoryClient(
+        "Source",
+        generate_library("source", user_playlists=3, followed_playlists=0),
+    )
+    destination = InMemoryClient("Destination", failure_rate=0.1)
+
+    synced = sync_users_playlists(source, destination, concurrency=4)
+
+    assert len(synced) == 3
+    assert {playlist.name for playlist in destination.get_user_playlists()} == {
+        "Playlist 0 [MUSYNC]",
+        "Playlist 1 [MUSYNC]",
+        "Playlist 2 [MUSYNC]",
+    }
+    assert destination.calls["create_playlist"] == 3
+
+    searches = destination.calls["search_songs"]
+    sync_users_playlists(source, destination, concurrency=4)
+    assert destination.calls["search_songs"] == searches
+    assert destination.calls["create_playlist"] == 3
+
+
+def test_sync_providers_lists_each_provider_once():
+    clients = [
+        InMemoryClient(name, generate_library(name, user_playlists=2, seed=seed))
+        for seed, name in enumerate(["First", "Second", "Third"])
+    ]
+
+    sync_providers(clients)
+
+    for client in clients:
+        assert client.calls["followed_artists"] == 1
+        # User playlists, followed playlists and the destination playlist index
+        assert client.calls["list_playlists"] == 3
+
+
+def test_streaming_sync_between_in_memory_clients():
+    source = InMemoryClient(
+        "Source",
+        generate_library("source", user_playlists=60, followed_playlists=0),
+    )
+    destination = InMemoryClient("Destination")
+
+    synced = sync_users_playlists(source, destination, concurrency=4, stream_window=2)
+
+    assert len(synced) == 60
+    assert source.calls["list_playlists"] == 2
+    assert destination.calls["create_playlist"] == 60
+
+
+def test_mirror_sync_removes_and_reorders_songs():
+    source = InMemoryClient(
+        "Source",
+        generate_library("source", user_playlists=1, followed_playlists=0),
+    )
+    destination = InMemoryClient("Destination")
+    sync_users_playlists(source, destination)
+
+    [playlist] = source.get_user_playlists()
+    playlist = source.remove_songs_from_playlist(playlist, [0, 5, 6])
+    source.move_songs_in_playlist(playlist, [Move(10, 0, 3)])
+
+    sync_users_playlists(source, destination, mirror=True)
+
+    [source_playlist] = source.get_user_playlists()
+    [destination_playlist] = destination.get_user_playlists()
+    assert [song.title for song in destination_playlist.songs] == [
+        song.title for song in source_playlist.songs
+    ]
+    assert destination.calls["remove_playlist_items"] == 1
+    assert destination.calls["reorder_playlist_items"] == 1
+    assert destination.calls["create_playlist"] == 1
+    # Only the two batches of the initial sync added songs
+    assert destination.calls["add_playlist_items"] == 2
+
+
+def test_delete_synced_playlists_deletes_concurrently_without_loading_songs():
+    source = InMemoryClient(
+        "Source",
+        generate_library("source", user_playlists=25, followed_playlists=0),
+    )
+    client = InMemoryClient("Destination")
+    sync_users_playlists(source, client, concurrency=4)
+    tracks_fetched = client.calls["playlist_tracks"]
+    delete_playlist = client.delete_playlist
+
+    def delete_all_but_one(playlist):
+        if playlist.name == "Playlist 3 [MUSYNC]":
+            raise ConnectionError("Connection lost")
+        delete_playlist(playlist)
+
+    client.delete_playlist = delete_all_but_one
+
+    assert delete_synced_playlists(client, concurrency=4) == 24
+    assert client.calls["playlist_tracks"] == tracks_fetched
+    assert [playlist.name for playlist in client.get_user_playlists()] == [
+        "Playlist 3 [MUSYNC]"
+    ]
+
+
+def test_watch_only_syncs_changed_playlists(tmp_path, monkeypatch):
+    source = InMemoryClient(
+        "Source",
+        generate_library("source", user_playlists=3, followed_playlists=0),
+    )
+    destination = InMemoryClient("Destination")
+    sync_state = SyncState(tmp_path / "sync_state.db")
+    first_sync: dict[str, int] = {}
+
+    def change_playlist(seconds):
+        [playlist, *_] = source.get_user_playlists()
+        source.add_songs_to_playlist(
+            playlist, [Song(id="new", title="New song", artist="New artist")]
+        )
+        first_sync.update(source.calls)
+
+    monkeypatch.setattr(sync_module.time, "sleep", change_playlist)
+    watch_providers(
+        [source, destination],
+        sync_state,
+        interval=0,
+        cycles=2,
+        followed_playlists=False,
+        followed_artists=False,
+    )
+
+    # Only the changed playlist's 201 songs are fetched again, in 3 pages
+    assert source.calls["playlist_tracks"] - first_sync["playlist_tracks"] == 3
+    assert destination.calls["create_playlist"] == 3
+    [playlist] = [
+        playlist
+        for playlist in destination.get_user_playlists()
+        if playlist.name == "Playlist 0 [MUSYNC]"
+    ]
+    assert playlist.songs[-1].title == "New song"
+
+
+def test_watch_only_searches_for_artists_when_they_change(tmp_path, monkeypatch):
+    source = InMemoryClient(
+        "Source",
+        generate_library(
+            "source", user_playlists=0, followed_playlists=0, followed_artists=20
+        ),
+    )
+    destination = InMemoryClient("Destination", missing_rate=0.5)
+    sync_state = SyncState(tmp_path / "sync_state.db")
+    searches: list[int] = []
+
+    def poll(seconds):
+        searches.append(destination.calls["search_artists"])
+        if len(searches) == 2:
+            source.follow_artists([Artist(id="new", name="New artist")])
+
+    monkeypatch.setattr(sync_module.time, "sleep", poll)
+    watch_providers(
+        [source, destination],
+        sync_state,
+        interval=0,
+        cycles=4,
+        user_playlists=False,
+        followed_playlists=False,
+    )
+    searches.append(destination.calls["search_artists"])
+
+    # Artists that weren't found aren't searched for again until the source's
+    # followed artists change, and then only the new artist is
+    assert searches == [20, 20, 21, 21]
@@ -0,0 +1,42 @@
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from musync.providers import registry
+from musync.providers.memory import InMemoryClient
+from musync.providers.registry import get_provider_class, provider_names
+from musync.providers.spotify import SpotifyClient
+
+
+@pytest.fixture(autouse=True)
+def clear_providers():
+    registry.providers.cache_clear()
+    yield
+    registry.providers.cache_clear()
+
+
+def test_builtin_providers():
+    assert provider_names() == ["spotify", "youtube"]
+    assert get_provider_class("spotify") is SpotifyClient
+
+
+def test_invalid_provider():
+    with pytest.raises(ValueError, match="Invalid provider: deezer"):
+        get_provider_class("deezer")
+
+
+def test_providers_from_entry_points(monkeypatch):
+    monkeypatch.setattr(
+        registry,
+        "entry_points",
+        lambda group: [
+            EntryPoint(
+                name="memory",
+                value="musync.providers.memory:InMemoryClient",
+                group=group,
+            )
+        ],
+    )
+
+    assert provider_names() == ["spotify", "youtube", "memory"]
+    assert get_provider_class("memory") is InMemoryClient
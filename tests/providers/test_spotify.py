@@ -1,8 +1,19 @@
 from musync.models import Song
 
-from musync.providers.spotify import SpotifyClient
+from musync.providers.spotify import (
+    SharedCacheFileHandler,
+    SpotifyClient,
+    retry_after,
+)
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+from pathlib import Path
+import threading
+import time
 
 import pytest
+from spotipy import SpotifyException
 
 from unittest.mock import MagicMock
 
@@ -55,6 +66,7 @@ def test_find_song(sp_client: SpotifyClient):
     assert sp_song.id == "1qPbGZqppFwLwcBC1JQ6Vr"
     assert sp_song.title == song.title
     assert sp_song.artist == song.artist
+    assert sp_client._client.search.call_args.kwargs["limit"] == 1
 
 
 def test_find_song_no_results(sp_client: SpotifyClient):
@@ -186,3 +198,189 @@ def test_get_songs_from_playlist_multiple_pages(sp_client: SpotifyClient):
     assert songs[2].title == "Some Other Song 2"
     assert songs[2].artist == "Blur"
     assert songs[2].album == "Some Album"
+
+
+def test_get_songs_from_playlist_fetches_remaining_pages_by_offset(
+    sp_client: SpotifyClient,
+):
+    def playlist_tracks(playlist_id: str, limit: int, offset: int, fields: str) -> dict:
+        return {
+            "items": [
+                {
+                    "track": {
+                        "id": str(number),
+                        "name": f"Song {number}",
+                        "artists": [{"name": "Oasis"}],
+                        "album": {"name": "Definitely Maybe"},
+                    }
+                }
+                for number in range(offset, min(offset + limit, 250))
+            ],
+            "total": 250,
+            "next": "http://example.com" if offset + limit < 250 else None,
+        }
+
+    sp_client._client.playlist_tracks = MagicMock(side_effect=playlist_tracks)
+    sp_client._client.next = MagicMock()
+
+    songs = sp_client.get_songs_from_playlist("test_playlist_id")
+
+    assert [song.id for song in songs] == [str(number) for number in range(250)]
+    assert sorted(
+        call.kwargs["offset"]
+        for call in sp_client._client.playlist_tracks.call_args_list
+    ) == [0, 100, 200]
+    sp_client._client.next.assert_not_called()
+
+
+def test_get_playlist_by_name_pages_through_playlists(sp_client: SpotifyClient):
+    sp_client._client.current_user_playlists = MagicMock(
+        return_value={
+            "items": [{"id": "1", "name": "Britpop"}, None],
+            "next": "http://example.com",
+        }
+    )
+    sp_client._client.next = MagicMock(
+        return_value={
+            "items": [{"id": "2", "name": "Britpop [MUSYNC]"}],
+            "next": None,
+        }
+    )
+    sp_client._client.playlist_tracks = MagicMock(
+        return_value={"items": [], "next": None}
+    )
+
+    playlist = sp_client.get_playlist_by_name("Britpop [MUSYNC]")
+
+    assert playlist is not None
+    assert playlist.id == "2"
+    assert sp_client.user_playlist_exists("Britpop [MUSYNC]")
+    assert not sp_client.user_playlist_exists("Grunge [MUSYNC]")
+    sp_client._client.current_user_playlists.assert_called_once()
+
+
+def test_get_user_playlists_defers_loading_songs(sp_client: SpotifyClient):
+    sp_client._client.me = MagicMock(return_value={"id": "user"})
+    sp_client._client.current_user_playlists = MagicMock(
+        return_value={
+            "items": [
+                {
+                    "id": "1",
+                    "name": "Britpop",
+                    "owner": {"id": "user"},
+                    "snapshot_id": "snapshot",
+                    "tracks": {"total": 0},
+                },
+                {
+                    "id": "2",
+                    "name": "Today's Top Hits",
+                    "owner": {"id": "spotify"},
+                    "snapshot_id": "other_snapshot",
+                    "tracks": {"total": 50},
+                },
+            ],
+            "next": None,
+        }
+    )
+    sp_client._client.playlist_tracks = MagicMock(
+        return_value={"items": [], "next": None}
+    )
+
+    playlists = sp_client.get_user_playlists()
+
+    assert len(playlists) == 1
+    assert playlists[0].version == "snapshot"
+    assert playlists[0].track_count == 0
+    sp_client._client.playlist_tracks.assert_not_called()
+
+    assert playlists[0].songs == []
+    sp_client._client.playlist_tracks.assert_called_once()
+
+
+def test_identity_is_fetched_once(sp_client: SpotifyClient):
+    sp_client._client.me = MagicMock(return_value={"id": "rorydevitt"})
+
+    assert sp_client.user_id == "rorydevitt"
+    assert sp_client.username == "rorydevitt"
+    assert sp_client.user_id == "rorydevitt"
+    sp_client._client.me.assert_called_once()
+
+
+def test_shared_cache_file_handler_reads_token_until_it_expires(tmp_path):
+    path = tmp_path / "spotify_token.json"
+    handler = SharedCacheFileHandler(path)
+    token_info = {"access_token": "token", "expires_at": int(time.time()) + 3600}
+
+    assert handler.get_cached_token() is None
+    handler.save_token_to_cache(token_info)
+    assert json.loads(path.read_text()) == token_info
+    assert [file.name for file in tmp_path.iterdir()] == ["spotify_token.json"]
+
+    # Another process refreshing the token doesn't matter until ours expires
+    path.write_text(json.dumps({**token_info, "access_token": "other"}))
+    assert SharedCacheFileHandler(path).get_cached_token()["access_token"] == "other"
+    assert handler.get_cached_token()["access_token"] == "token"
+
+    handler.save_token_to_cache({**token_info, "expires_at": int(time.time())})
+    path.write_text(json.dumps({**token_info, "access_token": "refreshed"}))
+    assert handler.get_cached_token()["access_token"] == "refreshed"
+
+
+def test_from_credentials_caches_each_accounts_token_separately(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("MUSYNC_CACHE_DIR", str(tmp_path))
+
+    def cache_path(client: SpotifyClient):
+        return Path(client._client.auth_manager.cache_handler.cache_path)
+
+    alice = SpotifyClient.from_credentials({"client_id": "alice"}, account="alice")
+    bob = SpotifyClient.from_credentials({}, account="bob")
+    carol = SpotifyClient.from_credentials(
+        {"cache_path": str(tmp_path / "carol.json")}, account="carol"
+    )
+
+    assert alice._client.auth_manager.client_id == "alice"
+    assert cache_path(alice) == tmp_path / "spotify_token-alice.json"
+    assert cache_path(bob) == tmp_path / "spotify_token-bob.json"
+    assert cache_path(carol) == tmp_path / "carol.json"
+    assert cache_path(SpotifyClient.from_env()) == tmp_path / "spotify_token.json"
+
+    with pytest.raises(ValueError, match="cache_pth"):
+        SpotifyClient.from_credentials({"cache_pth": "token.json"}, account="dave")
+
+
+def test_retry_after():
+    assert retry_after(SpotifyException(429, -1, "", headers={"Retry-After": "3"})) == 3
+    assert retry_after(SpotifyException(429, -1, "")) == 0
+    assert retry_after(SpotifyException(404, -1, "")) is None
+    assert retry_after(ValueError()) is None
+
+
+def test_throttled_requests_are_left_to_the_rate_limiter(sp_client: SpotifyClient):
+    requests = []
+
+    class Throttling(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Throttling)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sp_client._client._auth = "token"
+
+    try:
+        with pytest.raises(SpotifyException) as error:
+            sp_client._client._get(f"http://127.0.0.1:{server.server_port}/me")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert requests == ["/me"]
+    assert retry_after(error.value) == 1
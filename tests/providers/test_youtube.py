@@ -1,7 +1,9 @@
 from unittest.mock import MagicMock
 import pytest
 
+from musync.providers.base import ProviderError
 from musync.providers.youtube import YoutubeClient
+from musync.models.playlist import Playlist
 from musync.models.song import Song
 
 
@@ -156,3 +158,83 @@ def test_find_song_no_album(yt_client: YoutubeClient):
 
     assert yt_song is not None
     assert yt_song.album is None
+
+
+def account_menu(browse_id: str) -> dict:
+    """Return an `account/account_menu` response for the user `browse_id`."""
+    link = {"navigationEndpoint": {"browseEndpoint": {"browseId": browse_id}}}
+    menu = {
+        "sections": [
+            {"multiPageMenuSectionRenderer": {"items": [{"compactLinkRenderer": link}]}}
+        ]
+    }
+    return {
+        "actions": [{"openPopupAction": {"popup": {"multiPageMenuRenderer": menu}}}]
+    }
+
+
+def test_library_listing_is_shared_and_updated_in_place(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr("musync.providers.youtube.YTMusic", MagicMock())
+    yt_client = YoutubeClient.from_env()
+    library_playlists = yt_client._client.get_library_playlists
+    library_playlists.return_value = [
+        {
+            "playlistId": "1",
+            "title": "Britpop",
+            "count": "2",
+            "author": [{"id": "user"}],
+        }
+    ]
+    yt_client._client.create_playlist.return_value = "2"
+    send_request = yt_client._client._send_request
+    send_request.return_value = account_menu("user")
+
+    assert yt_client.user_playlist_exists("Britpop")
+    created = yt_client.create_playlist("Grunge [MUSYNC]", [])
+    assert [playlist.id for playlist in yt_client.get_user_playlists()] == ["1", "2"]
+    indexed = yt_client.get_playlist_by_name("Grunge [MUSYNC]")
+    assert indexed is not None and indexed.id == created.id
+
+    yt_client.delete_playlist(created)
+    assert [playlist.id for playlist in yt_client.get_user_playlists()] == ["1"]
+    library_playlists.assert_called_once()
+    send_request.assert_called_once()
+
+    yt_client.library_ttl = 0
+    yt_client.get_user_playlists()
+    assert library_playlists.call_count == 2
+
+
+def test_library_ttl_is_configurable(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("musync.providers.youtube.YTMusic", MagicMock())
+
+    assert YoutubeClient.from_env().library_ttl == 10 * 60
+
+    monkeypatch.setenv("YOUTUBE_LIBRARY_TTL", "30")
+    assert YoutubeClient.from_env().library_ttl == 30
+    assert YoutubeClient.from_credentials({"library_ttl": "5"}).library_ttl == 5
+
+
+def test_add_songs_to_playlist_adds_duplicates_and_checks_the_status(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr("musync.providers.youtube.YTMusic", MagicMock())
+    yt_client = YoutubeClient.from_env()
+    yt_client._client._send_request.return_value = account_menu("user")
+    add_playlist_items = yt_client._client.add_playlist_items
+    add_playlist_items.return_value = {"status": "STATUS_SUCCEEDED"}
+    wonderwall = Song(id="1", title="Wonderwall", artist="Oasis")
+    playlist = Playlist(id="playlist", name="Britpop [MUSYNC]", songs=[wonderwall])
+
+    playlist = yt_client.add_songs_to_playlist(playlist, [wonderwall])
+
+    assert playlist.songs == [wonderwall, wonderwall]
+    add_playlist_items.assert_called_once_with("playlist", ["1"], duplicates=True)
+
+    # Failed edits are returned rather than raised by ytmusicapi
+    add_playlist_items.return_value = {"status": "STATUS_FAILED"}
+    with pytest.raises(ProviderError, match="Britpop"):
+        yt_client.add_songs_to_playlist(playlist, [wonderwall])
+    assert len(playlist.songs) == 2
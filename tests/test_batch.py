@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from musync.batch import AccountConfig, BatchConfig, sync_accounts
+
+
+def test_batch_config_from_file(tmp_path):
+    path = tmp_path / "accounts.toml"
+    path.write_text(
+        """
+concurrency = 2
+
+[[accounts]]
+name = "alice"
+source = "spotify"
+destination = "youtube"
+followed_artists = false
+
+[accounts.credentials.youtube]
+auth_file = "alice.json"
+
+[[accounts]]
+name = "bob"
+source = "youtube"
+destination = "spotify"
+"""
+    )
+
+    config = BatchConfig.from_file(path)
+
+    assert config.concurrency == 2
+    assert [account.name for account in config.accounts] == ["alice", "bob"]
+    assert config.accounts[0].credentials == {"youtube": {"auth_file": "alice.json"}}
+    assert not config.accounts[0].followed_artists
+    assert config.accounts[1].credentials == {}
+
+
+def test_batch_config_reads_numeric_credentials_as_strings(tmp_path):
+    path = tmp_path / "accounts.toml"
+    path.write_text(
+        """
+[[accounts]]
+name = "alice"
+source = "spotify"
+destination = "youtube"
+
+[accounts.credentials.youtube]
+auth_file = "alice.json"
+library_ttl = 300
+"""
+    )
+
+    config = BatchConfig.from_file(path)
+
+    assert config.accounts[0].credentials == {
+        "youtube": {"auth_file": "alice.json", "library_ttl": "300"}
+    }
+
+
+def test_batch_config_rejects_duplicate_account_names():
+    account = {"name": "alice", "source": "spotify", "destination": "youtube"}
+
+    with pytest.raises(ValidationError, match="alice"):
+        BatchConfig.model_validate({"accounts": [account, account]})
+
+
+def test_sync_accounts_runs_accounts_concurrently():
+    accounts = [
+        AccountConfig(name=str(number), source="spotify", destination="youtube")
+        for number in range(4)
+    ]
+    # Every account waits for all the others, so this only finishes if they
+    # all run at the same time
+    barrier = threading.Barrier(len(accounts), timeout=5)
+
+    def sync_account(account: AccountConfig) -> None:
+        barrier.wait()
+        time.sleep(0.1)
+        if account.name == "2":
+            raise RuntimeError("Invalid credentials")
+
+    started = time.perf_counter()
+    results = sync_accounts(accounts, sync_account, concurrency=len(accounts))
+
+    assert time.perf_counter() - started < 0.4
+    assert [result.name for result in results] == ["0", "1", "2", "3"]
+    assert [result.succeeded for result in results] == [True, True, False, True]
+    assert results[2].error == "Invalid credentials"
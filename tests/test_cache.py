@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from musync.cache import CachingClient, SongMatchCache
+from musync.models import Song
+
+
+@pytest.fixture
+def song_cache(tmp_path):
+    cache = SongMatchCache(tmp_path / "song_matches.db")
+    yield cache
+    cache.close()
+
+
+def test_cache_miss_then_hit(song_cache: SongMatchCache):
+    song = Song(id="test_id", title="Wonderwall", artist="Oasis")
+    match = Song(id="hpSrLjc5SMs", title="Wonderwall", artist="Oasis")
+
+    assert song_cache.get("YouTube", song) == (False, None)
+
+    song_cache.set("YouTube", song, match)
+
+    assert song_cache.get("YouTube", song) == (True, match)
+    assert song_cache.get("Spotify", song) == (False, None)
+    assert song_cache.hits == 1
+    assert song_cache.misses == 2
+
+
+def test_cache_key_is_normalized(song_cache: SongMatchCache):
+    match = Song(id="hpSrLjc5SMs", title="Wonderwall", artist="Oasis")
+    song_cache.set("YouTube", Song(id="1", title="Wonderwall", artist="Oasis"), match)
+
+    hit, cached = song_cache.get(
+        "YouTube", Song(id="2", title="  WONDERWALL ", artist="oasis")
+    )
+
+    assert hit
+    assert cached == match
+
+
+def test_cache_not_found_expires(song_cache: SongMatchCache):
+    song = Song(id="test_id", title="Wonderwall", artist="Oasis")
+    song_cache.not_found_ttl = 0
+
+    song_cache.set("YouTube", song, None)
+
+    assert song_cache.get("YouTube", song) == (False, None)
+    assert song_cache.evict_expired() == 1
+
+
+def test_caching_client_searches_once(song_cache: SongMatchCache):
+    song = Song(id="test_id", title="Wonderwall", artist="Oasis")
+    client = MagicMock(provider_name="YouTube")
+    client.find_song.return_value = None
+
+    caching_client = CachingClient(client, song_cache)
+
+    assert caching_client.find_song(song) is None
+    assert caching_client.find_song(song) is None
+    client.find_song.assert_called_once_with(song)
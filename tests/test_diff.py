@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from musync.diff import Move, apply_moves, diff_playlist, plan_moves, remove_positions
+from musync.models import Song
+
+
+def songs(ids: str) -> list[Song]:
+    return [
+        Song(id=song_id, title=f"Song {song_id}", artist="Oasis") for song_id in ids
+    ]
+
+
+def apply_diff(current: list[Song], target: list[Song]) -> list[str]:
+    diff = diff_playlist(current, target)
+    edited = remove_positions(current, diff.removals) + diff.additions
+    return [song.id for song in apply_moves(edited, diff.moves)]
+
+
+def test_identical_playlists_need_no_edits():
+    assert not diff_playlist(songs("abc"), songs("abc"))
+
+
+def test_diff_removes_and_adds_by_id():
+    diff = diff_playlist(songs("abcd"), songs("acde"))
+
+    assert diff.removals == [1]
+    assert [song.id for song in diff.additions] == ["e"]
+    assert diff.moves == []
+
+
+def test_diff_keeps_repeated_songs():
+    assert apply_diff(songs("aab"), songs("aba")) == list("aba")
+    assert diff_playlist(songs("aab"), songs("ab")).removals == [1]
+
+
+@pytest.mark.parametrize(
+    "order, moves",
+    [
+        ([1, 2, 3, 0], [Move(3, 0)]),
+        ([3, 0, 1, 2], [Move(0, 4)]),
+        ([2, 3, 0, 1], [Move(0, 4, 2)]),
+        ([0, 1, 2, 3], []),
+    ],
+)
+def test_moves_are_minimal_and_ranged(order, moves):
+    assert plan_moves(order) == moves
+    assert apply_moves(order, moves) == sorted(order)
+
+
+def test_diff_turns_any_playlist_into_any_other():
+    rng = random.Random(0)
+    for _ in range(500):
+        current = songs("".join(rng.choices("abcdef", k=rng.randrange(10))))
+        target = songs("".join(rng.choices("abcdef", k=rng.randrange(10))))
+
+        assert apply_diff(current, target) == [song.id for song in target]
+
+
+def test_moves_sort_any_permutation():
+    rng = random.Random(0)
+    for length in range(60):
+        order = list(range(length))
+        rng.shuffle(order)
+
+        assert apply_moves(order, plan_moves(order)) == sorted(order)
@@ -0,0 +1,62 @@
+import pytest
+
+from musync.journal import SyncJournal
+from musync.models import Song
+from musync.models.artist import Artist
+from musync.providers.memory import InMemoryClient, generate_library
+from musync.sync import sync_users_playlists
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = SyncJournal(tmp_path / "journal.db")
+    yield journal
+    journal.close()
+
+
+def test_matches_are_read_back_until_cleared(journal: SyncJournal):
+    song = Song(id="1", title="Wonderwall", artist="Oasis")
+    journal.record_song(
+        "YouTube", song, Song(id="yt", title="Wonderwall", artist="Oasis")
+    )
+    journal.record_song("YouTube", Song(id="2", title="Missing", artist="Oasis"), None)
+    journal.record_artist("YouTube", Artist(id="1", name="Oasis"), None)
+
+    songs = journal.songs("YouTube")
+    match = songs[song.match_key]
+    assert match is not None
+    assert match.id == "yt"
+    assert songs[("missing", "oasis")] is None
+    assert journal.artists("YouTube") == {"oasis": None}
+    assert journal.songs("Spotify") == {}
+
+    journal.clear()
+    assert journal.songs("YouTube") == {}
+
+
+def test_interrupted_sync_resumes_without_repeating_work(
+    journal: SyncJournal, monkeypatch: pytest.MonkeyPatch
+):
+    source = InMemoryClient(
+        "Source",
+        generate_library("source", user_playlists=3, followed_playlists=0),
+    )
+    destination = InMemoryClient("Destination")
+    create_playlist = destination.create_playlist
+
+    def fail_after_first_playlist(name, songs):
+        if destination.calls["create_playlist"]:
+            raise ConnectionError("Connection lost")
+        return create_playlist(name, songs)
+
+    monkeypatch.setattr(destination, "create_playlist", fail_after_first_playlist)
+    with pytest.raises(ConnectionError):
+        sync_users_playlists(source, destination, journal=journal)
+
+    searches = destination.calls["search_songs"]
+    monkeypatch.setattr(destination, "create_playlist", create_playlist)
+    synced = sync_users_playlists(source, destination, journal=journal)
+
+    assert len(synced) == 2
+    assert destination.calls["search_songs"] == searches
+    assert destination.calls["create_playlist"] == 3
@@ -0,0 +1,30 @@
+import threading
+import time
+
+from musync.locking import file_lock
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    path = tmp_path / "locks" / "token.lock"
+    holders = 0
+    max_holders = 0
+    counter_lock = threading.Lock()
+
+    def hold_lock() -> None:
+        nonlocal holders, max_holders
+        with file_lock(path):
+            with counter_lock:
+                holders += 1
+                max_holders = max(max_holders, holders)
+            time.sleep(0.01)
+            with counter_lock:
+                holders -= 1
+
+    threads = [threading.Thread(target=hold_lock) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max_holders == 1
+    assert path.exists()
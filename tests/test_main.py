@@ -0,0 +1,55 @@
+import subprocess
+import sys
+
+import pytest
+
+from musync.main import serial_when_profiling
+from musync.profiling import profiler
+
+
+def imported_modules(statement: str) -> dict[str, int]:
+    """Return the cumulative import time, in microseconds, of every module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            modules[module.strip()] = int(cumulative)
+
+    return modules
+
+
+def test_cli_does_not_import_provider_libraries():
+    modules = imported_modules("import musync.main")
+
+    assert "musync.main" in modules
+    for module in ("spotipy", "ytmusicapi", "requests", "musync.providers.spotify"):
+        assert module not in modules
+
+
+def test_provider_libraries_are_imported_when_used():
+    modules = imported_modules(
+        "from musync.providers.registry import get_provider_class; "
+        "get_provider_class('spotify')"
+    )
+
+    assert "spotipy" in modules
+    assert "ytmusicapi" not in modules
+
+
+def test_profiling_does_the_work_on_the_main_thread(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    assert serial_when_profiling(4, 8) == (4, 8)
+
+    monkeypatch.setattr(profiler, "output_dir", tmp_path)
+    assert serial_when_profiling(4, 8) == (1, None)
+    assert serial_when_profiling(4) == (1, None)
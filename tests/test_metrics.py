@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from musync.metrics import Metrics, metrics
+from musync.models import Song
+from musync.providers.instrumented import InstrumentedClient
+from musync.providers.memory import InMemoryClient
+
+
+def test_calls_are_aggregated_per_provider_and_endpoint():
+    run_metrics = Metrics()
+
+    run_metrics.record("http", "Spotify", "GET api.spotify.com", 0.02, status_code=200)
+    run_metrics.record(
+        "http",
+        "Spotify",
+        "GET api.spotify.com",
+        3,
+        error=True,
+        throttled=True,
+        status_code=429,
+        bytes_received=10,
+    )
+
+    [stats] = run_metrics.report().http_requests
+    assert stats.calls == 2
+    assert stats.errors == 1
+    assert stats.throttled == 1
+    assert stats.bytes_received == 10
+    assert stats.status_codes == {"200": 1, "429": 1}
+    assert stats.latency_histogram == {"<=0.025": 1, "<=5": 1}
+
+
+def test_phase_timings_are_summed(tmp_path):
+    run_metrics = Metrics()
+
+    with run_metrics.phase("resolve"):
+        pass
+    with pytest.raises(ValueError), run_metrics.phase("resolve"):
+        raise ValueError
+
+    run_metrics.write(tmp_path / "report.json")
+
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert list(report["phases"]) == ["resolve"]
+    assert report["phases"]["resolve"] >= 0
+
+
+def test_instrumented_client_records_method_and_api_calls():
+    run_metrics = Metrics()
+    client = InstrumentedClient(InMemoryClient(provider_name="Metrics"), run_metrics)
+
+    client.find_song(Song(id="1", title="Title", artist="Artist", album="Album"))
+
+    report = run_metrics.report()
+    assert [(stats.endpoint, stats.calls) for stats in report.client_calls] == [
+        ("find_song", 1)
+    ]
+    # API calls go through the rate limiter, which records them globally
+    assert any(
+        stats.provider == "Metrics" and stats.calls == 1
+        for stats in metrics.report().api_calls
+    )
@@ -0,0 +1,121 @@
+from musync.models import Playlist, Song
+from musync.plan import SyncPlan
+from musync.providers.memory import InMemoryClient, Library, generate_library
+from musync.sync import apply_sync_plan, plan_sync
+
+
+def make_clients() -> tuple[InMemoryClient, InMemoryClient]:
+    source = InMemoryClient(
+        "Source",
+        generate_library(
+            "source",
+            user_playlists=4,
+            followed_playlists=2,
+            tracks_per_playlist=30,
+            artists=20,
+            followed_artists=5,
+        ),
+    )
+    return source, InMemoryClient("Destination")
+
+
+def test_plan_searches_without_writing(tmp_path):
+    source, destination = make_clients()
+
+    sync_plan = plan_sync(source, destination, "memory")
+    path = tmp_path / "plan.json"
+    sync_plan.write(path)
+
+    assert destination.calls["search_songs"] > 0
+    assert destination.calls["create_playlist"] == 0
+    assert destination.calls["follow_artists"] == 0
+    assert len(sync_plan.playlists) == 6
+    assert all(playlist.creates_playlist for playlist in sync_plan.playlists)
+    assert len(sync_plan.artists_to_follow) == 5
+    assert SyncPlan.from_file(path) == sync_plan
+
+
+def test_apply_only_writes(tmp_path):
+    source, destination = make_clients()
+    path = tmp_path / "plan.json"
+    plan_sync(source, destination, "memory").write(path)
+    source_calls = sum(source.calls.values())
+    searches = destination.calls["search_songs"] + destination.calls["search_artists"]
+
+    applied = apply_sync_plan(destination, SyncPlan.from_file(path), concurrency=4)
+
+    assert len(applied) == 6
+    assert destination.calls["create_playlist"] == 6
+    assert destination.calls["follow_artists"] == 1
+    assert sum(source.calls.values()) == source_calls
+    assert (
+        destination.calls["search_songs"] + destination.calls["search_artists"]
+        == searches
+    )
+
+    synced = {playlist.name: playlist for playlist in destination.get_user_playlists()}
+    for playlist in source.get_user_playlists() + source.get_followed_playlists():
+        assert len(synced[f"{playlist.name} [MUSYNC]"].songs) == len(playlist.songs)
+
+    # Applying the same plan again changes nothing
+    assert apply_sync_plan(destination, SyncPlan.from_file(path)) == []
+    assert destination.calls["create_playlist"] == 6
+
+
+def test_mirror_plan_removes_and_reorders_songs():
+    songs = [
+        Song(id=str(number), title=f"Song {number}", artist="Oasis")
+        for number in range(5)
+    ]
+    source = InMemoryClient(
+        "Source",
+        Library(
+            user_playlists=[
+                Playlist(id="1", name="Britpop", songs=songs[::-1][:4]),
+            ]
+        ),
+    )
+    destination = InMemoryClient("Destination")
+    destination.create_playlist(
+        "Britpop [MUSYNC]", [destination.find_song(song) for song in songs]
+    )
+
+    sync_plan = plan_sync(
+        source, destination, "memory", followed_artists=False, mirror=True
+    )
+    [playlist_plan] = sync_plan.playlists
+    assert playlist_plan.removals == [0]
+    assert playlist_plan.additions == []
+    assert playlist_plan.moves
+
+    apply_sync_plan(destination, sync_plan)
+
+    synced = destination.get_playlist_by_name("Britpop [MUSYNC]")
+    assert [song.title for song in synced.songs] == [
+        song.title for song in songs[::-1][:4]
+    ]
+
+
+def test_apply_does_not_fetch_playlists_without_writes():
+    songs = [
+        Song(id=str(number), title=f"Song {number}", artist="Oasis")
+        for number in range(3)
+    ]
+    source = InMemoryClient(
+        "Source",
+        Library(user_playlists=[Playlist(id="1", name="Britpop", songs=songs)]),
+    )
+    destination = InMemoryClient("Destination")
+    destination.create_playlist(
+        "Britpop [MUSYNC]", [destination.find_song(song) for song in songs]
+    )
+    sync_plan = plan_sync(source, destination, "memory", followed_artists=False)
+    [playlist_plan] = sync_plan.playlists
+    assert not playlist_plan.has_writes
+    destination.refresh()
+    destination.calls.clear()
+
+    applied = apply_sync_plan(destination, sync_plan)
+
+    assert [playlist.name for playlist in applied] == ["Britpop [MUSYNC]"]
+    assert destination.calls["playlist_tracks"] == 0
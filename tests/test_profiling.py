@@ -0,0 +1,44 @@
+import pstats
+
+from musync.profiling import Profiler
+
+
+def test_phases_are_only_profiled_when_enabled(tmp_path):
+    profiler = Profiler()
+
+    @profiler.profile("sync_users_playlists")
+    def sync_users_playlists(count: int) -> int:
+        return sum(range(count))
+
+    assert sync_users_playlists(10) == 45
+    profiler.report()
+    assert not list(tmp_path.iterdir())
+
+    profiler.enable(tmp_path / "profiles", top=5)
+    assert sync_users_playlists(10) == 45
+    assert sync_users_playlists(100) == 4950
+    profiler.report()
+
+    stats = pstats.Stats(str(tmp_path / "profiles" / "sync_users_playlists.prof"))
+    [(_, calls, *_)] = [
+        value for key, value in stats.stats.items() if key[2] == "sync_users_playlists"
+    ]
+    assert calls == 2
+
+
+def test_nested_phases_are_profiled_by_the_outer_phase(tmp_path):
+    profiler = Profiler()
+    profiler.enable(tmp_path)
+
+    @profiler.profile("inner")
+    def inner() -> str:
+        return "inner"
+
+    @profiler.profile("outer")
+    def outer() -> str:
+        return inner()
+
+    assert outer() == "inner"
+    profiler.report()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["outer.prof"]
@@ -0,0 +1,67 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from musync import ratelimit
+from musync.ratelimit import RateLimiter, TokenBucket
+
+
+class Throttled(Exception):
+    pass
+
+
+def retry_after(error: Exception) -> float | None:
+    return 2 if isinstance(error, Throttled) else None
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps: list[float] = []
+    monkeypatch.setattr(ratelimit.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_token_bucket_allows_bursts_then_waits(sleeps):
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.1, abs=0.01)
+    assert len(sleeps) == 1
+
+
+def test_throttled_calls_are_retried_after_delay(sleeps):
+    rate_limiter = RateLimiter(
+        "Spotify", {"search": TokenBucket(rate=100)}, retry_after, backoff=0
+    )
+    fn = MagicMock(side_effect=[Throttled(), Throttled(), "result"])
+
+    assert rate_limiter.call("search", fn, "query") == "result"
+
+    assert fn.call_count == 3
+    assert rate_limiter.throttled_calls == 2
+    # Retry-After is honoured, plus up to 25% jitter
+    assert all(1.9 <= sleep <= 2.5 for sleep in sleeps)
+    assert rate_limiter.wait_seconds["search"] >= 3.8
+
+
+def test_other_errors_are_not_retried(sleeps):
+    rate_limiter = RateLimiter("Spotify", {"read": TokenBucket(rate=100)}, retry_after)
+    fn = MagicMock(side_effect=ValueError())
+
+    with pytest.raises(ValueError):
+        rate_limiter.call("read", fn)
+
+    fn.assert_called_once()
+
+
+def test_gives_up_after_max_retries(sleeps):
+    rate_limiter = RateLimiter(
+        "Spotify", {"read": TokenBucket(rate=100)}, retry_after, max_retries=2
+    )
+    fn = MagicMock(side_effect=Throttled())
+
+    with pytest.raises(Throttled):
+        rate_limiter.call("read", fn)
+
+    assert fn.call_count == 3
@@ -0,0 +1,107 @@
+import pytest
+
+from musync.models import Playlist, Song
+from musync.providers.base import ReadOnlyProviderError
+from musync.providers.memory import InMemoryClient, Library, generate_library
+from musync.providers.snapshot import SnapshotClient
+from musync.snapshot import Snapshot, StringTable, write_snapshot
+from musync.sync import sync_followed_artists, sync_users_playlists
+
+
+@pytest.fixture
+def source():
+    return InMemoryClient(
+        "Source",
+        generate_library(
+            "source",
+            user_playlists=5,
+            followed_playlists=3,
+            tracks_per_playlist=40,
+            unique_tracks=60,
+        ),
+    )
+
+
+def test_string_table_interns_strings():
+    strings = StringTable()
+
+    assert strings.intern(None) == 0
+    assert strings.intern("Oasis") == strings.intern("Oasis") == 1
+    assert strings.intern("Blur") == 2
+
+    decoded = StringTable.decode(strings.encode())
+    assert decoded.lookup(0) is None
+    assert decoded[1] == "Oasis"
+    assert decoded.intern("Blur") == 2
+
+
+def test_snapshot_round_trip(tmp_path, source: InMemoryClient):
+    path = tmp_path / "library.bin"
+    write_snapshot(source, path)
+
+    with SnapshotClient(path) as client:
+        assert client.provider_name == "Source"
+        assert client.user_id == source.user_id
+
+        for expected, loaded in [
+            (source.get_user_playlists(), client.get_user_playlists()),
+            (source.get_followed_playlists(), client.get_followed_playlists()),
+        ]:
+            assert [playlist.id for playlist in loaded] == [
+                playlist.id for playlist in expected
+            ]
+            assert not any(playlist.songs_loaded for playlist in loaded)
+            assert [playlist.track_count for playlist in loaded] == [
+                len(playlist.songs) for playlist in expected
+            ]
+            assert [playlist.songs for playlist in loaded] == [
+                playlist.songs for playlist in expected
+            ]
+
+        assert client.get_followed_artists() == source.get_followed_artists()
+        with pytest.raises(ReadOnlyProviderError):
+            client.create_playlist("Britpop", [])
+
+
+def test_snapshot_interns_repeated_strings(tmp_path):
+    songs = [
+        Song(id=str(number), title="Wonderwall", artist="Oasis", album="Be Here Now")
+        for number in range(1000)
+    ]
+    client = InMemoryClient(
+        "Source",
+        Library(user_playlists=[Playlist(id="1", name="Britpop", songs=songs)]),
+    )
+
+    path = tmp_path / "library.bin"
+    write_snapshot(client, path)
+
+    json_size = sum(len(song.model_dump_json()) for song in songs)
+    assert path.stat().st_size < json_size / 10
+
+
+def test_sync_from_snapshot_does_not_call_the_source(tmp_path, source):
+    path = tmp_path / "library.bin"
+    write_snapshot(source, path)
+    calls = sum(source.calls.values())
+
+    for name in ["First", "Second"]:
+        destination = InMemoryClient(name)
+        with SnapshotClient(path) as snapshot_client:
+            synced = sync_users_playlists(snapshot_client, destination)
+            sync_followed_artists(snapshot_client, destination)
+
+        assert len(synced) == 5
+        assert destination.calls["create_playlist"] == 5
+        assert destination.calls["follow_artists"] > 0
+
+    assert sum(source.calls.values()) == calls
+
+
+def test_incomplete_snapshot_is_rejected(tmp_path, source):
+    path = tmp_path / "library.bin"
+    write_snapshot(source, path)
+    path.write_bytes(path.read_bytes()[:-1])
+
+    with pytest.raises(ValueError, match="incomplete"):
+        Snapshot(path)
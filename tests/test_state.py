@@ -0,0 +1,134 @@
+import sqlite3
+from unittest.mock import MagicMock
+
+import pytest
+
+from musync.models import Playlist
+from musync.state import SyncState
+from musync.sync import sync_playlists
+
+
+@pytest.fixture
+def sync_state(tmp_path):
+    state = SyncState(tmp_path / "sync_state.db")
+    yield state
+    state.close()
+
+
+@pytest.fixture
+def source_client():
+    return MagicMock(provider_name="Spotify")
+
+
+@pytest.fixture
+def destination_client():
+    client = MagicMock(provider_name="YouTube", read_only=False)
+    client.get_playlist_by_name.return_value = Playlist(
+        id="destination_playlist", name="Britpop [MUSYNC]", songs=[]
+    )
+    client.add_songs_to_playlist.side_effect = lambda playlist, songs: playlist
+    return client
+
+
+def test_unchanged_playlist_is_up_to_date(
+    sync_state: SyncState, source_client, destination_client
+):
+    playlist = Playlist(id="1", name="Britpop", version="snapshot_1", songs=[])
+    destination_playlist = Playlist(
+        id="destination_playlist", name="Britpop [MUSYNC]", songs=[]
+    )
+
+    sync_state.record(source_client, destination_client, playlist, destination_playlist)
+
+    assert sync_state.is_up_to_date(
+        source_client, destination_client, playlist, "Britpop [MUSYNC]"
+    )
+
+    changed_playlist = Playlist(id="1", name="Britpop", version="snapshot_2", songs=[])
+    assert not sync_state.is_up_to_date(
+        source_client, destination_client, changed_playlist, "Britpop [MUSYNC]"
+    )
+
+
+def test_appended_playlist_is_not_up_to_date_for_a_mirror(
+    sync_state: SyncState, source_client, destination_client
+):
+    playlist = Playlist(id="1", name="Britpop", version="snapshot_1", songs=[])
+    destination_playlist = Playlist(
+        id="destination_playlist", name="Britpop [MUSYNC]", songs=[]
+    )
+
+    sync_state.record(source_client, destination_client, playlist, destination_playlist)
+    assert not sync_state.is_up_to_date(
+        source_client, destination_client, playlist, "Britpop [MUSYNC]", mirror=True
+    )
+
+    sync_state.record(
+        source_client, destination_client, playlist, destination_playlist, mirror=True
+    )
+    for mirror in [True, False]:
+        assert sync_state.is_up_to_date(
+            source_client, destination_client, playlist, "Britpop [MUSYNC]", mirror
+        )
+
+
+def test_state_from_before_sync_modes_is_migrated(
+    tmp_path, source_client, destination_client
+):
+    path = tmp_path / "sync_state.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE playlist_syncs (source_provider TEXT NOT NULL, "
+            "source_playlist_id TEXT NOT NULL, destination_provider TEXT NOT NULL, "
+            "version TEXT NOT NULL, destination_playlist_id TEXT NOT NULL, "
+            "synced_at REAL NOT NULL, PRIMARY KEY (source_provider, "
+            "source_playlist_id, destination_provider))"
+        )
+        connection.execute(
+            "INSERT INTO playlist_syncs VALUES "
+            "('Spotify', '1', 'YouTube', 'snapshot_1', 'destination_playlist', 0)"
+        )
+    connection.close()
+
+    sync_state = SyncState(path)
+    playlist = Playlist(id="1", name="Britpop", version="snapshot_1", songs=[])
+
+    assert sync_state.get(source_client, destination_client, playlist) == (
+        "snapshot_1",
+        "destination_playlist",
+        False,
+    )
+    assert not sync_state.is_up_to_date(
+        source_client, destination_client, playlist, "Britpop [MUSYNC]", mirror=True
+    )
+    sync_state.close()
+
+
+def test_deleted_destination_playlist_is_not_up_to_date(
+    sync_state: SyncState, source_client, destination_client
+):
+    playlist = Playlist(id="1", name="Britpop", version="snapshot_1", songs=[])
+    destination_playlist = Playlist(
+        id="destination_playlist", name="Britpop [MUSYNC]", songs=[]
+    )
+    sync_state.record(source_client, destination_client, playlist, destination_playlist)
+
+    destination_client.get_playlist_by_name.return_value = None
+
+    assert not sync_state.is_up_to_date(
+        source_client, destination_client, playlist, "Britpop [MUSYNC]"
+    )
+
+
+def test_sync_playlists_skips_unchanged_playlists(
+    sync_state: SyncState, source_client, destination_client
+):
+    load_songs = MagicMock(return_value=[])
+    playlist = Playlist(
+        id="1", name="Britpop", version="snapshot_1", load_songs=load_songs
+    )
+
+    sync_playlists(source_client, destination_client, [playlist], sync_state=sync_state)
+    sync_playlists(source_client, destination_client, [playlist], sync_state=sync_state)
+
+    load_songs.assert_called_once()
@@ -0,0 +1,254 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from musync.models import Playlist, Song
+from musync.models.artist import Artist
+from musync.providers.memoized import MemoizedClient
+from musync.providers.memory import InMemoryClient, Library, generate_library
+from musync.sync import (
+    resolve_songs,
+    stream_playlists,
+    sync_followed_artists,
+    sync_followed_playlists,
+    sync_playlists,
+    sync_users_playlists,
+)
+
+
+def slow_find_song(song: Song) -> Song | None:
+    # Later songs return first, so results only stay ordered if we reorder them
+    time.sleep(0.01 * (5 - int(song.id)))
+    if song.id == "3":
+        return None
+    return Song(id=f"destination_{song.id}", title=song.title, artist=song.artist)
+
+
+def test_resolve_songs_keeps_source_order():
+    destination_client = MagicMock()
+    destination_client.find_song.side_effect = slow_find_song
+    songs = [Song(id=str(i), title=f"Song {i}", artist="Oasis") for i in range(5)]
+
+    results = resolve_songs(destination_client, songs, concurrency=5)
+
+    assert [result.id if result else None for result in results] == [
+        "destination_0",
+        "destination_1",
+        "destination_2",
+        None,
+        "destination_4",
+    ]
+
+
+def test_sync_playlists_skips_songs_already_added():
+    source_client = MagicMock(provider_name="Spotify")
+    destination_client = MagicMock(provider_name="YouTube")
+    destination_client.find_song.side_effect = slow_find_song
+    destination_client.get_playlist_by_name.return_value = Playlist(
+        id="destination_playlist",
+        name="Britpop [MUSYNC]",
+        songs=[Song(id="destination_0", title="Song 0", artist="Oasis")],
+    )
+    playlist = Playlist(
+        id="source_playlist",
+        name="Britpop",
+        songs=[Song(id=str(i), title=f"Song {i}", artist="Oasis") for i in range(5)],
+    )
+
+    sync_playlists(source_client, destination_client, [playlist], concurrency=4)
+
+    assert destination_client.find_song.call_count == 4
+    added_songs = destination_client.add_songs_to_playlist.call_args.args[1]
+    assert [song.id for song in added_songs] == [
+        "destination_1",
+        "destination_2",
+        "destination_4",
+    ]
+
+
+def test_sync_playlists_searches_each_song_once():
+    source_client = MagicMock(provider_name="Spotify")
+    destination_client = MagicMock(provider_name="YouTube")
+    destination_client.find_song.side_effect = slow_find_song
+    destination_client.get_playlist_by_name.return_value = None
+    playlists = [
+        Playlist(
+            id=f"source_playlist_{i}",
+            name=f"Britpop {i}",
+            songs=[
+                Song(id="1", title="Song 1", artist="Oasis"),
+                Song(id="2", title="song 1", artist="OASIS"),
+                Song(id=str(i), title=f"Song {i}", artist="Oasis"),
+            ],
+        )
+        for i in range(3)
+    ]
+
+    sync_playlists(source_client, destination_client, playlists, concurrency=2)
+
+    assert destination_client.find_song.call_count == 3
+    assert destination_client.create_playlist.call_count == 3
+    created_songs = destination_client.create_playlist.call_args_list[2].args[1]
+    assert [song.id for song in created_songs] == [
+        "destination_1",
+        "destination_1",
+        "destination_2",
+    ]
+
+
+def test_stream_playlists_writes_while_later_playlists_are_fetched():
+    source_client = MagicMock(provider_name="Spotify")
+    destination_client = MagicMock(provider_name="YouTube")
+    destination_client.find_song.side_effect = slow_find_song
+    destination_client.get_playlist_by_name.return_value = None
+    first_written = threading.Event()
+
+    def create_playlist(name: str, songs: list[Song]) -> Playlist:
+        first_written.set()
+        return Playlist(id=name, name=name, songs=songs)
+
+    destination_client.create_playlist.side_effect = create_playlist
+    fetched: list[str] = []
+
+    def playlists():
+        for i in range(3):
+            if i == 2:
+                # Only reached once the first playlist has been written
+                assert first_written.wait(timeout=5)
+            fetched.append(f"source_playlist_{i}")
+            yield Playlist(
+                id=f"source_playlist_{i}",
+                name=f"Britpop {i}",
+                songs=[
+                    Song(id="1", title="Song 1", artist="Oasis"),
+                    Song(id=str(i), title=f"Song {i}", artist="Oasis"),
+                ],
+            )
+
+    results = stream_playlists(
+        source_client, destination_client, playlists(), concurrency=2, window=1
+    )
+
+    assert len(results) == 3
+    assert len(fetched) == 3
+    assert destination_client.find_song.call_count == 3
+    assert [
+        call.args[0] for call in destination_client.create_playlist.call_args_list
+    ] == ["Britpop 0 [MUSYNC]", "Britpop 1 [MUSYNC]", "Britpop 2 [MUSYNC]"]
+
+
+def test_stream_playlists_raises_fetch_errors():
+    source_client = MagicMock(provider_name="Spotify")
+    destination_client = MagicMock(provider_name="YouTube")
+    destination_client.get_playlist_by_name.return_value = None
+
+    def playlists():
+        yield Playlist(id="source_playlist", name="Britpop", songs=[])
+        raise RuntimeError("Listing failed")
+
+    with pytest.raises(RuntimeError, match="Listing failed"):
+        stream_playlists(source_client, destination_client, playlists())
+
+    assert destination_client.create_playlist.call_count == 1
+
+
+def test_streamed_playlists_songs_are_not_kept():
+    source_client = MemoizedClient(
+        InMemoryClient(
+            "Spotify",
+            generate_library("spotify", user_playlists=40, followed_playlists=0),
+        )
+    )
+    destination_client = InMemoryClient("YouTube")
+
+    results = sync_users_playlists(source_client, destination_client, stream_window=2)
+
+    assert len(results) == 40
+    assert not any(playlist.songs_loaded for playlist in results)
+    remembered = source_client._user_playlists
+    assert remembered is not None and len(remembered) == 40
+    assert not any(playlist.songs_loaded for playlist in remembered)
+    indexed = destination_client.playlist_index._playlists.values()
+    assert len(indexed) == 40
+    assert not any(playlist.songs_loaded for playlist in indexed)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_playlists_with_the_same_name_are_synced_to_one_playlist(stream: bool):
+    source_client = InMemoryClient("Spotify")
+    destination_client = InMemoryClient("YouTube")
+    playlists = [
+        Playlist(
+            id=f"source_playlist_{i}",
+            name="Britpop",
+            songs=[Song(id=str(i), title=f"Song {i}", artist="Oasis")],
+        )
+        for i in range(3)
+    ]
+
+    if stream:
+        stream_playlists(source_client, destination_client, iter(playlists))
+    else:
+        sync_playlists(source_client, destination_client, playlists)
+
+    assert destination_client.calls["create_playlist"] == 1
+    assert destination_client.calls["add_playlist_items"] == 3
+    [destination_playlist] = destination_client.get_user_playlists()
+    assert destination_playlist.name == "Britpop [MUSYNC]"
+    assert [song.title for song in destination_playlist.songs] == [
+        "Song 0",
+        "Song 1",
+        "Song 2",
+    ]
+
+
+@pytest.mark.parametrize("stream_window", [None, 2])
+def test_sync_followed_playlists_skips_musync_playlists(stream_window: int | None):
+    source_client = InMemoryClient(
+        "Spotify",
+        Library(
+            followed_playlists=[
+                Playlist(id="1", name="Shoegaze", songs=[]),
+                Playlist(id="2", name="Britpop [MUSYNC]", songs=[]),
+            ]
+        ),
+    )
+    destination_client = InMemoryClient("YouTube")
+
+    sync_followed_playlists(
+        source_client, destination_client, stream_window=stream_window
+    )
+
+    assert [playlist.name for playlist in destination_client.get_user_playlists()] == [
+        "Shoegaze [MUSYNC]"
+    ]
+
+
+def test_sync_followed_artists_skips_followed_artists_and_follows_in_bulk():
+    source_client = MagicMock(provider_name="Spotify")
+    source_client.get_followed_artists.return_value = [
+        Artist(id="1", name="Oasis"),
+        Artist(id="2", name="Blur"),
+        Artist(id="3", name="Pulp"),
+        Artist(id="4", name="Suede"),
+    ]
+    destination_client = MagicMock(provider_name="YouTube")
+    destination_client.get_followed_artists.return_value = [
+        Artist(id="destination_1", name="OASIS")
+    ]
+    destination_client.find_artist.side_effect = lambda artist: (
+        None
+        if artist.name == "Suede"
+        else Artist(id=f"destination_{artist.id}", name=artist.name)
+    )
+
+    synced_artists = sync_followed_artists(source_client, destination_client)
+
+    assert [artist.id for artist in synced_artists] == [
+        "destination_2",
+        "destination_3",
+    ]
+    assert destination_client.find_artist.call_count == 3
+    destination_client.follow_artists.assert_called_once_with(synced_artists)